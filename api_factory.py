@@ -0,0 +1,10 @@
+def create_api(name, db=None):
+    """API 구현 선택 (fdr: FinanceDataReader, pykrx: pykrx)
+    
+    구현 모듈은 선택한 것만 import합니다 (스케줄러/벤치마크 시작 시간 단축).
+    """
+    if name == 'pykrx':
+        from stock_api import StockAPI
+        return StockAPI(db)
+    from stock_api_fdr import StockAPIFDR
+    return StockAPIFDR(db)
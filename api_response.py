@@ -0,0 +1,132 @@
+import os
+import gzip
+import json
+import logging
+import numpy as np
+from flask import request
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+except ImportError:
+    # orjson이 없으면 표준 json으로 직렬화 (NumPy 배열은 리스트로 변환)
+    orjson = None
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+logger = logging.getLogger(__name__)
+
+# 이보다 작은 응답은 압축하지 않음 (바이트, 압축 이득보다 CPU 비용이 큼)
+COMPRESS_MIN_SIZE = int(os.environ.get('STOCK_COMPRESS_MIN_SIZE', 1024))
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 5
+COMPRESSIBLE_MIMETYPES = ('application/json', 'text/html', 'text/css', 'text/plain', 'text/javascript', 'application/javascript')
+
+
+def _default(obj):
+    """JSON 기본 직렬화로 처리되지 않는 값 변환 (NumPy 배열/스칼라, pandas 타임스탬프 등)"""
+    if isinstance(obj, np.ndarray):
+        # NaN은 null로 (orjson과 같은 결과)
+        return [None if value != value else value for value in obj.tolist()]
+    if isinstance(obj, np.generic):
+        return obj.item()
+    if hasattr(obj, 'isoformat'):
+        return obj.isoformat()
+    return str(obj)
+
+
+def _orjson_default(obj):
+    # memmap 등 ndarray 하위 클래스나 연속되지 않은 배열은 일반 배열로 바꿔 다시 직렬화
+    if isinstance(obj, np.ndarray):
+        return np.ascontiguousarray(obj)
+    return _default(obj)
+
+
+ORJSON_OPTIONS = orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS if orjson is not None else 0
+
+
+def dumps(obj):
+    """obj를 JSON bytes로 직렬화 (NumPy 배열/스칼라 지원, NaN은 null)"""
+    if orjson is not None:
+        return orjson.dumps(obj, default=_orjson_default, option=ORJSON_OPTIONS)
+    return json.dumps(obj, default=_default, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+
+def gzip_compress(data):
+    """응답 압축과 같은 설정의 gzip (mtime=0이라 같은 입력이면 같은 결과)"""
+    return gzip.compress(data, compresslevel=GZIP_LEVEL, mtime=0)
+
+
+class FastJSONProvider(DefaultJSONProvider):
+    """orjson 기반 Flask JSON 프로바이더
+    
+    NumPy 배열(memmap 슬라이스 포함)을 중간 리스트 없이 바로 직렬화하며 NaN은 null이 됩니다.
+    orjson이 설치되어 있지 않으면 표준 json으로 같은 형식을 만듭니다.
+    """
+    
+    def dumps(self, obj, **kwargs):
+        return dumps(obj).decode('utf-8')
+    
+    def loads(self, s, **kwargs):
+        if orjson is not None:
+            return orjson.loads(s)
+        return json.loads(s, **kwargs)
+    
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(dumps(obj), mimetype=self.mimetype)
+
+
+def _negotiate_encoding():
+    """Accept-Encoding에서 사용할 압축 방식 선택 (br 우선, 없으면 gzip)"""
+    accept = request.accept_encodings
+    if brotli is not None and accept['br']:
+        return 'br'
+    if accept['gzip']:
+        return 'gzip'
+    return None
+
+
+def compress_response(response):
+    """after_request 훅: 충분히 큰 텍스트/JSON 응답을 gzip 또는 brotli로 압축
+    
+    스트리밍(제너레이터) 응답, 파일 전송, 이미 인코딩된 응답, 200 이외의 응답은 그대로 둡니다.
+    """
+    response.vary.add('Accept-Encoding')
+    if (
+        response.status_code != 200
+        or response.is_streamed
+        or response.direct_passthrough
+        or 'Content-Encoding' in response.headers
+        or response.mimetype not in COMPRESSIBLE_MIMETYPES
+    ):
+        return response
+    
+    encoding = _negotiate_encoding()
+    if encoding is None:
+        return response
+    
+    data = response.get_data()
+    if len(data) < COMPRESS_MIN_SIZE:
+        return response
+    
+    if encoding == 'br':
+        compressed = brotli.compress(data, quality=BROTLI_QUALITY)
+    else:
+        compressed = gzip_compress(data)
+    response.set_data(compressed)
+    response.headers['Content-Encoding'] = encoding
+    return response
+
+
+def init_app(app):
+    """Flask 앱에 빠른 JSON 직렬화와 응답 압축 적용"""
+    app.json = FastJSONProvider(app)
+    app.after_request(compress_response)
+    logger.info(
+        f"JSON serializer: {'orjson' if orjson is not None else 'json'}, "
+        f"compression: {'br, ' if brotli is not None else ''}gzip (min {COMPRESS_MIN_SIZE} bytes)"
+    )
@@ -1,13 +1,36 @@
-from flask import Flask, render_template, jsonify, request
+from flask import Flask, render_template, jsonify, request, Response, stream_with_context, send_from_directory
 from flask_cors import CORS
+import gc
 import json
 import logging
 import time
 import os
+from datetime import date
+import numpy as np
 from stock_api_fdr import StockAPIFDR
+from ingestion_jobs import IngestionJobManager
+from response_cache import ResponseCache
+from http_cache import conditional_get
+from columnar_store import format_days, is_valid_symbol
+from snapshot import summary_columns, refresh_snapshot
+from quote_stream import QuoteHub, create_quote_source
+from downsample import downsample, RESOLUTIONS
+from indicators import INDICATOR_NAMES
+from exporter import EXPORT_FORMATS, stream_export
+from database import StockDatabase, EXPORT_CHUNK_ROWS
+import api_response
+import metrics
+import profiling
+from universe import parse_shard
 
 app = Flask(__name__)
 CORS(app)
+# 요청별(X-Profile 토큰)/샘플링 프로파일링 (직렬화와 압축까지 포함하도록 가장 먼저 등록)
+profiling.init_app(app)
+# 라우트별 요청 처리 시간 기록 (압축까지 포함하도록 압축보다 먼저 등록)
+metrics.init_app(app)
+# orjson 직렬화와 gzip/brotli 응답 압축
+api_response.init_app(app)
 
 # 로깅 설정
 logging.basicConfig(
@@ -17,7 +40,40 @@ logging.basicConfig(
 logger = logging.getLogger(__name__)
 
 # 전역 변수로 StockAPIFDR 인스턴스 생성 (FinanceDataReader 사용)
-stock_api = StockAPIFDR()
+# gunicorn.conf.py의 on_starting에서 스키마 마이그레이션을 마쳤으면 다시 하지 않음
+stock_api = StockAPIFDR(StockDatabase(init_schema=os.environ.get('STOCK_SCHEMA_READY') != '1'))
+
+# 데이터 수집은 요청 스레드가 아닌 백그라운드 작업으로 실행
+job_manager = IngestionJobManager(stock_api)
+
+# 실시간 시세 스트림 (작업자 프로세스마다 폴러 하나가 모든 연결에 바뀐 시세를 전달)
+quote_hub = QuoteHub(create_quote_source(stock_api.db))
+
+# 한 번에 조회할 수 있는 최대 종목 수 (/api/chart-data?symbols=...)
+MAX_BATCH_SYMBOLS = int(os.environ.get('STOCK_MAX_BATCH_SYMBOLS', 200))
+
+# 데이터 버전별 응답 캐시 (수집이 끝나 버전이 바뀌면 무효화)
+response_cache = ResponseCache(
+    lambda: stock_api.db.data_version.version,
+    max_entries=int(os.environ.get('STOCK_CACHE_SIZE', 256))
+)
+
+def data_version(**kwargs):
+    """전체 데이터 버전 (ETag/Last-Modified 기준)"""
+    state = stock_api.db.data_version.current()
+    return state['version'], state['updated_at']
+
+def symbol_data_version(symbol, **kwargs):
+    """종목별 데이터 버전 (ETag/Last-Modified 기준)"""
+    return stock_api.db.data_version.symbol_version(symbol)
+
+def snapshot_response(snapshot, name):
+    """스냅샷에 미리 직렬화해 둔 응답 본문 (gzip을 받는 클라이언트에는 미리 압축한 본문)"""
+    compressed = bool(request.accept_encodings['gzip'])
+    response = Response(snapshot.body(name, compressed=compressed), mimetype='application/json')
+    if compressed:
+        response.headers['Content-Encoding'] = 'gzip'
+    return response
 
 @app.route('/')
 def index():
@@ -25,20 +81,42 @@ def index():
     return render_template('index.html')
 
 @app.route('/api/stocks')
+@conditional_get(data_version)
 def get_stocks():
-    """전체 주식 목록 및 요약 정보 API"""
+    """전체 주식 목록 및 요약 정보 API
+    
+    shape=columns이면 종목마다 키를 반복하는 대신 {필드: [값, ...]} 형태의 컬럼 배열로 반환합니다.
+    """
     try:
-        logger.info("Fetching all stocks summary")
+        shape = request.args.get('shape', 'rows')
+        logger.info(f"Fetching all stocks summary ({shape})")
         start_time = time.time()
         
-        summary = stock_api.get_all_stocks_summary()
+        if shape not in ('rows', 'columns'):
+            return jsonify({
+                'success': False,
+                'error': f'Invalid shape: {shape} (use rows or columns)',
+                'data': []
+            }), 400
+        
+        # 수집 후 만든 스냅샷이 현재 버전이면 직렬화 없이 그대로 응답
+        snapshot = stock_api.db.current_snapshot()
+        if snapshot is not None:
+            logger.info(f"Serving stocks from snapshot v{snapshot.version}")
+            return snapshot_response(snapshot, f'stocks_{shape}')
+        
+        summary = response_cache.get_or_compute(('stocks',), stock_api.get_all_stocks_summary)
+        data = summary
+        if shape == 'columns':
+            data = response_cache.get_or_compute(('stocks-columns',), lambda: summary_columns(summary))
         
         end_time = time.time()
         logger.info(f"Successfully fetched {len(summary)} stocks in {end_time - start_time:.2f} seconds")
         
         return jsonify({
             'success': True,
-            'data': summary,
+            'data': data,
+            'shape': shape,
             'count': len(summary)
         })
     except Exception as e:
@@ -56,11 +134,15 @@ def get_stock_detail(symbol):
         logger.info(f"Fetching stock detail for {symbol}")
         start_time = time.time()
         
-        # 회사 정보 가져오기
-        company_info = stock_api.get_company_info(symbol)
-        
-        # 차트 데이터 가져오기
-        chart_data = stock_api.get_stock_chart_data(symbol, days=365)
+        # 회사 정보 및 차트 데이터 가져오기 (스냅샷에 회사 정보가 있으면 업스트림 조회 생략)
+        snapshot = stock_api.db.current_snapshot()
+        company_info, chart_data = response_cache.get_or_compute(
+            ('stock-detail', symbol),
+            lambda: (
+                (snapshot and snapshot.company(symbol)) or stock_api.get_company_info(symbol),
+                stock_api.get_stock_chart_data(symbol, days=365)
+            )
+        )
         
         if company_info and chart_data:
             analysis = {
@@ -98,40 +180,90 @@ def get_stock_detail(symbol):
 
 @app.route('/api/update-data', methods=['POST'])
 def update_stock_data():
-    """주식 데이터 업데이트 API"""
+    """주식 데이터 업데이트 작업 등록 API (즉시 작업 ID 반환)
+    
+    JSON 본문 옵션: incremental, conservative_mode (bool), universe ('top10' / 'all'), shard ('k/n')
+    """
     try:
-        logger.info("Starting stock data update")
-        start_time = time.time()
+        body = request.get_json(silent=True) or {}
+        options = {
+            key: bool(body[key]) for key in ('incremental', 'conservative_mode') if key in body
+        }
+        try:
+            if 'universe' in body:
+                if body['universe'] not in ('top10', 'all'):
+                    raise ValueError(f"Unknown universe: {body['universe']} (use top10 or all)")
+                options['universe'] = body['universe']
+            if body.get('shard'):
+                parse_shard(body['shard'])
+                options['shard'] = str(body['shard'])
+        except ValueError as e:
+            return jsonify({
+                'success': False,
+                'error': str(e),
+                'job_id': None
+            }), 400
         
-        # 백그라운드에서 데이터 업데이트 실행
-        success_count = stock_api.update_all_kospi_data()
+        job_id, created = job_manager.submit(**options)
+        logger.info(f"Stock data update job {job_id} {'queued' if created else 'already running'}")
         
-        end_time = time.time()
-        logger.info(f"Stock data update completed in {end_time - start_time:.2f} seconds")
+        return jsonify({
+            'success': True,
+            'message': 'Stock data update started.' if created else 'Stock data update already in progress.',
+            'job_id': job_id,
+            'already_running': not created,
+            'status_url': f'/api/update-data/{job_id}'
+        }), 202
+    except Exception as e:
+        logger.error(f"Error in update_stock_data: {str(e)}")
+        return jsonify({
+            'success': False,
+            'error': f'Failed to start stock data update: {str(e)}',
+            'job_id': None
+        }), 500
+
+@app.route('/api/update-data/<job_id>')
+def get_update_status(job_id):
+    """주식 데이터 업데이트 작업 상태 API"""
+    try:
+        job = job_manager.get(job_id)
+        
+        if job is None:
+            return jsonify({
+                'success': False,
+                'error': f'Update job not found: {job_id}',
+                'data': None
+            }), 404
         
         return jsonify({
             'success': True,
-            'message': f'Stock data updated successfully. {success_count} companies updated.',
-            'updated_count': success_count,
-            'total_time': f"{end_time - start_time:.2f}s"
+            'data': job
         })
     except Exception as e:
-        logger.error(f"Error in update_stock_data: {str(e)}")
+        logger.error(f"Error in get_update_status for {job_id}: {str(e)}")
         return jsonify({
             'success': False,
-            'error': f'Failed to update stock data: {str(e)}',
-            'updated_count': 0
+            'error': f'Failed to fetch update status: {str(e)}',
+            'data': None
         }), 500
 
 @app.route('/api/companies')
+@conditional_get(data_version)
 def get_companies():
     """등록된 회사 목록 API"""
     try:
         logger.info("Fetching companies list")
         start_time = time.time()
         
-        companies = stock_api.db.get_companies()
-        companies_list = companies.to_dict('records') if not companies.empty else []
+        snapshot = stock_api.db.current_snapshot()
+        if snapshot is not None:
+            return snapshot_response(snapshot, 'companies')
+        
+        def load_companies():
+            companies = stock_api.db.get_companies()
+            return companies.to_dict('records') if not companies.empty else []
+        
+        companies_list = response_cache.get_or_compute(('companies',), load_companies)
         
         end_time = time.time()
         logger.info(f"Fetched {len(companies_list)} companies in {end_time - start_time:.2f} seconds")
@@ -149,20 +281,154 @@ def get_companies():
             'data': []
         }), 500
 
+def nullable_int_list(values):
+    """NaN을 None(JSON null)으로 바꾼 정수 리스트 (실수 배열은 직렬화 시 NaN이 null로 변환됨)"""
+    return [None if value != value else int(value) for value in values.tolist()]
+
+@app.route('/api/chart-data')
+@conditional_get(data_version)
+def get_chart_data_batch():
+    """여러 종목 차트 데이터 API (공통 날짜 축에 맞춘 종가/거래량과 회사 정보)
+    
+    symbols: 쉼표로 구분한 6자리 종목 코드 (필수, 형식이 다르면 400)
+    days: 종목별 최근 거래일 수 (기본값 365, 0 이하이면 전체 이력)
+    """
+    try:
+        symbols = list(dict.fromkeys(
+            symbol.strip() for symbol in request.args.get('symbols', '').split(',') if symbol.strip()
+        ))
+        days = request.args.get('days', 365, type=int)
+        if days <= 0:
+            days = None
+        
+        if not symbols or len(symbols) > MAX_BATCH_SYMBOLS:
+            return jsonify({
+                'success': False,
+                'error': f'symbols must list 1 to {MAX_BATCH_SYMBOLS} symbols',
+                'data': None
+            }), 400
+        
+        invalid = [symbol for symbol in symbols if not is_valid_symbol(symbol)]
+        if invalid:
+            return jsonify({
+                'success': False,
+                'error': f'Invalid symbols: {", ".join(invalid[:10])} (6-character stock codes)',
+                'data': None
+            }), 400
+        
+        logger.info(f"Fetching chart data for {len(symbols)} symbols (last {days} days)")
+        start_time = time.time()
+        
+        def load_batch_chart_data():
+            # 컬럼 캐시 또는 단일 IN 쿼리로 전체 종목 조회
+            series = stock_api.db.get_price_arrays_batch(symbols, days=days)
+            if not series:
+                return None
+            
+            # 모든 종목의 거래일 합집합을 공통 축으로, 거래가 없는 날은 null
+            axis = np.unique(np.concatenate([arrays['date'] for arrays in series.values()]))
+            aligned = {}
+            for symbol, arrays in series.items():
+                positions = np.searchsorted(axis, arrays['date'])
+                prices = np.full(len(axis), np.nan)
+                volumes = np.full(len(axis), np.nan)
+                prices[positions] = arrays['close']
+                volumes[positions] = arrays['volume']
+                aligned[symbol] = {
+                    'prices': prices,
+                    'volumes': nullable_int_list(volumes)
+                }
+            
+            return {
+                'labels': format_days(axis),
+                'series': aligned,
+                'companies': stock_api.get_company_infos(list(series))
+            }
+        
+        chart_data = response_cache.get_or_compute(
+            ('chart-data-batch', tuple(symbols), days), load_batch_chart_data
+        )
+        
+        if chart_data is None:
+            logger.warning(f"No chart data found for {', '.join(symbols)}")
+            return jsonify({
+                'success': False,
+                'error': 'No data found for requested symbols',
+                'data': None
+            }), 404
+        
+        end_time = time.time()
+        logger.info(f"Fetched {len(chart_data['series'])} series x {len(chart_data['labels'])} dates in {end_time - start_time:.2f} seconds")
+        
+        return jsonify({
+            'success': True,
+            'data': chart_data,
+            'symbols': list(chart_data['series']),
+            'missing': [symbol for symbol in symbols if symbol not in chart_data['series']],
+            'days': days,
+            'data_points': len(chart_data['labels'])
+        })
+    except Exception as e:
+        logger.error(f"Error in get_chart_data_batch: {str(e)}")
+        return jsonify({
+            'success': False,
+            'error': f'Failed to fetch chart data: {str(e)}',
+            'data': None
+        }), 500
+
 @app.route('/api/chart-data/<symbol>')
+@conditional_get(symbol_data_version)
 def get_chart_data(symbol):
-    """차트 데이터 API"""
+    """차트 데이터 API
+    
+    days: 최근 거래일 수 (0 이하이면 전체 이력)
+    resolution: day/week/month 봉 단위 (주/월봉은 OHLC와 거래량 합계로 집계)
+    max_points: 최대 점 개수 (초과 시 종가 선에 LTTB 다운샘플링)
+    """
     try:
         days = request.args.get('days', 365, type=int)
-        logger.info(f"Fetching chart data for {symbol} (last {days} days)")
+        resolution = request.args.get('resolution', 'day')
+        max_points = request.args.get('max_points', type=int)
+        logger.info(f"Fetching chart data for {symbol} (last {days} days, {resolution}, max {max_points} points)")
         start_time = time.time()
         
-        # 일수 제한 (최대 2년)
-        days = min(days, 730)
+        if resolution not in RESOLUTIONS:
+            return jsonify({
+                'success': False,
+                'error': f'Invalid resolution: {resolution} (use one of {", ".join(RESOLUTIONS)})',
+                'data': None
+            }), 400
         
-        df = stock_api.db.get_stock_prices(symbol, days=days)
+        # 다운샘플링으로 응답 크기가 범위와 무관하므로 기간 상한 없음
+        if days <= 0:
+            days = None
+        if max_points is not None and max_points <= 0:
+            max_points = None
         
-        if df.empty:
+        def load_chart_data():
+            # 날짜 오름차순 배열 (컬럼 캐시가 있으면 memmap 슬라이스)
+            arrays = stock_api.db.get_price_arrays(symbol, days=days)
+            if arrays is None:
+                return None
+            arrays = downsample(arrays, max_points=max_points, resolution=resolution)
+            
+            # 차트용 데이터 포맷 (배열은 리스트 변환 없이 그대로 직렬화)
+            chart_data = {
+                'labels': format_days(arrays['date']),
+                'prices': arrays['close'],
+                'volumes': arrays['volume'].astype(np.int64)
+            }
+            if resolution != 'day':
+                chart_data['opens'] = arrays['open']
+                chart_data['highs'] = arrays['high']
+                chart_data['lows'] = arrays['low']
+            return chart_data
+        
+        chart_data = response_cache.get_or_compute(
+            ('chart-data', symbol, days, resolution, max_points), load_chart_data
+        )
+        
+        if chart_data is None:
             logger.warning(f"No chart data found for {symbol}")
             return jsonify({
                 'success': False,
@@ -170,16 +436,6 @@ def get_chart_data(symbol):
                 'data': None
             }), 404
         
-        # 날짜 정렬 (오래된 것부터)
-        df = df.sort_values('date')
-        
-        # 차트용 데이터 포맷
-        chart_data = {
-            'labels': df['date'].astype(str).tolist(),
-            'prices': df['close_price'].astype(float).tolist(),
-            'volumes': df['volume'].astype(int).tolist()
-        }
-        
         end_time = time.time()
         logger.info(f"Fetched {len(chart_data['labels'])} data points for {symbol} in {end_time - start_time:.2f} seconds")
         
@@ -188,6 +444,8 @@ def get_chart_data(symbol):
             'data': chart_data,
             'symbol': symbol,
             'days': days,
+            'resolution': resolution,
+            'max_points': max_points,
             'data_points': len(chart_data['labels'])
         })
     except Exception as e:
@@ -198,6 +456,143 @@ def get_chart_data(symbol):
             'data': None
         }), 500
 
+@app.route('/api/indicators/<symbol>')
+@conditional_get(symbol_data_version)
+def get_indicators(symbol):
+    """기술적 지표 API
+    
+    names: 쉼표로 구분한 지표 이름 (기본값: 전체, 예: sma20,rsi14,macd)
+    days: 최근 거래일 수 (기본값 365, 0 이하이면 전체 이력)
+    """
+    try:
+        names_arg = request.args.get('names', '')
+        names = tuple(name.strip().lower() for name in names_arg.split(',') if name.strip()) or INDICATOR_NAMES
+        days = request.args.get('days', 365, type=int)
+        if days <= 0:
+            days = None
+        
+        unknown = [name for name in names if name not in INDICATOR_NAMES]
+        if unknown:
+            return jsonify({
+                'success': False,
+                'error': f'Unknown indicators: {", ".join(unknown)} (available: {", ".join(INDICATOR_NAMES)})',
+                'data': None
+            }), 400
+        
+        def load_indicators():
+            # 지표는 수집 경로(update_indicators)에서만 계산해 저장하며, 조회는 DB를 변경하지 않음
+            df = stock_api.db.get_indicators(symbol, names, days=days)
+            if df.empty:
+                return None
+            
+            # 초기 구간(NaN)은 직렬화 시 JSON null로
+            data = {'labels': df['date'].tolist()}
+            for name in names:
+                data[name] = df[name].to_numpy(dtype=np.float64)
+            return data
+        
+        indicator_data = response_cache.get_or_compute(('indicators', symbol, names, days), load_indicators)
+        
+        if indicator_data is None:
+            return jsonify({
+                'success': False,
+                'error': f'No data found for {symbol}',
+                'data': None
+            }), 404
+        
+        return jsonify({
+            'success': True,
+            'data': indicator_data,
+            'symbol': symbol,
+            'names': list(names),
+            'data_points': len(indicator_data['labels'])
+        })
+    except Exception as e:
+        logger.error(f"Error in get_indicators for {symbol}: {str(e)}")
+        return jsonify({
+            'success': False,
+            'error': f'Failed to fetch indicators: {str(e)}',
+            'data': None
+        }), 500
+
+@app.route('/api/export')
+def export_prices():
+    """가격 이력 스트리밍 내보내기 API
+    
+    format: ndjson(기본값) / csv / arrow (Arrow IPC 스트림, pyarrow 필요)
+    symbols: 쉼표로 구분한 종목 코드 (생략 시 전체)
+    start, end: 'YYYY-MM-DD' 날짜 범위 (양 끝 포함)
+    chunk_size: 커서에서 한 번에 읽어 내보내는 행 수
+    """
+    fmt = request.args.get('format', 'ndjson').lower()
+    symbols = [symbol.strip() for symbol in request.args.get('symbols', '').split(',') if symbol.strip()]
+    start_date = request.args.get('start')
+    end_date = request.args.get('end')
+    chunk_size = max(1, request.args.get('chunk_size', EXPORT_CHUNK_ROWS, type=int))
+    
+    try:
+        # 스트리밍을 시작하면 상태 코드를 바꿀 수 없으므로 날짜 형식은 미리 검사
+        for value in (start_date, end_date):
+            if value:
+                date.fromisoformat(value)
+        chunks = stock_api.db.iter_stock_prices(symbols or None, start_date, end_date, chunk_size)
+        body = stream_export(chunks, fmt)
+    except ValueError as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 400
+    
+    def generate():
+        exported = 0
+        start_time = time.time()
+        try:
+            for data in body:
+                exported += 1
+                yield data
+        except Exception as e:
+            # 헤더가 이미 전송되었으므로 로그만 남기고 스트림을 끊음
+            logger.error(f"Error while exporting prices: {str(e)}")
+            raise
+        logger.info(f"Exported {exported} {fmt} chunks in {time.time() - start_time:.2f} seconds")
+    
+    mimetype, extension = EXPORT_FORMATS[fmt]
+    logger.info(f"Exporting prices as {fmt} (symbols={symbols or 'all'}, {start_date}~{end_date})")
+    # 길이를 알 수 없는 제너레이터 응답이므로 chunked 전송으로 보냄
+    return Response(
+        stream_with_context(generate()),
+        mimetype=mimetype,
+        headers={'Content-Disposition': f'attachment; filename=stock_prices.{extension}'}
+    )
+
+@app.route('/api/stream/quotes')
+def stream_quotes():
+    """실시간 시세 Server-Sent Events 스트림
+    
+    연결 직후 snapshot 이벤트로 현재 시세를, 이후에는 바뀐 종목만 quotes 이벤트로 보냅니다.
+    symbols=005930,000660이면 해당 종목만 받으며, 재접속 시 Last-Event-ID 이후 바뀐 시세부터 이어 받습니다.
+    """
+    symbols = [symbol.strip() for symbol in request.args.get('symbols', '').split(',') if symbol.strip()]
+    last_event_id = request.headers.get('Last-Event-ID') or request.args.get('last_event_id')
+    
+    stream = quote_hub.stream(symbols or None, last_event_id)
+    if stream is None:
+        logger.warning("Quote stream rejected: too many open streams in this worker")
+        response = jsonify({
+            'success': False,
+            'error': 'Too many open quote streams; retry later'
+        })
+        response.status_code = 503
+        response.headers['Retry-After'] = '10'
+        return response
+    
+    # 프록시(nginx)가 이벤트를 버퍼링하지 않도록 X-Accel-Buffering: no
+    return Response(
+        stream,
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+
 @app.route('/api/health')
 def health_check():
     """헬스 체크 API"""
@@ -205,11 +600,18 @@ def health_check():
         # 간단한 데이터베이스 연결 테스트
         companies = stock_api.db.get_companies()
         db_status = "OK" if not companies.empty else "No data"
+        snapshot = stock_api.db.snapshot.current() if stock_api.db.snapshot is not None else None
         
         return jsonify({
             'success': True,
             'status': 'healthy',
             'database': db_status,
+            'data_version': stock_api.db.data_version.version,
+            'cache': response_cache.stats(),
+            # 스냅샷 버전이 data_version과 다르면 다음 수집/재시작까지 DB로 응답 중
+            'snapshot': {'version': snapshot.version, 'created_at': snapshot.created_at} if snapshot else None,
+            'sources': stock_api.sources.stats(),
+            'stream': quote_hub.stats(),
             'timestamp': time.time()
         })
     except Exception as e:
@@ -221,6 +623,35 @@ def health_check():
             'timestamp': time.time()
         }), 500
 
+@app.route('/api/metrics')
+def get_metrics():
+    """Prometheus 텍스트 형식 지표 API (모든 작업자 프로세스 합산)"""
+    return Response(metrics.registry.render(), content_type=metrics.CONTENT_TYPE)
+
+@app.route('/api/profiles')
+def get_profiles():
+    """최근 프로파일 목록 API (X-Profile 헤더 또는 _profile 쿼리로 토큰 필요)"""
+    if not profiling.authorized(request):
+        return jsonify({
+            'success': False,
+            'error': 'Profiling token required (set STOCK_PROFILE_TOKEN and send X-Profile)'
+        }), 403
+    
+    limit = request.args.get('limit', 50, type=int)
+    profiles = profiling.list_profiles(limit=max(1, limit))
+    return jsonify({
+        'success': True,
+        'data': profiles,
+        'count': len(profiles)
+    })
+
+@app.route('/api/profiles/<path:filename>')
+def download_profile(filename):
+    """프로파일 파일 다운로드 API (.pstats: python -m pstats, .collapsed: flamegraph.pl / speedscope)"""
+    if not profiling.authorized(request):
+        return jsonify({'success': False, 'error': 'Profiling token required'}), 403
+    return send_from_directory(os.path.abspath(profiling.PROFILE_DIR), filename, as_attachment=True)
+
 @app.errorhandler(404)
 def not_found(error):
     """404 에러 핸들러"""
@@ -240,6 +671,25 @@ def internal_error(error):
         'message': 'An unexpected error occurred'
     }), 500
 
+def warm_up():
+    """작업자 fork 전에 마스터 프로세스에서 호출 (gunicorn.conf.py의 on_starting)
+    
+    자주 쓰는 응답을 캐시에 채우고 템플릿/직렬화 경로를 한 번 실행해 두면 fork된 작업자들이
+    이 메모리를 copy-on-write로 공유하므로, 작업자는 import 없이 바로 첫 요청을 처리합니다.
+    """
+    start_time = time.time()
+    # 스냅샷이 없거나 데이터 버전과 다르면 작업자 fork 전에 한 번 만들어 둠
+    refresh_snapshot(stock_api)
+    with app.test_client() as client:
+        for path in ('/', '/api/stocks', '/api/stocks?shape=columns', '/api/companies'):
+            client.get(path)
+    
+    # 마스터의 SQLite 연결은 닫음 (작업자는 pid가 바뀌면 새로 연결)
+    stock_api.db.close()
+    # 지금까지 만든 객체를 GC 추적에서 빼서, 작업자의 GC가 공유 페이지를 건드려 복사되지 않도록 함
+    gc.freeze()
+    logger.info(f"Warm-up finished in {time.time() - start_time:.2f} seconds ({gc.get_freeze_count()} objects frozen)")
+
 if __name__ == '__main__':
     import os
     port = int(os.environ.get('PORT', 5000))
@@ -0,0 +1,93 @@
+"""웹 작업자 시작 시간 벤치마크
+
+매번 새 인터프리터에서 다음을 측정해 중앙값을 출력합니다.
+- cold: 앱 import부터 첫 /api/stocks 응답까지 (미리 로드하지 않은 작업자)
+- master: 마스터의 스키마 확인 + 앱 import + warm_up() (gunicorn.conf.py on_starting과 같은 순서)
+- forked: 예열된 마스터에서 fork한 작업자가 첫 /api/stocks 응답을 내기까지
+
+    python benchmark_startup.py --runs 5
+"""
+import os
+import sys
+import json
+import argparse
+import statistics
+import subprocess
+
+# 수집할 때만 필요한 업스트림 라이브러리 (웹 작업자 시작 시 로드되면 안 됨)
+UPSTREAM_MODULES = ('FinanceDataReader', 'pykrx')
+
+COLD_SCRIPT = """
+import sys, json, time
+start = time.perf_counter()
+import app
+imported = time.perf_counter()
+app.app.test_client().get('/api/stocks')
+print(json.dumps({
+    'import': imported - start,
+    'first_response': time.perf_counter() - start,
+    'upstream_loaded': [name for name in %r if name in sys.modules]
+}))
+"""
+
+PREFORK_SCRIPT = """
+import os, sys, json, time
+start = time.perf_counter()
+from database import StockDatabase
+StockDatabase().close()
+os.environ['STOCK_SCHEMA_READY'] = '1'
+import app
+app.warm_up()
+master = time.perf_counter() - start
+
+read_fd, write_fd = os.pipe()
+forked_at = time.perf_counter()
+pid = os.fork()
+if pid == 0:
+    app.app.test_client().get('/api/stocks')
+    os.write(write_fd, str(time.perf_counter() - forked_at).encode())
+    os._exit(0)
+os.close(write_fd)
+forked = float(os.read(read_fd, 64).decode())
+os.waitpid(pid, 0)
+print(json.dumps({
+    'master': master,
+    'forked_first_response': forked,
+    'upstream_loaded': [name for name in %r if name in sys.modules]
+}))
+"""
+
+
+def run_script(script, env):
+    output = subprocess.run(
+        [sys.executable, '-c', script % (UPSTREAM_MODULES,)],
+        capture_output=True, text=True, env=env, check=True
+    ).stdout
+    # 앱 로그/마이그레이션 출력 뒤의 마지막 줄이 결과
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="웹 작업자 시작 시간 벤치마크")
+    parser.add_argument('--runs', type=int, default=5, help="반복 횟수 (중앙값 출력)")
+    args = parser.parse_args(argv)
+
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, [os.getcwd(), os.environ.get('PYTHONPATH')])))
+    cold = [run_script(COLD_SCRIPT, env) for _ in range(args.runs)]
+    prefork = [run_script(PREFORK_SCRIPT, env) for _ in range(args.runs)]
+
+    def median(results, key):
+        return round(statistics.median(result[key] for result in results), 4)
+
+    print(json.dumps({
+        'runs': args.runs,
+        'cold_import': median(cold, 'import'),
+        'cold_first_response': median(cold, 'first_response'),
+        'master_ready': median(prefork, 'master'),
+        'forked_worker_first_response': median(prefork, 'forked_first_response'),
+        'upstream_loaded_on_import': sorted({name for result in cold + prefork for name in result['upstream_loaded']})
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,127 @@
+import os
+import re
+import threading
+import logging
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# 종목별 파일은 (len(COLUMNS), n) float64 배열이며 각 행이 하나의 연속된 컬럼입니다.
+# date는 1970-01-01 기준 일수, volume은 2^53 미만이므로 float64로 정확히 표현됩니다.
+COLUMNS = ('date', 'open', 'high', 'low', 'close', 'volume')
+COLUMN_INDEX = {name: i for i, name in enumerate(COLUMNS)}
+
+# KRX 종목 코드 (숫자/영문 대문자 6자리), 파일 이름에 쓰므로 경로 구분자 등은 허용하지 않음
+SYMBOL_PATTERN = re.compile(r'[0-9A-Z]{6}')
+
+
+def is_valid_symbol(symbol):
+    return isinstance(symbol, str) and SYMBOL_PATTERN.fullmatch(symbol) is not None
+
+
+def yyyymmdd_to_days(dates):
+    """YYYYMMDD 정수 배열을 1970-01-01 기준 일수 배열로 변환"""
+    dates = np.asarray(dates, dtype=np.int64)
+    years = (dates // 10000 - 1970).astype('datetime64[Y]')
+    months = (dates // 100 % 100 - 1).astype('timedelta64[M]')
+    days = (dates % 100 - 1).astype('timedelta64[D]')
+    return ((years + months).astype('datetime64[D]') + days).astype(np.int64)
+
+
+def days_to_yyyymmdd(days):
+    """1970-01-01 기준 일수 배열을 YYYYMMDD 정수 배열로 변환"""
+    dates = np.asarray(days, dtype=np.int64).astype('datetime64[D]')
+    months = dates.astype('datetime64[M]')
+    years = months.astype('datetime64[Y]')
+    return (
+        (years.astype(np.int64) + 1970) * 10000
+        + ((months - years).astype(np.int64) + 1) * 100
+        + (dates - months).astype(np.int64) + 1
+    )
+
+
+def format_days(days):
+    """일수 배열을 'YYYY-MM-DD' 문자열 리스트로 변환"""
+    return np.datetime_as_string(np.asarray(days, dtype=np.int64).astype('datetime64[D]'), unit='D').tolist()
+
+
+class ColumnarStore:
+    """stock_data.db 옆에 두는 종목별 날짜 정렬 NumPy 컬럼 캐시
+    
+    수집 시 종목 파일을 임시 파일로 쓴 뒤 원자적으로 교체하고, 읽는 쪽은 읽기 전용 memmap으로
+    열어 잘라 쓰므로 gunicorn 워커들이 같은 페이지 캐시를 공유합니다.
+    """
+    
+    def __init__(self, directory):
+        self.directory = directory
+        self._maps = {}
+        self._lock = threading.Lock()
+    
+    def exists(self):
+        return os.path.isdir(self.directory)
+    
+    def path(self, symbol):
+        """종목 파일 경로 (종목 코드 형식이 아니면 디렉터리 밖을 가리키지 않도록 ValueError)"""
+        if not is_valid_symbol(symbol):
+            raise ValueError(f"Invalid symbol: {symbol!r}")
+        return os.path.join(self.directory, f"{symbol}.npy")
+    
+    def write(self, symbol, dates, open_prices, high_prices, low_prices, close_prices, volumes):
+        """종목 전체 이력 기록 (dates는 YYYYMMDD 정수, 오름차순)"""
+        os.makedirs(self.directory, exist_ok=True)
+        data = np.empty((len(COLUMNS), len(dates)), dtype=np.float64)
+        data[COLUMN_INDEX['date']] = yyyymmdd_to_days(dates)
+        data[COLUMN_INDEX['open']] = open_prices
+        data[COLUMN_INDEX['high']] = high_prices
+        data[COLUMN_INDEX['low']] = low_prices
+        data[COLUMN_INDEX['close']] = close_prices
+        data[COLUMN_INDEX['volume']] = volumes
+        
+        tmp_path = f"{self.path(symbol)}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, 'wb') as f:
+            np.save(f, data)
+        os.replace(tmp_path, self.path(symbol))
+    
+    def load(self, symbol):
+        """종목 배열을 읽기 전용 memmap으로 반환 (파일이 없으면 None)
+        
+        파일이 교체되면(inode/mtime 변경) 새로 매핑합니다. 종목 코드 형식이 아니면 None입니다.
+        """
+        if not is_valid_symbol(symbol):
+            return None
+        path = self.path(symbol)
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            return None
+        
+        key = (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+        with self._lock:
+            cached = self._maps.get(symbol)
+            if cached and cached[0] == key:
+                return cached[1]
+        
+        try:
+            data = np.load(path, mmap_mode='r')
+        except (OSError, ValueError) as e:
+            logger.warning(f"Failed to map columnar file for {symbol}: {e}")
+            return None
+        
+        with self._lock:
+            self._maps[symbol] = (key, data)
+        return data
+    
+    def read(self, symbol, days=None):
+        """최근 days개 행의 컬럼 딕셔너리 반환 (배열은 memmap 슬라이스, date는 일수)"""
+        data = self.load(symbol)
+        if data is None or data.shape[1] == 0:
+            return None
+        if days:
+            data = data[:, -days:]
+        return {name: data[i] for i, name in enumerate(COLUMNS)}
+    
+    def remove(self, symbol):
+        try:
+            os.remove(self.path(symbol))
+        except FileNotFoundError:
+            pass
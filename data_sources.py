@@ -0,0 +1,363 @@
+import os
+import time
+import threading
+import logging
+import importlib.util
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+import numpy as np
+import pandas as pd
+from fetch_pipeline import get_limiter
+from metrics import UPSTREAM_SECONDS, UPSTREAM_ERRORS
+
+logger = logging.getLogger(__name__)
+
+REQUIRED_COLUMNS = ['Open', 'High', 'Low', 'Close', 'Volume']
+KOREAN_COLUMNS = {'시가': 'Open', '고가': 'High', '저가': 'Low', '종가': 'Close', '거래량': 'Volume'}
+
+
+class SourceUnavailableError(Exception):
+    """사용 가능한(회로 차단기가 닫힌) 소스가 없음"""
+
+
+def normalize_ohlcv(df):
+    """소스별 시세 DataFrame을 Open/High/Low/Close/Volume 컬럼과 DatetimeIndex로 정규화"""
+    if 'Close' not in df.columns and '종가' in df.columns:
+        df = df.rename(columns=KOREAN_COLUMNS)
+    if df.empty:
+        return pd.DataFrame(columns=REQUIRED_COLUMNS)
+    df = df[REQUIRED_COLUMNS]
+    df.index = pd.to_datetime(df.index)
+    return df
+
+
+class SourceStats:
+    """소스별 최근 호출 지연 시간/오류 통계 (최근 WINDOW회 기준)"""
+    
+    WINDOW = 200
+    # 백분위 기반 판단에 필요한 최소 성공 호출 수
+    MIN_SAMPLES = 20
+    
+    def __init__(self):
+        self._latencies = deque(maxlen=self.WINDOW)
+        self._outcomes = deque(maxlen=self.WINDOW)
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.errors = 0
+    
+    def record(self, latency, ok):
+        with self._lock:
+            self.calls += 1
+            self._outcomes.append(ok)
+            if ok:
+                self._latencies.append(latency)
+            else:
+                self.errors += 1
+    
+    def percentile(self, q):
+        """성공 호출 지연 시간의 q 백분위 (표본이 부족하면 None)"""
+        with self._lock:
+            if len(self._latencies) < self.MIN_SAMPLES:
+                return None
+            return float(np.percentile(self._latencies, q))
+    
+    def error_rate(self):
+        with self._lock:
+            if not self._outcomes:
+                return 0.0
+            return 1.0 - sum(self._outcomes) / len(self._outcomes)
+    
+    def snapshot(self):
+        p50 = self.percentile(50)
+        p95 = self.percentile(95)
+        return {
+            'calls': self.calls,
+            'errors': self.errors,
+            'error_rate': round(self.error_rate(), 4),
+            'p50': round(p50, 4) if p50 is not None else None,
+            'p95': round(p95, 4) if p95 is not None else None
+        }
+
+
+class CircuitBreaker:
+    """연속 실패가 failure_threshold회를 넘으면 reset_timeout초 동안 소스를 차단
+    
+    차단 시간이 지나면 half_open 상태에서 시험 호출 하나만 허용하고, 그 결과가 나올 때까지
+    다른 호출은 바로 거부합니다. 시험 호출이 성공하면 닫히고 실패하면 즉시 다시 열립니다.
+    """
+    
+    def __init__(self, name, failure_threshold=5, reset_timeout=30.0):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._failures = 0
+        self._opened_at = None
+        # 진행 중인 half_open 시험 호출의 시작 시각 (없으면 None)
+        self._probe_started = None
+        self._lock = threading.Lock()
+    
+    def _state(self, now):
+        # self._lock을 잡은 상태에서 호출
+        if self._opened_at is None:
+            return 'closed'
+        if now - self._opened_at >= self.reset_timeout:
+            return 'half_open'
+        return 'open'
+    
+    def _probing(self, now):
+        # 결과를 기록하지 못하고 끝난 시험 호출이 소스를 영구히 막지 않도록 reset_timeout이 지나면 만료
+        return self._probe_started is not None and now - self._probe_started < self.reset_timeout
+    
+    @property
+    def state(self):
+        with self._lock:
+            return self._state(time.monotonic())
+    
+    def available(self):
+        """호출을 시도할 수 있는지 여부 (half_open이면 시험 호출이 진행 중이 아닐 때만, 슬롯은 예약하지 않음)"""
+        with self._lock:
+            now = time.monotonic()
+            state = self._state(now)
+            return state == 'closed' or (state == 'half_open' and not self._probing(now))
+    
+    def allow(self):
+        """호출 허용 여부 (half_open에서 허용하면 이 호출이 시험 호출이 되어 결과가 나올 때까지 나머지는 거부)"""
+        with self._lock:
+            now = time.monotonic()
+            state = self._state(now)
+            if state == 'closed':
+                return True
+            if state == 'open' or self._probing(now):
+                return False
+            self._probe_started = now
+            return True
+    
+    def record_success(self):
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+            self._probe_started = None
+    
+    def record_failure(self):
+        with self._lock:
+            self._probe_started = None
+            self._failures += 1
+            now = time.monotonic()
+            half_open = self._opened_at is not None and now - self._opened_at >= self.reset_timeout
+            if half_open or (self._opened_at is None and self._failures >= self.failure_threshold):
+                logger.warning(
+                    f"Circuit for {self.name} opened after {self._failures} consecutive failures "
+                    f"(retry in {self.reset_timeout:.0f}s)"
+                )
+                self._opened_at = now
+
+
+class DataSource:
+    """시세 소스 인터페이스: read()만 구현하면 호출 한도, 지연 시간/오류 통계, 회로 차단기가 적용됩니다"""
+    
+    # 소스가 필요로 하는 라이브러리 (설치되지 않았으면 사용하지 않음)
+    library = None
+    
+    def __init__(self, name):
+        self.name = name
+        self.stats = SourceStats()
+        self.breaker = CircuitBreaker(name)
+    
+    @classmethod
+    def is_installed(cls):
+        return cls.library is None or importlib.util.find_spec(cls.library) is not None
+    
+    def read(self, symbol, start_date, end_date):
+        """업스트림에서 원본 시세 DataFrame 조회"""
+        raise NotImplementedError
+    
+    def fetch(self, symbol, start_date, end_date):
+        """호출 한도 안에서 read()를 실행하고 결과를 정규화
+        
+        지연 시간에는 호출 한도 대기 시간이 포함되므로, 대기열이 긴 소스는 느린 소스로 취급됩니다.
+        회로 차단기가 호출을 거부하면(차단 중이거나 다른 시험 호출이 진행 중) 실패로 세지 않고
+        SourceUnavailableError를 발생시킵니다.
+        """
+        if not self.breaker.allow():
+            raise SourceUnavailableError(f"Circuit for {self.name} is {self.breaker.state}")
+        started = time.monotonic()
+        with get_limiter(self.name):
+            try:
+                df = self.read(symbol, start_date, end_date)
+            except Exception:
+                elapsed = time.monotonic() - started
+                self.stats.record(elapsed, False)
+                self.breaker.record_failure()
+                UPSTREAM_SECONDS.observe(elapsed, source=self.name, outcome='error')
+                UPSTREAM_ERRORS.inc(source=self.name)
+                raise
+            elapsed = time.monotonic() - started
+            self.stats.record(elapsed, True)
+            self.breaker.record_success()
+            UPSTREAM_SECONDS.observe(elapsed, source=self.name, outcome='ok')
+        return normalize_ohlcv(df)
+
+
+class FDRSource(DataSource):
+    """FinanceDataReader 소스 (prefix로 KRX:/NAVER: 등 세부 소스 지정)"""
+    
+    library = 'FinanceDataReader'
+    
+    def __init__(self, name, prefix=''):
+        super().__init__(name)
+        self.prefix = prefix
+    
+    def read(self, symbol, start_date, end_date):
+        import FinanceDataReader as fdr
+        return fdr.DataReader(f'{self.prefix}{symbol}', start_date, end_date)
+
+
+class PykrxSource(DataSource):
+    """pykrx 소스"""
+    
+    library = 'pykrx'
+    
+    def read(self, symbol, start_date, end_date):
+        from pykrx import stock
+        return stock.get_market_ohlcv(start_date.strftime('%Y%m%d'), end_date.strftime('%Y%m%d'), symbol)
+
+
+SOURCE_FACTORIES = {
+    'fdr_krx': lambda: FDRSource('fdr_krx', 'KRX:'),
+    'fdr_naver': lambda: FDRSource('fdr_naver', 'NAVER:'),
+    'fdr': lambda: FDRSource('fdr'),
+    'pykrx': lambda: PykrxSource('pykrx'),
+}
+
+
+class SourceRouter:
+    """여러 시세 소스 중 빠르고 정상인 소스로 요청을 보내는 라우터
+    
+    - 회로 차단기가 열린 소스는 건너뛰고, 나머지는 관측된 중앙 지연 시간이 짧은 순서로 사용합니다
+      (표본이 부족한 소스는 설정 순서대로 뒤에 둡니다).
+    - 첫 소스가 자신의 p95 지연 시간 안에 응답하지 않으면 다음 소스에 헤지 요청을 보내고
+      먼저 성공한 결과를 사용합니다.
+    - 진행 중인 요청이 모두 실패하면 다음 소스로 넘어갑니다.
+    """
+    
+    # p95 표본이 부족할 때 헤지 요청까지 기다리는 시간 (초)
+    DEFAULT_HEDGE_DELAY = 3.0
+    # 한 번의 조회에 허용하는 최대 시간 (초)
+    TIMEOUT = 120.0
+    
+    def __init__(self, sources, hedge=True, max_workers=16):
+        self.sources = list(sources)
+        self.hedge = hedge
+        self.hedges = 0
+        self.hedge_wins = 0
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='source')
+    
+    def _candidates(self):
+        healthy = [source for source in self.sources if source.breaker.available()]
+        
+        def latency(indexed):
+            index, source = indexed
+            p50 = source.stats.percentile(50)
+            return (p50 is None, p50 or 0.0, index)
+        
+        return [source for _, source in sorted(enumerate(healthy), key=latency)]
+    
+    def _hedge_delay(self, source):
+        p95 = source.stats.percentile(95)
+        return p95 if p95 is not None else self.DEFAULT_HEDGE_DELAY
+    
+    def fetch(self, symbol, start_date, end_date):
+        """symbol의 start_date~end_date 시세를 가장 빨리 응답한 정상 소스에서 가져옴"""
+        candidates = self._candidates()
+        if not candidates:
+            raise SourceUnavailableError(f"All data sources are unavailable for {symbol}")
+        
+        started = time.monotonic()
+        deadline = started + self.TIMEOUT
+        pending = {}
+        errors = []
+        launched = 0
+        hedged = False
+        
+        def launch():
+            nonlocal launched
+            source = candidates[launched]
+            launched += 1
+            pending[self._executor.submit(source.fetch, symbol, start_date, end_date)] = source
+        
+        launch()
+        while pending:
+            now = time.monotonic()
+            can_hedge = self.hedge and not hedged and launched < len(candidates)
+            if can_hedge:
+                timeout = max(0.0, started + self._hedge_delay(candidates[0]) - now)
+            else:
+                timeout = max(0.0, deadline - now)
+            
+            done, _ = wait(pending, timeout=timeout, return_when=FIRST_COMPLETED)
+            if not done:
+                if not can_hedge:
+                    raise TimeoutError(f"Fetching {symbol} timed out after {self.TIMEOUT:.0f}s")
+                # 첫 소스가 p95를 넘겼으므로 다음 소스에 같은 요청을 보냄
+                hedged = True
+                with self._lock:
+                    self.hedges += 1
+                logger.info(f"Hedging {symbol}: {candidates[0].name} slower than {self._hedge_delay(candidates[0]):.2f}s, trying {candidates[launched].name}")
+                launch()
+                continue
+            
+            for future in done:
+                source = pending.pop(future)
+                try:
+                    df = future.result()
+                except Exception as e:
+                    logger.debug(f"{source.name} failed for {symbol}: {e}")
+                    errors.append(f"{source.name}: {e}")
+                    continue
+                if hedged and source is not candidates[0]:
+                    with self._lock:
+                        self.hedge_wins += 1
+                logger.info(f"✓ {source.name} 소스에서 데이터 가져옴: {symbol}")
+                return df
+            
+            # 진행 중인 요청이 모두 실패하면 다음 소스로 넘어감
+            if not pending and launched < len(candidates):
+                launch()
+        
+        raise RuntimeError(f"All data sources failed for {symbol}: {'; '.join(errors)}")
+    
+    def stats(self):
+        """소스별 호출 수, 오류율, p50/p95 지연 시간, 회로 차단기 상태와 헤지 통계"""
+        return {
+            'sources': {
+                source.name: dict(source.stats.snapshot(), state=source.breaker.state)
+                for source in self.sources
+            },
+            'hedges': self.hedges,
+            'hedge_wins': self.hedge_wins
+        }
+
+
+def create_router(default_order):
+    """설치된 라이브러리의 소스로 SourceRouter 생성
+    
+    소스 순서는 환경 변수 STOCK_DATA_SOURCES(예: "pykrx,fdr_krx,fdr")로 바꿀 수 있으며,
+    FinanceDataReader와 pykrx 소스는 서로 대체할 수 있습니다.
+    """
+    names = [
+        name.strip() for name in os.environ.get('STOCK_DATA_SOURCES', '').split(',') if name.strip()
+    ] or list(default_order)
+    
+    sources = []
+    for name in names:
+        factory = SOURCE_FACTORIES.get(name)
+        if factory is None:
+            logger.warning(f"Unknown data source ignored: {name}")
+            continue
+        source = factory()
+        if source.is_installed():
+            sources.append(source)
+        else:
+            logger.info(f"Data source {name} skipped ({source.library} is not installed)")
+    return SourceRouter(sources)
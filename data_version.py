@@ -0,0 +1,87 @@
+import os
+import json
+import time
+import threading
+
+try:
+    import fcntl
+except ImportError:  # Windows (deploy.bat) 환경
+    fcntl = None
+
+
+class DataVersion:
+    """수집이 끝날 때마다 증가하는 데이터 버전
+    
+    버전은 DB 옆 사이드카 JSON 파일({db_name}.version)에 저장되어 모든 gunicorn 워커와
+    수집 프로세스가 공유합니다. 읽기는 파일 stat만 확인하고 바뀐 경우에만 다시 읽으므로
+    SQLite를 건드리지 않습니다. 종목별 버전/갱신 시각도 함께 기록합니다.
+    """
+    
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._stat_key = None
+        self._state = self._empty_state()
+    
+    @staticmethod
+    def _empty_state():
+        return {'version': 0, 'updated_at': None, 'symbols': {}}
+    
+    def current(self):
+        """현재 버전 정보 {'version', 'updated_at', 'symbols': {symbol: [version, updated_at]}}"""
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            return self._empty_state()
+        
+        stat_key = (stat.st_mtime_ns, stat.st_size, stat.st_ino)
+        with self._lock:
+            if stat_key != self._stat_key:
+                try:
+                    with open(self.path, 'r', encoding='utf-8') as f:
+                        self._state = json.load(f)
+                    self._stat_key = stat_key
+                except (OSError, ValueError):
+                    # 교체 중인 파일은 다음 호출에서 다시 읽음
+                    pass
+            return self._state
+    
+    @property
+    def version(self):
+        return self.current()['version']
+    
+    def symbol_version(self, symbol):
+        """종목별 (version, updated_at) 반환, 기록이 없으면 전체 버전 기준"""
+        state = self.current()
+        entry = state['symbols'].get(symbol)
+        if entry:
+            return entry[0], entry[1]
+        return state['version'], state['updated_at']
+    
+    def bump(self, symbols=()):
+        """버전을 1 올리고 주어진 종목들의 버전을 갱신 (임시 파일 작성 후 원자적 교체)"""
+        lock_path = f"{self.path}.lock"
+        with open(lock_path, 'a') as lock_file:
+            if fcntl:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                try:
+                    with open(self.path, 'r', encoding='utf-8') as f:
+                        state = json.load(f)
+                except (OSError, ValueError):
+                    state = self._empty_state()
+                
+                now = time.time()
+                state['version'] += 1
+                state['updated_at'] = now
+                for symbol in symbols:
+                    state['symbols'][symbol] = [state['version'], now]
+                
+                tmp_path = f"{self.path}.{os.getpid()}.tmp"
+                with open(tmp_path, 'w', encoding='utf-8') as f:
+                    json.dump(state, f)
+                os.replace(tmp_path, self.path)
+                return state['version']
+            finally:
+                if fcntl:
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
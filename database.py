@@ -1,17 +1,175 @@
+import os
+import json
+import time
 import sqlite3
+import threading
+import numpy as np
 import pandas as pd
-from datetime import datetime
+from datetime import date, datetime
+from data_version import DataVersion
+from columnar_store import ColumnarStore, COLUMNS, yyyymmdd_to_days
+from snapshot import SnapshotReader
+from indicators import INDICATOR_NAMES
+from metrics import DB_QUERY_SECONDS, timed_methods
 
+def encode_date(value):
+    """'YYYY-MM-DD' 문자열/날짜를 stock_prices에 저장되는 정수(YYYYMMDD)로 변환
+    
+    형식이 잘못된 문자열('2024-1-5' 등)은 다른 날짜 정수로 바뀌지 않도록 ValueError를 발생시킵니다.
+    """
+    if isinstance(value, int):
+        return value
+    if isinstance(value, str):
+        value = date.fromisoformat(value[:10])
+    return value.year * 10000 + value.month * 100 + value.day
+
+def date_sql(column='date'):
+    """정수 날짜 컬럼을 'YYYY-MM-DD' 문자열로 변환하는 SQL 식"""
+    return f"printf('%04d-%02d-%02d', {column} / 10000, {column} / 100 % 100, {column} % 100)"
+
+# 내보내기 컬럼 순서와 한 번에 가져오는 행 수
+EXPORT_COLUMNS = ('symbol', 'date', 'open_price', 'high_price', 'low_price', 'close_price', 'volume')
+EXPORT_CHUNK_ROWS = 10000
+
+def iter_stock_price_chunks(conn, symbols=None, start_date=None, end_date=None, chunk_size=EXPORT_CHUNK_ROWS):
+    """stock_prices를 (symbol, date) 순서로 chunk_size 행씩 튜플 리스트로 반환하는 제너레이터
+    
+    결과 전체를 메모리에 올리지 않고 커서에서 fetchmany로 나눠 읽으므로 메모리 사용량은 chunk_size에만 비례합니다.
+    클러스터드 기본키 순서대로 읽어 정렬 비용이 없습니다.
+    """
+    conditions = []
+    params = []
+    if symbols:
+        conditions.append(f"symbol IN ({', '.join('?' * len(symbols))})")
+        params.extend(symbols)
+    if start_date:
+        conditions.append("date >= ?")
+        params.append(encode_date(start_date))
+    if end_date:
+        conditions.append("date <= ?")
+        params.append(encode_date(end_date))
+    where = f"WHERE {' AND '.join(conditions)}" if conditions else ''
+    
+    cursor = conn.execute(f'''
+    SELECT symbol, {date_sql()} AS date, open_price, high_price, low_price, close_price, volume
+    FROM stock_prices
+    {where}
+    ORDER BY symbol, stock_prices.date
+    ''', params)
+    try:
+        while True:
+            rows = cursor.fetchmany(chunk_size)
+            if not rows:
+                break
+            yield rows
+    finally:
+        cursor.close()
+
+# 공개 메서드마다 실행 시간을 stock_db_query_duration_seconds{method=...}로 기록
+@timed_methods(DB_QUERY_SECONDS, exclude=('get_connection', 'close', 'current_snapshot'))
 class StockDatabase:
-    def __init__(self, db_name='stock_data.db'):
+    # 현재 스키마 버전 (PRAGMA user_version), _migrate_to_N 메서드를 순서대로 적용
+    SCHEMA_VERSION = 6
+    
+    # 연결 튜닝 값 (PRAGMA)
+    BUSY_TIMEOUT_MS = 5000
+    CACHE_SIZE_KB = 64 * 1024          # 연결당 페이지 캐시 64MB
+    MMAP_SIZE = 256 * 1024 * 1024      # 256MB 메모리 맵 I/O
+    
+    def __init__(self, db_name='stock_data.db', columnar=None, init_schema=True):
         self.db_name = db_name
-        self.init_db()
+        # 스레드별 장기 연결 저장소 (gunicorn 스레드/백그라운드 작업마다 독립 연결)
+        self._local = threading.local()
+        # 수집 완료 시 증가하는 데이터 버전 (응답 캐시 무효화 기준)
+        self.data_version = DataVersion(f"{db_name}.version")
+        # 차트/요약 읽기용 memmap 컬럼 캐시 (STOCK_COLUMNAR_CACHE=0이면 사용 안 함)
+        if columnar is None:
+            columnar = os.environ.get('STOCK_COLUMNAR_CACHE', '1') != '0'
+        self.columns = ColumnarStore(f"{os.path.splitext(db_name)[0]}_columns") if columnar else None
+        # 수집 후 만드는 작업자 공유 스냅샷 (STOCK_SNAPSHOT=0이면 사용 안 함)
+        self.snapshot = SnapshotReader(f"{db_name}.snapshot") if os.environ.get('STOCK_SNAPSHOT', '1') != '0' else None
+        # init_schema=False이면 스키마 생성/마이그레이션을 생략 (gunicorn 마스터가 이미 수행한 경우)
+        if init_schema:
+            self.init_db()
+    
+    def _open_connection(self, readonly):
+        """PRAGMA가 적용된 새 연결 생성"""
+        conn = sqlite3.connect(self.db_name, timeout=self.BUSY_TIMEOUT_MS / 1000)
+        conn.execute(f"PRAGMA busy_timeout = {self.BUSY_TIMEOUT_MS}")
+        conn.execute("PRAGMA synchronous = NORMAL")
+        conn.execute(f"PRAGMA cache_size = -{self.CACHE_SIZE_KB}")
+        conn.execute(f"PRAGMA mmap_size = {self.MMAP_SIZE}")
+        conn.execute("PRAGMA temp_store = MEMORY")
+        if readonly:
+            # 읽기 전용 연결은 쓰기 구문을 거부
+            conn.execute("PRAGMA query_only = ON")
+        return conn
+    
+    def get_connection(self, readonly=False):
+        """현재 스레드의 장기 연결 반환 (없으면 생성)
+        
+        fork 이후 부모 프로세스의 연결을 재사용하지 않도록 pid가 바뀌면 새로 연결합니다.
+        """
+        local = self._local
+        pid = os.getpid()
+        if getattr(local, 'pid', None) != pid:
+            local.pid = pid
+            local.connections = {}
+        
+        key = 'ro' if readonly else 'rw'
+        conn = local.connections.get(key)
+        if conn is None:
+            conn = self._open_connection(readonly)
+            local.connections[key] = conn
+        return conn
+    
+    def close(self):
+        """현재 스레드의 연결 종료"""
+        connections = getattr(self._local, 'connections', None) or {}
+        if getattr(self._local, 'pid', None) == os.getpid():
+            for conn in connections.values():
+                conn.close()
+        self._local.connections = {}
     
     def init_db(self):
-        """데이터베이스 초기화 및 테이블 생성"""
-        conn = sqlite3.connect(self.db_name)
-        cursor = conn.cursor()
+        """데이터베이스 초기화 및 스키마 마이그레이션"""
+        conn = self.get_connection()
+        
+        # WAL 모드: 수집 작업이 쓰는 동안에도 읽기 요청이 블로킹되지 않음 (DB 파일에 영구 저장)
+        conn.execute("PRAGMA journal_mode = WAL")
         
+        version = self.get_schema_version()
+        rebuilt = False
+        while version < self.SCHEMA_VERSION:
+            target = version + 1
+            # IMMEDIATE 트랜잭션 안에서 버전을 다시 확인해 여러 프로세스의 동시 마이그레이션 방지
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                version = conn.execute("PRAGMA user_version").fetchone()[0]
+                if version < target:
+                    print(f"Migrating database schema to version {target}...")
+                    rebuilt = getattr(self, f'_migrate_to_{target}')(conn.cursor()) or rebuilt
+                    conn.execute(f"PRAGMA user_version = {target}")
+                    version = target
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+        
+        if rebuilt:
+            # 테이블 재작성 후 빈 페이지 회수
+            conn.execute("VACUUM")
+        
+        # 컬럼 캐시가 처음 켜진 경우 기존 데이터로 한 번 채움
+        if self.columns is not None and not self.columns.exists():
+            self.rebuild_columnar_store()
+    
+    def get_schema_version(self):
+        """현재 DB 스키마 버전"""
+        return self.get_connection().execute("PRAGMA user_version").fetchone()[0]
+    
+    def _migrate_to_1(self, cursor):
+        """v1: 기본 테이블 생성 (기존 DB에는 이미 존재)"""
         # 주식 회사 정보 테이블
         cursor.execute('''
         CREATE TABLE IF NOT EXISTS companies (
@@ -40,112 +198,567 @@ class StockDatabase:
         )
         ''')
         
-        conn.commit()
-        conn.close()
+        # 데이터 수집 작업 상태 테이블 (gunicorn 워커 간 작업 상태/중복 실행 방지 공유)
+        cursor.execute('''
+        CREATE TABLE IF NOT EXISTS ingestion_jobs (
+            id TEXT PRIMARY KEY,
+            status TEXT NOT NULL,
+            options TEXT,
+            total INTEGER DEFAULT 0,
+            done INTEGER DEFAULT 0,
+            success_count INTEGER DEFAULT 0,
+            results TEXT,
+            error TEXT,
+            created_at REAL NOT NULL,
+            started_at REAL,
+            finished_at REAL,
+            heartbeat_at REAL
+        )
+        ''')
+    
+    def _migrate_to_2(self, cursor):
+        """v2: stock_prices를 (symbol, date) 클러스터드 WITHOUT ROWID 테이블로 재작성
+        
+        날짜는 YYYYMMDD 정수로 저장하고, 종목 간 날짜 조회용 커버링 인덱스를 추가합니다.
+        """
+        cursor.execute('''
+        CREATE TABLE stock_prices_v2 (
+            symbol TEXT NOT NULL,
+            date INTEGER NOT NULL,
+            open_price REAL,
+            high_price REAL,
+            low_price REAL,
+            close_price REAL,
+            volume INTEGER,
+            PRIMARY KEY (symbol, date)
+        ) WITHOUT ROWID
+        ''')
+        
+        # 기존 'YYYY-MM-DD[ HH:MM:SS]' 문자열 날짜를 정수로 변환하며 복사
+        # ('2024-01-05'와 '2024-01-05 00:00:00'처럼 같은 날짜가 된 행은 나중에 저장된 행을 남김)
+        cursor.execute('''
+        INSERT OR REPLACE INTO stock_prices_v2
+        (symbol, date, open_price, high_price, low_price, close_price, volume)
+        SELECT symbol, CAST(REPLACE(SUBSTR(date, 1, 10), '-', '') AS INTEGER),
+               open_price, high_price, low_price, close_price, volume
+        FROM stock_prices
+        ORDER BY rowid
+        ''')
+        copied = cursor.rowcount
+        
+        cursor.execute("DROP TABLE stock_prices")
+        cursor.execute("ALTER TABLE stock_prices_v2 RENAME TO stock_prices")
+        cursor.execute('''
+        CREATE INDEX IF NOT EXISTS idx_stock_prices_date
+        ON stock_prices (date, symbol, close_price, volume)
+        ''')
+        return copied > 0
+    
+    def _migrate_to_3(self, cursor):
+        """v3: 종목별 요약 통계 테이블 (가격 upsert와 같은 트랜잭션에서 증분 갱신)"""
+        cursor.execute('''
+        CREATE TABLE IF NOT EXISTS symbol_stats (
+            symbol TEXT PRIMARY KEY,
+            latest_date INTEGER,
+            latest_close REAL,
+            latest_volume INTEGER,
+            prev_close REAL,
+            first_date INTEGER,
+            row_count INTEGER NOT NULL DEFAULT 0,
+            min_close REAL,
+            max_close REAL,
+            sum_close REAL NOT NULL DEFAULT 0
+        )
+        ''')
+        # 기존 가격 데이터로 계산하는 초기값은 close_count 컬럼이 생기는 v6에서 채움
+    
+    def _migrate_to_4(self, cursor):
+        """v4: 기술적 지표 테이블과 종목별 증분 계산 상태 (값은 수집 후 indicators.update_indicators가 채움)"""
+        columns = ',\n'.join(f'            {name} REAL' for name in INDICATOR_NAMES)
+        cursor.execute(f'''
+        CREATE TABLE IF NOT EXISTS stock_indicators (
+            symbol TEXT NOT NULL,
+            date INTEGER NOT NULL,
+{columns},
+            PRIMARY KEY (symbol, date)
+        ) WITHOUT ROWID
+        ''')
+        cursor.execute('''
+        CREATE TABLE IF NOT EXISTS indicator_state (
+            symbol TEXT PRIMARY KEY,
+            last_date INTEGER NOT NULL,
+            state TEXT
+        )
+        ''')
+    
+    def _migrate_to_5(self, cursor):
+        """v5: 종목 유니버스 관리 (시장/상장주식수/상장 상태 컬럼과 상장·폐지 이력)"""
+        for column in (
+            "market TEXT",
+            "shares INTEGER",
+            "status TEXT NOT NULL DEFAULT 'listed'",
+            "listed_date INTEGER",
+            "delisted_date INTEGER",
+            "updated_at REAL"
+        ):
+            cursor.execute(f"ALTER TABLE companies ADD COLUMN {column}")
+        cursor.execute('''
+        CREATE TABLE IF NOT EXISTS universe_events (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            symbol TEXT NOT NULL,
+            event TEXT NOT NULL,
+            date INTEGER NOT NULL,
+            created_at REAL NOT NULL
+        )
+        ''')
+    
+    def _migrate_to_6(self, cursor):
+        """v6: 종가가 있는 행 수(close_count) 컬럼 (평균 종가 = sum_close / close_count)"""
+        cursor.execute("ALTER TABLE symbol_stats ADD COLUMN close_count INTEGER NOT NULL DEFAULT 0")
+        # 기존 통계는 NaN(NULL) 종가 행까지 개수에 넣었으므로 전체를 다시 계산
+        cursor.execute("SELECT DISTINCT symbol FROM stock_prices")
+        for (symbol,) in cursor.fetchall():
+            self._rebuild_symbol_stats(cursor, symbol)
+    
+    def _rebuild_symbol_stats(self, cursor, symbol):
+        """한 종목의 요약 통계를 stock_prices 전체에서 다시 계산"""
+        cursor.execute('''
+        INSERT OR REPLACE INTO symbol_stats
+        (symbol, first_date, row_count, min_close, max_close, sum_close, close_count)
+        SELECT symbol, MIN(date), COUNT(*), MIN(close_price), MAX(close_price), COALESCE(SUM(close_price), 0),
+               COUNT(close_price)
+        FROM stock_prices WHERE symbol = ?
+        ''', (symbol,))
+        self._refresh_latest_stats(cursor, symbol)
+    
+    def _refresh_latest_stats(self, cursor, symbol):
+        """최신/직전 종가를 클러스터드 PK 역순 탐색 두 행으로 갱신"""
+        cursor.execute('''
+        SELECT date, close_price, volume FROM stock_prices
+        WHERE symbol = ? ORDER BY date DESC LIMIT 2
+        ''', (symbol,))
+        latest = cursor.fetchall()
+        if not latest:
+            return
+        prev_close = latest[1][1] if len(latest) > 1 else None
+        cursor.execute('''
+        UPDATE symbol_stats
+        SET latest_date = ?, latest_close = ?, latest_volume = ?, prev_close = ?
+        WHERE symbol = ?
+        ''', (latest[0][0], latest[0][1], latest[0][2], prev_close, symbol))
+    
+    def _upsert_price_rows(self, cursor, symbol, rows):
+        """가격 행 upsert와 symbol_stats 증분 갱신 (호출자의 트랜잭션 안에서 실행)
+        
+        rows는 (symbol, date(YYYYMMDD), open, high, low, close, volume) 튜플 리스트입니다.
+        덮어쓰는 기존 행의 종가만 읽어 합계/개수를 보정하므로 비용은 입력 행 수에 비례합니다.
+        """
+        dates = [row[1] for row in rows]
+        cursor.execute('''
+        SELECT date, close_price FROM stock_prices
+        WHERE symbol = ? AND date BETWEEN ? AND ?
+        ''', (symbol, min(dates), max(dates)))
+        incoming = set(dates)
+        replaced = {date: close for date, close in cursor.fetchall() if date in incoming}
+        
+        cursor.executemany('''
+        INSERT INTO stock_prices
+        (symbol, date, open_price, high_price, low_price, close_price, volume)
+        VALUES (?, ?, ?, ?, ?, ?, ?)
+        ON CONFLICT(symbol, date) DO UPDATE SET
+            open_price = excluded.open_price,
+            high_price = excluded.high_price,
+            low_price = excluded.low_price,
+            close_price = excluded.close_price,
+            volume = excluded.volume
+        ''', rows)
+        
+        cursor.execute('''
+        SELECT first_date, row_count, min_close, max_close, sum_close, close_count
+        FROM symbol_stats WHERE symbol = ?
+        ''', (symbol,))
+        stats = cursor.fetchone()
+        if stats is None:
+            # 처음 저장되는 종목은 전체 계산 (행 수가 곧 입력 크기)
+            self._rebuild_symbol_stats(cursor, symbol)
+            return
+        
+        first_date, row_count, min_close, max_close, sum_close, close_count = stats
+        # 중복 날짜가 입력에 여러 번 있으면 마지막 값이 저장됨
+        new_closes = {row[1]: row[5] for row in rows}
+        # NaN 종가는 NULL로 저장되므로 None과 함께 합계/개수/최소/최대에서 제외
+        closes = [close for close in new_closes.values() if close is not None and close == close]
+        old_closes = [close for close in replaced.values() if close is not None]
+        
+        # 덮어쓴 행이 기존 최소/최대였고 값이 바뀌었다면 정확한 값을 위해 다시 계산
+        if any(close in (min_close, max_close) and new_closes[date] != close
+               for date, close in replaced.items()):
+            self._rebuild_symbol_stats(cursor, symbol)
+            return
+        
+        cursor.execute('''
+        UPDATE symbol_stats
+        SET first_date = ?, row_count = ?, min_close = ?, max_close = ?, sum_close = ?, close_count = ?
+        WHERE symbol = ?
+        ''', (
+            min([first_date] + dates) if first_date is not None else min(dates),
+            row_count + len(new_closes) - len(replaced),
+            min([c for c in [min_close] + closes if c is not None], default=None),
+            max([c for c in [max_close] + closes if c is not None], default=None),
+            (sum_close or 0) + sum(closes) - sum(old_closes),
+            close_count + len(closes) - len(old_closes),
+            symbol
+        ))
+        self._refresh_latest_stats(cursor, symbol)
     
     def insert_company(self, symbol, name, market_cap=None, sector=None):
-        """회사 정보 삽입"""
-        conn = sqlite3.connect(self.db_name)
-        cursor = conn.cursor()
+        """회사 정보 삽입 (이미 있으면 이름/시가총액/섹터만 갱신하고 유니버스 컬럼은 유지)"""
+        conn = self.get_connection()
         
         try:
-            cursor.execute('''
-            INSERT OR REPLACE INTO companies (symbol, name, market_cap, sector)
-            VALUES (?, ?, ?, ?)
-            ''', (symbol, name, market_cap, sector))
-            conn.commit()
+            with conn:
+                conn.execute('''
+                INSERT INTO companies (symbol, name, market_cap, sector)
+                VALUES (?, ?, ?, ?)
+                ON CONFLICT(symbol) DO UPDATE SET
+                    name = excluded.name,
+                    market_cap = excluded.market_cap,
+                    sector = excluded.sector
+                ''', (symbol, name, market_cap, sector))
             return True
         except Exception as e:
             print(f"Error inserting company: {e}")
             return False
-        finally:
-            conn.close()
+    
+    def sync_universe(self, listing, mark_delisted=True):
+        """상장 종목 목록으로 companies를 한 트랜잭션에서 동기화하고 변경 내역을 반환
+        
+        listing은 symbol, name, market, sector, shares, market_cap 키를 가진 딕셔너리 리스트입니다.
+        새로 보이거나 다시 상장된 종목은 'listed'로, mark_delisted이면 목록에서 사라진 상장 종목은
+        'delisted'로 바꾸고 universe_events에 기록합니다. 섹터가 없는 목록은 기존 섹터를 유지합니다.
+        반환값은 {'listed': [...], 'relisted': [...], 'delisted': [...], 'total': n}입니다.
+        """
+        conn = self.get_connection()
+        today = encode_date(datetime.now().date())
+        now = time.time()
+        changes = {'listed': [], 'relisted': [], 'delisted': [], 'total': len(listing)}
+        
+        try:
+            with conn:
+                status = dict(conn.execute("SELECT symbol, status FROM companies").fetchall())
+                for company in listing:
+                    previous = status.get(company['symbol'])
+                    if previous is None:
+                        changes['listed'].append(company['symbol'])
+                    elif previous != 'listed':
+                        changes['relisted'].append(company['symbol'])
+                
+                conn.executemany('''
+                INSERT INTO companies (symbol, name, market, sector, shares, market_cap, status, listed_date, updated_at)
+                VALUES (:symbol, :name, :market, :sector, :shares, :market_cap, 'listed', :today, :now)
+                ON CONFLICT(symbol) DO UPDATE SET
+                    name = excluded.name,
+                    market = excluded.market,
+                    sector = COALESCE(excluded.sector, companies.sector),
+                    shares = excluded.shares,
+                    market_cap = excluded.market_cap,
+                    status = 'listed',
+                    listed_date = CASE WHEN companies.status = 'listed' THEN COALESCE(companies.listed_date, excluded.listed_date) ELSE excluded.listed_date END,
+                    delisted_date = NULL,
+                    updated_at = excluded.updated_at
+                ''', [dict(company, today=today, now=now) for company in listing])
+                
+                if mark_delisted:
+                    listed = {company['symbol'] for company in listing}
+                    changes['delisted'] = [
+                        symbol for symbol, previous in status.items()
+                        if previous == 'listed' and symbol not in listed
+                    ]
+                    conn.executemany(
+                        "UPDATE companies SET status = 'delisted', delisted_date = ?, updated_at = ? WHERE symbol = ?",
+                        [(today, now, symbol) for symbol in changes['delisted']]
+                    )
+                
+                conn.executemany(
+                    "INSERT INTO universe_events (symbol, event, date, created_at) VALUES (?, ?, ?, ?)",
+                    [
+                        (symbol, event, today, now)
+                        for event in ('listed', 'relisted', 'delisted')
+                        for symbol in changes[event]
+                    ]
+                )
+            return changes
+        except Exception as e:
+            print(f"Error syncing universe: {e}")
+            return None
+    
+    def get_universe(self, markets=None):
+        """상장 종목을 시가총액 내림차순 (symbol, name) 리스트로 반환"""
+        conn = self.get_connection(readonly=True)
+        
+        try:
+            query = "SELECT symbol, name FROM companies WHERE status = 'listed'"
+            params = []
+            if markets:
+                query += f" AND market IN ({', '.join('?' * len(markets))})"
+                params.extend(markets)
+            query += " ORDER BY market_cap DESC, symbol"
+            return conn.execute(query, params).fetchall()
+        except Exception as e:
+            print(f"Error getting universe: {e}")
+            return []
     
     def insert_stock_price(self, symbol, date, open_price, high_price, low_price, close_price, volume):
         """개별 주식 가격 데이터 삽입"""
-        conn = sqlite3.connect(self.db_name)
-        cursor = conn.cursor()
+        conn = self.get_connection()
         
         try:
-            cursor.execute('''
-            INSERT OR REPLACE INTO stock_prices 
-            (symbol, date, open_price, high_price, low_price, close_price, volume)
-            VALUES (?, ?, ?, ?, ?, ?, ?)
-            ''', (symbol, date, open_price, high_price, low_price, close_price, volume))
-            conn.commit()
+            with conn:
+                self._upsert_price_rows(conn.cursor(), symbol, [
+                    (symbol, encode_date(date), open_price, high_price, low_price, close_price, volume)
+                ])
+            self.refresh_columnar(symbol)
             return True
         except Exception as e:
             print(f"Error inserting stock price: {e}")
             return False
-        finally:
-            conn.close()
-
+    
     def insert_stock_prices(self, symbol, df):
-        """주식 가격 데이터 삽입"""
-        conn = sqlite3.connect(self.db_name)
+        """주식 가격 데이터 일괄 삽입 (단일 트랜잭션 upsert)
+        
+        df는 날짜 인덱스와 Open/High/Low/Close/Volume 컬럼을 가진 OHLCV DataFrame이며,
+        이미 저장된 (symbol, date) 행은 새 값으로 갱신됩니다. symbol_stats도 같은 트랜잭션에서 갱신됩니다.
+        """
+        if df is None or df.empty:
+            return True
+        
+        # 행 단위 반복 대신 컬럼 배열을 한 번에 변환 (날짜는 YYYYMMDD 정수)
+        index = pd.to_datetime(df.index)
+        dates = (index.year * 10000 + index.month * 100 + index.day).tolist()
+        volumes = df['Volume'].fillna(0).astype('int64').tolist()
+        rows = list(zip(
+            [symbol] * len(df),
+            dates,
+            df['Open'].astype(float).tolist(),
+            df['High'].astype(float).tolist(),
+            df['Low'].astype(float).tolist(),
+            df['Close'].astype(float).tolist(),
+            volumes
+        ))
+        
+        conn = self.get_connection()
         
         try:
-            # DataFrame을 데이터베이스에 삽입
-            df_to_insert = df.copy()
-            df_to_insert['symbol'] = symbol
-            df_to_insert['date'] = df_to_insert.index
-            df_to_insert.reset_index(drop=True, inplace=True)
-            
-            # 컬럼명 변경
-            df_to_insert.rename(columns={
-                'Open': 'open_price',
-                'High': 'high_price',
-                'Low': 'low_price',
-                'Close': 'close_price',
-                'Volume': 'volume'
-            }, inplace=True)
-            
-            # 필요한 컬럼만 선택
-            df_to_insert = df_to_insert[['symbol', 'date', 'open_price', 'high_price', 'low_price', 'close_price', 'volume']]
-            
-            # 데이터베이스에 삽입
-            df_to_insert.to_sql('stock_prices', conn, if_exists='append', index=False)
+            with conn:
+                # 가격 upsert와 symbol_stats 갱신을 하나의 트랜잭션으로
+                self._upsert_price_rows(conn.cursor(), symbol, rows)
+            # 커밋 후 컬럼 캐시 파일 교체
+            self.refresh_columnar(symbol)
             return True
         except Exception as e:
             print(f"Error inserting stock prices: {e}")
             return False
-        finally:
-            conn.close()
+    
+    def refresh_columnar(self, symbol):
+        """종목의 컬럼 캐시 파일을 stock_prices 내용으로 다시 작성"""
+        if self.columns is None:
+            return False
+        
+        try:
+            cursor = self.get_connection(readonly=True).execute('''
+            SELECT date, open_price, high_price, low_price, close_price, volume
+            FROM stock_prices WHERE symbol = ? ORDER BY date
+            ''', (symbol,))
+            data = np.array(cursor.fetchall(), dtype=np.float64).reshape(-1, len(COLUMNS))
+            if len(data) == 0:
+                self.columns.remove(symbol)
+                return True
+            self.columns.write(symbol, data[:, 0].astype(np.int64), *data[:, 1:].T)
+            return True
+        except Exception as e:
+            print(f"Error refreshing columnar cache for {symbol}: {e}")
+            return False
+    
+    def rebuild_columnar_store(self):
+        """모든 종목의 컬럼 캐시 파일 재작성"""
+        if self.columns is None:
+            return 0
+        
+        symbols = [row[0] for row in self.get_connection(readonly=True).execute(
+            "SELECT symbol FROM symbol_stats"
+        ).fetchall()]
+        os.makedirs(self.columns.directory, exist_ok=True)
+        return sum(1 for symbol in symbols if self.refresh_columnar(symbol))
+    
+    def current_snapshot(self):
+        """현재 데이터 버전과 일치하는 스냅샷 (없거나 수집 중이라 버전이 다르면 None)"""
+        if self.snapshot is None:
+            return None
+        snapshot = self.snapshot.current()
+        if snapshot is None or snapshot.version != self.data_version.version:
+            return None
+        return snapshot
+    
+    def _mapped_price_arrays(self, symbol, days, snapshot):
+        """스냅샷 또는 컬럼 캐시의 mmap 슬라이스 (둘 다 없으면 None)"""
+        arrays = snapshot.read(symbol, days) if snapshot is not None else None
+        if arrays is None and self.columns is not None:
+            arrays = self.columns.read(symbol, days)
+        return arrays
+    
+    def get_price_arrays(self, symbol, days=None):
+        """종목의 최근 days개 OHLCV를 날짜 오름차순 NumPy 배열 딕셔너리로 반환
+        
+        키는 date(1970-01-01 기준 일수), open, high, low, close, volume입니다.
+        스냅샷이나 컬럼 캐시가 있으면 mmap 슬라이스를, 없으면 SQLite 조회 결과를 반환하며 데이터가 없으면 None입니다.
+        """
+        arrays = self._mapped_price_arrays(symbol, days, self.current_snapshot())
+        if arrays is not None:
+            return arrays
+        
+        conn = self.get_connection(readonly=True)
+        try:
+            cursor = conn.execute('''
+            SELECT date, open_price, high_price, low_price, close_price, volume
+            FROM stock_prices WHERE symbol = ?
+            ORDER BY date DESC LIMIT ?
+            ''', (symbol, days or -1))
+            data = np.array(cursor.fetchall()[::-1], dtype=np.float64).reshape(-1, len(COLUMNS))
+            if len(data) == 0:
+                return None
+            data[:, 0] = yyyymmdd_to_days(data[:, 0].astype(np.int64))
+            return {name: data[:, i] for i, name in enumerate(COLUMNS)}
+        except Exception as e:
+            print(f"Error getting price arrays: {e}")
+            return None
+    
+    def get_closes(self, symbol, after=None, lookback=0):
+        """종목의 (날짜 YYYYMMDD 정수 배열, 종가 배열)을 날짜 오름차순으로 반환 (데이터가 없으면 None)
+        
+        after(YYYYMMDD)를 주면 after 이하의 최근 lookback개 행과 after 이후 행만 기본키 범위로 읽으므로
+        비용은 전체 이력이 아니라 새 행 수에 비례합니다.
+        """
+        conn = self.get_connection(readonly=True)
+        try:
+            if after is None:
+                cursor = conn.execute(
+                    "SELECT date, close_price FROM stock_prices WHERE symbol = ? ORDER BY date", (symbol,)
+                )
+            else:
+                cursor = conn.execute('''
+                SELECT * FROM (
+                    SELECT date, close_price FROM stock_prices
+                    WHERE symbol = ? AND date <= ? ORDER BY date DESC LIMIT ?
+                )
+                UNION ALL
+                SELECT date, close_price FROM stock_prices WHERE symbol = ? AND date > ?
+                ORDER BY date
+                ''', (symbol, after, lookback, symbol, after))
+            rows = cursor.fetchall()
+            if not rows:
+                return None
+            dates, closes = zip(*rows)
+            return np.array(dates, dtype=np.int64), np.array(closes, dtype=np.float64)
+        except Exception as e:
+            print(f"Error getting closes: {e}")
+            return None
+    
+    def get_price_arrays_batch(self, symbols, days=None):
+        """여러 종목의 최근 days개 OHLCV를 {symbol: 배열 딕셔너리}로 반환 (형식은 get_price_arrays와 동일)
+        
+        스냅샷이나 컬럼 캐시에 있는 종목은 mmap 슬라이스로, 나머지는 하나의 WHERE symbol IN (...) 쿼리로
+        기본키 순서대로 읽습니다. 데이터가 없는 종목은 결과에서 빠집니다.
+        """
+        result = {}
+        missing = []
+        snapshot = self.current_snapshot()
+        for symbol in dict.fromkeys(symbols):
+            arrays = self._mapped_price_arrays(symbol, days, snapshot)
+            if arrays is not None:
+                result[symbol] = arrays
+            else:
+                missing.append(symbol)
+        if not missing:
+            return result
+        
+        conn = self.get_connection(readonly=True)
+        try:
+            # 종목별 최근 days개만 남기기 위해 역순 행 번호로 자름 (PK 순서 탐색, 정렬 없음)
+            cursor = conn.execute(f'''
+            SELECT symbol, date, open_price, high_price, low_price, close_price, volume
+            FROM (
+                SELECT *, ROW_NUMBER() OVER (PARTITION BY symbol ORDER BY date DESC) AS row_number
+                FROM stock_prices
+                WHERE symbol IN ({', '.join('?' * len(missing))})
+            )
+            WHERE row_number <= ?
+            ORDER BY symbol, date
+            ''', (*missing, days or -1))
+            rows = cursor.fetchall()
+            if not rows:
+                return result
+            
+            symbol_column = np.array([row[0] for row in rows])
+            data = np.array([row[1:] for row in rows], dtype=np.float64)
+            data[:, 0] = yyyymmdd_to_days(data[:, 0].astype(np.int64))
+            # 종목이 바뀌는 위치에서 분할
+            starts = np.flatnonzero(np.r_[True, symbol_column[1:] != symbol_column[:-1]])
+            for start, end in zip(starts, np.r_[starts[1:], len(rows)]):
+                result[rows[start][0]] = {
+                    name: data[start:end, i] for i, name in enumerate(COLUMNS)
+                }
+            return result
+        except Exception as e:
+            print(f"Error getting price arrays batch: {e}")
+            return result
     
     def get_companies(self):
         """등록된 회사 목록 조회"""
-        conn = sqlite3.connect(self.db_name)
+        conn = self.get_connection(readonly=True)
         try:
             df = pd.read_sql_query("SELECT * FROM companies", conn)
             return df
         except Exception as e:
             print(f"Error getting companies: {e}")
             return pd.DataFrame()
-        finally:
-            conn.close()
     
     def get_all_companies(self):
-        """모든 회사 목록을 튜플 리스트로 반환"""
-        conn = sqlite3.connect(self.db_name)
-        cursor = conn.cursor()
+        """상장 중인 모든 회사 목록을 튜플 리스트로 반환 (상장폐지 종목 제외)"""
+        conn = self.get_connection(readonly=True)
         
         try:
-            cursor.execute("SELECT symbol, name, market_cap, sector FROM companies")
+            cursor = conn.execute("SELECT symbol, name, market_cap, sector FROM companies WHERE status = 'listed'")
             return cursor.fetchall()
         except Exception as e:
             print(f"Error getting all companies: {e}")
             return []
-        finally:
-            conn.close()
+    
+    def get_companies_by_symbols(self, symbols):
+        """여러 종목의 회사 정보를 {symbol: dict} 형태로 한 번에 조회"""
+        conn = self.get_connection(readonly=True)
+        
+        try:
+            cursor = conn.execute(f'''
+            SELECT symbol, name, market_cap, sector FROM companies
+            WHERE symbol IN ({', '.join('?' * len(symbols))})
+            ''', list(symbols))
+            return {
+                row[0]: {'symbol': row[0], 'name': row[1], 'market_cap': row[2], 'sector': row[3]}
+                for row in cursor.fetchall()
+            }
+        except Exception as e:
+            print(f"Error getting companies by symbols: {e}")
+            return {}
     
     def get_stock_prices(self, symbol, days=365):
         """특정 심볼의 주식 가격 데이터 조회"""
-        conn = sqlite3.connect(self.db_name)
+        conn = self.get_connection(readonly=True)
         try:
-            query = '''
-            SELECT * FROM stock_prices 
-            WHERE symbol = ? 
-            ORDER BY date DESC 
+            query = f'''
+            SELECT symbol, {date_sql()} AS date, open_price, high_price, low_price, close_price, volume
+            FROM stock_prices
+            WHERE symbol = ?
+            ORDER BY stock_prices.date DESC
             LIMIT ?
             '''
             df = pd.read_sql_query(query, conn, params=(symbol, days))
@@ -153,66 +766,240 @@ class StockDatabase:
         except Exception as e:
             print(f"Error getting stock prices: {e}")
             return pd.DataFrame()
-        finally:
-            conn.close()
     
     def get_recent_stock_prices(self, symbol, days=30):
         """특정 종목의 최근 주가 데이터를 튜플 리스트로 반환"""
-        conn = sqlite3.connect(self.db_name)
-        cursor = conn.cursor()
+        conn = self.get_connection(readonly=True)
         
         try:
-            query = '''
-            SELECT symbol, date, open_price, high_price, close_price, volume
-            FROM stock_prices 
-            WHERE symbol = ? 
-            ORDER BY date DESC 
+            query = f'''
+            SELECT symbol, {date_sql()}, open_price, high_price, close_price, volume
+            FROM stock_prices
+            WHERE symbol = ?
+            ORDER BY date DESC
             LIMIT ?
             '''
-            cursor.execute(query, (symbol, days))
+            cursor = conn.execute(query, (symbol, days))
             return cursor.fetchall()
         except Exception as e:
             print(f"Error getting recent stock prices: {e}")
             return []
-        finally:
-            conn.close()
     
     def get_stock_prices_by_date_range(self, symbol, start_date, end_date):
         """날짜 범위로 주가 데이터 조회"""
-        conn = sqlite3.connect(self.db_name)
-        cursor = conn.cursor()
+        conn = self.get_connection(readonly=True)
         
         try:
-            query = '''
-            SELECT symbol, date, open_price, high_price, close_price, volume
-            FROM stock_prices 
+            query = f'''
+            SELECT symbol, {date_sql()}, open_price, high_price, close_price, volume
+            FROM stock_prices
             WHERE symbol = ? AND date BETWEEN ? AND ?
             ORDER BY date DESC
             '''
-            cursor.execute(query, (symbol, start_date, end_date))
+            cursor = conn.execute(query, (symbol, encode_date(start_date), encode_date(end_date)))
             return cursor.fetchall()
         except Exception as e:
             print(f"Error getting stock prices by date range: {e}")
             return []
+    
+    def iter_stock_prices(self, symbols=None, start_date=None, end_date=None, chunk_size=EXPORT_CHUNK_ROWS):
+        """가격 이력을 청크 단위로 스트리밍 (iter_stock_price_chunks 참고)
+        
+        스트리밍 중에도 다른 조회가 영향받지 않도록 전용 읽기 연결을 열고, 끝나면 닫습니다.
+        한 읽기 트랜잭션 안에서 읽으므로 내보내는 동안 수집이 진행되어도 같은 스냅샷을 봅니다.
+        """
+        conn = self._open_connection(readonly=True)
+        try:
+            yield from iter_stock_price_chunks(conn, symbols, start_date, end_date, chunk_size)
         finally:
             conn.close()
-
+    
+    def get_last_dates(self):
+        """종목별 마지막 저장 날짜를 {symbol: 'YYYY-MM-DD'} 딕셔너리로 반환 (단일 GROUP BY 쿼리)"""
+        conn = self.get_connection(readonly=True)
+        
+        try:
+            cursor = conn.execute(f"SELECT symbol, {date_sql('MAX(date)')} FROM stock_prices GROUP BY symbol")
+            return {symbol: last_date for symbol, last_date in cursor.fetchall()}
+        except Exception as e:
+            print(f"Error getting last dates: {e}")
+            return {}
+    
     def get_latest_prices(self):
         """모든 주식의 최신 가격 조회"""
-        conn = sqlite3.connect(self.db_name)
-        try:
-            query = '''
-            SELECT sp.symbol, c.name, sp.close_price, sp.date
-            FROM stock_prices sp
-            JOIN companies c ON sp.symbol = c.symbol
-            WHERE sp.date = (
-                SELECT MAX(date) FROM stock_prices sp2 WHERE sp2.symbol = sp.symbol
-            )
+        conn = self.get_connection(readonly=True)
+        try:
+            query = f'''
+            SELECT s.symbol, c.name, s.latest_close AS close_price, {date_sql('s.latest_date')} AS date
+            FROM symbol_stats s
+            JOIN companies c ON s.symbol = c.symbol
             '''
             df = pd.read_sql_query(query, conn)
             return df
         except Exception as e:
             print(f"Error getting latest prices: {e}")
             return pd.DataFrame()
-        finally:
-            conn.close() 
\ No newline at end of file
+    
+    def get_symbol_stats(self):
+        """모든 종목의 요약 통계를 {symbol: dict} 형태로 반환 (symbol_stats 한 번 조회)"""
+        conn = self.get_connection(readonly=True)
+        
+        try:
+            cursor = conn.execute(f'''
+            SELECT symbol, {date_sql('latest_date')} AS latest_date, latest_close, latest_volume,
+                   prev_close, {date_sql('first_date')} AS first_date, row_count,
+                   min_close, max_close,
+                   CASE WHEN close_count > 0 THEN sum_close / close_count END AS avg_close
+            FROM symbol_stats
+            ''')
+            columns = [column[0] for column in cursor.description]
+            return {row[0]: dict(zip(columns, row)) for row in cursor.fetchall()}
+        except Exception as e:
+            print(f"Error getting symbol stats: {e}")
+            return {}
+    
+    def get_indicator_states(self):
+        """종목별 지표 증분 계산 상태를 {symbol: (last_date, state)} 형태로 반환"""
+        conn = self.get_connection(readonly=True)
+        
+        try:
+            cursor = conn.execute("SELECT symbol, last_date, state FROM indicator_state")
+            return {
+                symbol: (last_date, json.loads(state) if state else None)
+                for symbol, last_date, state in cursor.fetchall()
+            }
+        except Exception as e:
+            print(f"Error getting indicator states: {e}")
+            return {}
+    
+    def save_indicators(self, updates):
+        """여러 종목의 지표 값과 상태를 한 트랜잭션으로 저장
+        
+        updates는 (symbol, dates(YYYYMMDD 배열), {지표명: 배열}, state, replace) 튜플 리스트이며,
+        replace가 참이면 해당 종목의 기존 지표를 지우고 다시 씁니다. NaN은 NULL로 저장됩니다.
+        """
+        conn = self.get_connection()
+        names = ', '.join(INDICATOR_NAMES)
+        placeholders = ', '.join('?' * (len(INDICATOR_NAMES) + 2))
+        
+        try:
+            with conn:
+                for symbol, dates, values, state, replace in updates:
+                    if replace:
+                        conn.execute("DELETE FROM stock_indicators WHERE symbol = ?", (symbol,))
+                    # SQLite는 NaN 바인딩 값을 NULL로 저장
+                    rows = np.column_stack([values[name] for name in INDICATOR_NAMES]).tolist()
+                    conn.executemany(
+                        f"INSERT OR REPLACE INTO stock_indicators (symbol, date, {names}) VALUES ({placeholders})",
+                        [(symbol, int(date), *row) for date, row in zip(dates, rows)]
+                    )
+                    if len(dates):
+                        conn.execute(
+                            "INSERT OR REPLACE INTO indicator_state (symbol, last_date, state) VALUES (?, ?, ?)",
+                            (symbol, int(dates[-1]), json.dumps(state) if state else None)
+                        )
+            return True
+        except Exception as e:
+            print(f"Error saving indicators: {e}")
+            return False
+    
+    def get_indicators(self, symbol, names=INDICATOR_NAMES, days=None):
+        """특정 심볼의 지표를 날짜 오름차순 DataFrame으로 조회 (date 컬럼 + names)"""
+        unknown = [name for name in names if name not in INDICATOR_NAMES]
+        if unknown:
+            raise ValueError(f"Unknown indicators: {', '.join(unknown)}")
+        
+        conn = self.get_connection(readonly=True)
+        try:
+            query = f'''
+            SELECT {date_sql()} AS date, {', '.join(names)}
+            FROM stock_indicators
+            WHERE symbol = ?
+            ORDER BY stock_indicators.date DESC
+            LIMIT ?
+            '''
+            df = pd.read_sql_query(query, conn, params=(symbol, days or -1))
+            return df.iloc[::-1].reset_index(drop=True)
+        except Exception as e:
+            print(f"Error getting indicators: {e}")
+            return pd.DataFrame()
+    
+    def create_ingestion_job(self, job_id, options=None, stale_seconds=600):
+        """수집 작업 등록 (실행 중인 작업이 있으면 그 작업을 반환)
+        
+        반환값은 (job_id, created) 튜플이며, 마지막 heartbeat가 stale_seconds보다 오래된
+        작업은 비정상 종료된 것으로 보고 failed 처리합니다.
+        """
+        conn = self.get_connection()
+        now = time.time()
+        
+        try:
+            # IMMEDIATE 트랜잭션으로 워커 간 확인-등록을 원자적으로 수행
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                conn.execute('''
+                UPDATE ingestion_jobs
+                SET status = 'failed', error = 'Job abandoned (no heartbeat)', finished_at = ?
+                WHERE status IN ('queued', 'running') AND COALESCE(heartbeat_at, created_at) < ?
+                ''', (now, now - stale_seconds))
+                
+                row = conn.execute('''
+                SELECT id FROM ingestion_jobs
+                WHERE status IN ('queued', 'running')
+                ORDER BY created_at DESC LIMIT 1
+                ''').fetchone()
+                if row:
+                    conn.execute("COMMIT")
+                    return row[0], False
+                
+                conn.execute('''
+                INSERT INTO ingestion_jobs (id, status, options, created_at, heartbeat_at)
+                VALUES (?, 'queued', ?, ?, ?)
+                ''', (job_id, json.dumps(options or {}), now, now))
+                conn.execute("COMMIT")
+                return job_id, True
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+        except Exception as e:
+            print(f"Error creating ingestion job: {e}")
+            return None, False
+    
+    def update_ingestion_job(self, job_id, **fields):
+        """수집 작업 상태 갱신 (results는 JSON으로 저장, heartbeat 자동 갱신)"""
+        allowed = {'status', 'total', 'done', 'success_count', 'results', 'error', 'started_at', 'finished_at'}
+        fields = {k: v for k, v in fields.items() if k in allowed}
+        if 'results' in fields:
+            fields['results'] = json.dumps(fields['results'], ensure_ascii=False)
+        fields['heartbeat_at'] = time.time()
+        
+        assignments = ', '.join(f"{column} = ?" for column in fields)
+        conn = self.get_connection()
+        
+        try:
+            with conn:
+                conn.execute(
+                    f"UPDATE ingestion_jobs SET {assignments} WHERE id = ?",
+                    (*fields.values(), job_id)
+                )
+            return True
+        except Exception as e:
+            print(f"Error updating ingestion job: {e}")
+            return False
+    
+    def get_ingestion_job(self, job_id):
+        """수집 작업 상태를 딕셔너리로 반환 (없으면 None)"""
+        conn = self.get_connection(readonly=True)
+        
+        try:
+            cursor = conn.execute("SELECT * FROM ingestion_jobs WHERE id = ?", (job_id,))
+            row = cursor.fetchone()
+            if row is None:
+                return None
+            job = dict(zip([column[0] for column in cursor.description], row))
+            job['options'] = json.loads(job['options']) if job['options'] else {}
+            job['results'] = json.loads(job['results']) if job['results'] else []
+            return job
+        except Exception as e:
+            print(f"Error getting ingestion job: {e}")
+            return None
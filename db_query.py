@@ -1,6 +1,8 @@
 import sqlite3
 import pandas as pd
 from datetime import datetime
+from database import date_sql, iter_stock_price_chunks, EXPORT_CHUNK_ROWS
+from exporter import stream_export
 
 def connect_db():
     """데이터베이스 연결"""
@@ -19,14 +21,12 @@ def show_all_companies():
 def show_latest_prices():
     """최신 주식 가격 조회"""
     conn = connect_db()
-    query = """
-    SELECT c.name, c.symbol, sp.date, sp.close_price, sp.volume
+    query = f"""
+    SELECT c.name, c.symbol, {date_sql('s.latest_date')} AS date,
+           s.latest_close AS close_price, s.latest_volume AS volume
     FROM companies c
-    JOIN stock_prices sp ON c.symbol = sp.symbol
-    WHERE sp.date = (
-        SELECT MAX(date) FROM stock_prices sp2 WHERE sp2.symbol = c.symbol
-    )
-    ORDER BY sp.close_price DESC
+    JOIN symbol_stats s ON c.symbol = s.symbol
+    ORDER BY s.latest_close DESC
     """
     df = pd.read_sql_query(query, conn)
     conn.close()
@@ -37,11 +37,11 @@ def show_latest_prices():
 def show_stock_history(symbol='005930.KS', days=30):
     """특정 주식의 최근 가격 이력 조회"""
     conn = connect_db()
-    query = """
-    SELECT date, open_price, high_price, low_price, close_price, volume
+    query = f"""
+    SELECT {date_sql()} AS date, open_price, high_price, low_price, close_price, volume
     FROM stock_prices
     WHERE symbol = ?
-    ORDER BY date DESC
+    ORDER BY stock_prices.date DESC
     LIMIT ?
     """
     df = pd.read_sql_query(query, conn, params=[symbol, days])
@@ -53,19 +53,19 @@ def show_stock_history(symbol='005930.KS', days=30):
 def show_price_statistics():
     """주식 가격 통계 조회"""
     conn = connect_db()
-    query = """
+    query = f"""
     SELECT 
         c.name,
         c.symbol,
-        COUNT(sp.date) as data_count,
-        MIN(sp.close_price) as min_price,
-        MAX(sp.close_price) as max_price,
-        AVG(sp.close_price) as avg_price,
-        MIN(sp.date) as start_date,
-        MAX(sp.date) as end_date
+        s.row_count as data_count,
+        s.min_close as min_price,
+        s.max_close as max_price,
+        s.sum_close / s.close_count as avg_price,
+        {date_sql('s.first_date')} as start_date,
+        {date_sql('s.latest_date')} as end_date
     FROM companies c
-    JOIN stock_prices sp ON c.symbol = sp.symbol
-    GROUP BY c.symbol, c.name
+    JOIN symbol_stats s ON c.symbol = s.symbol
+    WHERE s.close_count > 0
     ORDER BY avg_price DESC
     """
     df = pd.read_sql_query(query, conn)
@@ -88,6 +88,26 @@ def custom_query(sql_query):
         print(f"쿼리 실행 오류: {e}")
         return None
 
+def export_stock_prices(path, fmt='csv', symbols=None, start_date=None, end_date=None, chunk_size=EXPORT_CHUNK_ROWS):
+    """주가 이력을 파일로 스트리밍 내보내기 (fmt: csv / ndjson / arrow)
+    
+    custom_query("SELECT * FROM stock_prices")와 달리 DataFrame으로 모으지 않고
+    chunk_size 행씩 읽어 바로 파일에 쓰므로 행 수와 무관하게 메모리 사용량이 일정합니다.
+    """
+    conn = connect_db()
+    try:
+        chunks = iter_stock_price_chunks(conn, symbols, start_date, end_date, chunk_size)
+        with open(path, 'wb') as f:
+            for data in stream_export(chunks, fmt):
+                f.write(data)
+        print(f"\n=== {path}로 내보내기 완료 ({fmt}) ===")
+        return path
+    except Exception as e:
+        print(f"내보내기 오류: {e}")
+        return None
+    finally:
+        conn.close()
+
 if __name__ == "__main__":
     print("📊 주식 데이터베이스 조회 도구")
     print("=" * 50)
@@ -111,6 +131,7 @@ if __name__ == "__main__":
     print("- show_stock_history(symbol, days): 특정 주식 이력")
     print("- show_price_statistics(): 주식 가격 통계")
     print("- custom_query(sql): 사용자 정의 쿼리")
+    print("- export_stock_prices(path, fmt, symbols, start_date, end_date): 가격 이력 파일 내보내기")
     print("\n예시:")
     print("python db_query.py")
     print("또는 Python에서 import해서 사용하세요!") 
\ No newline at end of file
@@ -0,0 +1,97 @@
+import numpy as np
+
+# 차트 해상도 (일봉 / 주봉 / 월봉)
+RESOLUTIONS = ('day', 'week', 'month')
+
+
+def _bucket_keys(days, resolution):
+    """일수(1970-01-01 기준) 배열을 해상도별 버킷 번호로 변환"""
+    days = np.asarray(days, dtype=np.int64)
+    if resolution == 'week':
+        # 1970-01-01은 목요일이므로 3일을 더해 월요일 시작 주로 맞춤
+        return (days + 3) // 7
+    if resolution == 'month':
+        return days.astype('datetime64[D]').astype('datetime64[M]').astype(np.int64)
+    return days
+
+
+def bucket_ohlc(arrays, resolution):
+    """OHLCV 배열을 주/월 단위로 집계 (시가=첫 값, 고가=최대, 저가=최소, 종가=마지막 값, 거래량=합계)
+    
+    arrays는 get_price_arrays 형식의 날짜 오름차순 컬럼 딕셔너리이며, 각 버킷의 date는 첫 거래일입니다.
+    """
+    if resolution not in RESOLUTIONS:
+        raise ValueError(f"Unknown resolution: {resolution}")
+    if resolution == 'day' or len(arrays['date']) == 0:
+        return arrays
+    
+    keys = _bucket_keys(arrays['date'], resolution)
+    starts = np.flatnonzero(np.r_[True, keys[1:] != keys[:-1]])
+    ends = np.r_[starts[1:], len(keys)] - 1
+    return {
+        'date': np.asarray(arrays['date'])[starts],
+        'open': np.asarray(arrays['open'])[starts],
+        'high': np.maximum.reduceat(arrays['high'], starts),
+        'low': np.minimum.reduceat(arrays['low'], starts),
+        'close': np.asarray(arrays['close'])[ends],
+        'volume': np.add.reduceat(arrays['volume'], starts)
+    }
+
+
+def lttb_indices(x, y, max_points):
+    """Largest-Triangle-Three-Buckets로 선택한 점의 인덱스 배열 반환
+    
+    첫 점과 마지막 점은 항상 포함하며, 가운데 버킷마다 직전 선택점과 다음 버킷 평균점으로
+    이루는 삼각형 넓이가 가장 큰 점을 고릅니다. 버킷 안 계산은 NumPy로 벡터화되어 있습니다.
+    """
+    n = len(y)
+    if max_points is None or max_points >= n or n <= 2:
+        return np.arange(n)
+    if max_points < 3:
+        return np.array([0, n - 1])
+    
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    
+    # 가운데 n-2개 점을 max_points-2개 버킷으로 분할한 경계
+    edges = (np.arange(max_points - 1) * (n - 2) / (max_points - 2)).astype(np.int64) + 1
+    edges[-1] = n - 1
+    
+    # 다음 버킷 평균점은 선택 결과와 무관하므로 누적합으로 한 번에 계산
+    x_sum = np.r_[0.0, np.cumsum(x)]
+    y_sum = np.r_[0.0, np.cumsum(y)]
+    next_starts = np.r_[edges[1:], n - 1]
+    next_ends = np.r_[edges[2:], n, n]
+    counts = next_ends - next_starts
+    avg_x = (x_sum[next_ends] - x_sum[next_starts]) / counts
+    avg_y = (y_sum[next_ends] - y_sum[next_starts]) / counts
+    
+    selected = np.empty(max_points, dtype=np.int64)
+    selected[0] = 0
+    selected[-1] = n - 1
+    a = 0
+    for i in range(max_points - 2):
+        start, end = edges[i], edges[i + 1]
+        bx = x[start:end]
+        by = y[start:end]
+        # 삼각형 넓이의 2배 (상수배는 비교에 영향 없음)
+        area = np.abs((x[a] - avg_x[i]) * (by - y[a]) - (x[a] - bx) * (avg_y[i] - y[a]))
+        a = start + int(np.argmax(area))
+        selected[i + 1] = a
+    return selected
+
+
+def downsample(arrays, max_points=None, resolution='day'):
+    """차트용 OHLCV 다운샘플링 (해상도 집계 후 종가 선에 LTTB 적용)
+    
+    LTTB로 남긴 점의 거래량은 다음 선택점 전까지의 거래량 합계이므로 전체 합계가 보존됩니다.
+    """
+    arrays = bucket_ohlc(arrays, resolution)
+    n = len(arrays['date'])
+    if not max_points or max_points >= n:
+        return arrays
+    
+    indices = lttb_indices(arrays['date'], arrays['close'], max_points)
+    sampled = {name: np.asarray(values)[indices] for name, values in arrays.items()}
+    sampled['volume'] = np.add.reduceat(arrays['volume'], indices)
+    return sampled
@@ -0,0 +1,78 @@
+import io
+import csv
+import json
+from database import EXPORT_COLUMNS
+
+try:
+    import pyarrow as pa
+except ImportError:
+    # Arrow IPC 내보내기는 pyarrow가 설치된 경우에만 사용 가능
+    pa = None
+
+# 형식별 MIME 타입과 파일 확장자
+EXPORT_FORMATS = {
+    'ndjson': ('application/x-ndjson', 'ndjson'),
+    'csv': ('text/csv; charset=utf-8', 'csv'),
+    'arrow': ('application/vnd.apache.arrow.stream', 'arrows')
+}
+
+
+def _ndjson(chunks):
+    for rows in chunks:
+        yield ''.join(
+            json.dumps(dict(zip(EXPORT_COLUMNS, row)), ensure_ascii=False) + '\n' for row in rows
+        ).encode('utf-8')
+
+
+def _csv(chunks):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, lineterminator='\n')
+    writer.writerow(EXPORT_COLUMNS)
+    for rows in chunks:
+        writer.writerows(rows)
+        yield buffer.getvalue().encode('utf-8')
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue().encode('utf-8')
+
+
+def _arrow(chunks):
+    schema = pa.schema([
+        ('symbol', pa.string()),
+        ('date', pa.string()),
+        ('open_price', pa.float64()),
+        ('high_price', pa.float64()),
+        ('low_price', pa.float64()),
+        ('close_price', pa.float64()),
+        ('volume', pa.int64())
+    ])
+    sink = io.BytesIO()
+    # 청크마다 레코드 배치 하나를 쓰고 버퍼를 비워 그대로 내보냄
+    with pa.ipc.new_stream(sink, schema) as writer:
+        for rows in chunks:
+            columns = list(zip(*rows))
+            writer.write_batch(pa.record_batch(
+                [pa.array(column, type=field.type) for column, field in zip(columns, schema)],
+                schema=schema
+            ))
+            yield sink.getvalue()
+            sink.seek(0)
+            sink.truncate()
+    yield sink.getvalue()
+
+
+def stream_export(chunks, fmt):
+    """iter_stock_price_chunks 청크를 지정한 형식의 bytes 조각으로 변환하는 제너레이터
+    
+    한 번에 한 청크만 인코딩하므로 내보내는 행 수와 무관하게 메모리 사용량이 일정합니다.
+    """
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f"Unknown export format: {fmt}")
+    if fmt == 'arrow':
+        if pa is None:
+            raise ValueError("Arrow export requires pyarrow (pip install pyarrow)")
+        return _arrow(chunks)
+    if fmt == 'csv':
+        return _csv(chunks)
+    return _ndjson(chunks)
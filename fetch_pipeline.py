@@ -0,0 +1,196 @@
+import os
+import random
+import threading
+import time
+import logging
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+logger = logging.getLogger(__name__)
+
+# 업스트림별 기본 호출 한도: 초당 요청 수(rate), 순간 허용량(burst), 동시 요청 수(max_in_flight)
+# 환경 변수 STOCK_RATE_LIMITS="fdr_krx=2:4,pykrx=1:2" 형식(rate:max_in_flight)으로 덮어쓸 수 있습니다.
+UPSTREAM_LIMITS = {
+    'fdr_krx': {'rate': 2.0, 'burst': 2, 'max_in_flight': 4},
+    'fdr_naver': {'rate': 2.0, 'burst': 2, 'max_in_flight': 4},
+    'fdr': {'rate': 2.0, 'burst': 2, 'max_in_flight': 4},
+    'pykrx': {'rate': 1.0, 'burst': 1, 'max_in_flight': 2},
+    # 로컬 재생 소스 (replay.py) - 벤치마크에서 수집 경로 자체의 처리량을 재도록 사실상 제한 없음
+    'replay': {'rate': 10000.0, 'burst': 10000, 'max_in_flight': 64},
+}
+
+
+class RateLimiter:
+    """토큰 버킷 기반 호출 제한기 (초당 요청 수 + 동시 요청 수 제한)"""
+    
+    def __init__(self, name, rate, burst=1, max_in_flight=1):
+        self.name = name
+        self.rate = float(rate)
+        self.burst = max(1, int(burst))
+        self.max_in_flight = max(1, int(max_in_flight))
+        self._tokens = float(self.burst)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+        self._in_flight = threading.BoundedSemaphore(self.max_in_flight)
+    
+    def _take_token(self):
+        """토큰을 하나 가져오고, 부족하면 다음 토큰까지 남은 시간을 반환"""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return 0.0
+            return (1 - self._tokens) / self.rate
+    
+    def acquire(self):
+        """동시 요청 슬롯과 토큰을 얻을 때까지 대기"""
+        self._in_flight.acquire()
+        while True:
+            wait = self._take_token()
+            if wait <= 0:
+                return
+            time.sleep(wait)
+    
+    def release(self):
+        self._in_flight.release()
+    
+    def __enter__(self):
+        self.acquire()
+        return self
+    
+    def __exit__(self, exc_type, exc, tb):
+        self.release()
+        return False
+
+
+_limiters = {}
+_limiters_lock = threading.Lock()
+
+
+def _env_overrides():
+    """STOCK_RATE_LIMITS 환경 변수 파싱"""
+    overrides = {}
+    for item in os.environ.get('STOCK_RATE_LIMITS', '').split(','):
+        if '=' not in item:
+            continue
+        name, value = item.split('=', 1)
+        rate, _, in_flight = value.partition(':')
+        try:
+            overrides[name.strip()] = {
+                'rate': float(rate),
+                'burst': max(1, int(float(rate))),
+                'max_in_flight': int(in_flight) if in_flight else None,
+            }
+        except ValueError:
+            logger.warning(f"Invalid STOCK_RATE_LIMITS entry ignored: {item}")
+    return overrides
+
+
+def get_limiter(name):
+    """업스트림 이름별 프로세스 공용 RateLimiter 반환"""
+    with _limiters_lock:
+        limiter = _limiters.get(name)
+        if limiter is None:
+            config = dict(UPSTREAM_LIMITS.get(name, {'rate': 1.0, 'burst': 1, 'max_in_flight': 1}))
+            override = _env_overrides().get(name, {})
+            config.update({k: v for k, v in override.items() if v is not None})
+            limiter = RateLimiter(name, **config)
+            _limiters[name] = limiter
+        return limiter
+
+
+def configure_limiter(name, rate=None, burst=None, max_in_flight=None):
+    """업스트림 호출 한도 변경 (이후 get_limiter 호출부터 적용)"""
+    with _limiters_lock:
+        config = dict(UPSTREAM_LIMITS.get(name, {'rate': 1.0, 'burst': 1, 'max_in_flight': 1}))
+        if rate is not None:
+            config['rate'] = rate
+        if burst is not None:
+            config['burst'] = burst
+        if max_in_flight is not None:
+            config['max_in_flight'] = max_in_flight
+        UPSTREAM_LIMITS[name] = config
+        _limiters.pop(name, None)
+
+
+def call_with_retry(func, *args, retries=3, backoff=1.0, max_backoff=30.0, description=None, **kwargs):
+    """지수 백오프(지터 포함)로 재시도하며 func 호출
+    
+    retries는 첫 호출 이후의 재시도 횟수이며, 마지막 예외는 그대로 전달됩니다.
+    """
+    attempt = 0
+    while True:
+        try:
+            return func(*args, **kwargs)
+        except Exception as e:
+            if attempt >= retries:
+                raise
+            delay = min(max_backoff, backoff * (2 ** attempt)) * (0.5 + random.random() / 2)
+            attempt += 1
+            logger.warning(
+                f"{description or getattr(func, '__name__', 'call')} failed ({e}); "
+                f"retry {attempt}/{retries} in {delay:.1f}s"
+            )
+            time.sleep(delay)
+
+
+def run_pipeline(items, worker, max_workers=4, progress_callback=None):
+    """items의 각 항목에 worker를 병렬 실행하고 결과 리스트를 완료 순서대로 반환
+    
+    동시성은 max_workers로, 업스트림 호출 속도는 worker 내부의 RateLimiter로 제한합니다.
+    progress_callback(done, total, item, result)은 항목이 끝날 때마다 호출됩니다.
+    """
+    items = list(items)
+    total = len(items)
+    results = []
+    
+    if total == 0:
+        return results
+    
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers, total))) as executor:
+        futures = {executor.submit(worker, item): item for item in items}
+        for done, future in enumerate(as_completed(futures), 1):
+            item = futures[future]
+            try:
+                result = future.result()
+            except Exception as e:
+                logger.error(f"Pipeline worker failed for {item}: {e}")
+                result = {'item': item, 'success': False, 'error': str(e)}
+            results.append(result)
+            if progress_callback:
+                try:
+                    progress_callback(done, total, item, result)
+                except Exception as e:
+                    logger.error(f"Progress callback failed: {e}")
+    
+    return results
+
+
+def run_in_batches(items, worker, batch_size, max_workers=4, progress_callback=None, batch_callback=None):
+    """items를 batch_size개씩 나눠 run_pipeline으로 차례로 처리하고 전체 결과 리스트를 반환
+    
+    batch_callback(results)은 배치가 끝날 때마다 호출되어 전체 실행이 끝나기 전에 결과를 반영할 수 있고,
+    progress_callback의 done/total은 배치를 합친 누적 값입니다.
+    """
+    items = list(items)
+    total = len(items)
+    results = []
+    
+    for offset in range(0, total, batch_size):
+        def report(done, batch_total, item, result, offset=offset):
+            if progress_callback:
+                progress_callback(offset + done, total, item, result)
+        
+        batch_results = run_pipeline(
+            items[offset:offset + batch_size], worker,
+            max_workers=max_workers, progress_callback=report
+        )
+        results.extend(batch_results)
+        if batch_callback:
+            try:
+                batch_callback(batch_results)
+            except Exception as e:
+                logger.error(f"Batch callback failed: {e}")
+    
+    return results
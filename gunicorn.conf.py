@@ -0,0 +1,45 @@
+import os
+import time
+
+# gunicorn 설정 (gunicorn -c gunicorn.conf.py wsgi:app)
+#
+# 마스터 프로세스가 on_starting에서 스키마 마이그레이션, 앱 import, 캐시 예열을 한 번만 수행하고
+# 작업자는 이를 fork로 물려받습니다. 작업자는 다시 import하거나 스키마를 확인하지 않으므로
+# 재시작(max_requests, 장애 복구) 시에도 바로 요청을 받습니다.
+
+bind = f"0.0.0.0:{os.environ.get('PORT', 5000)}"
+workers = int(os.environ.get('WEB_CONCURRENCY', 2))
+# /api/stream/quotes(SSE) 연결은 끝날 때까지 스레드를 하나씩 점유하므로 스레드 작업자(gthread)를 사용
+# (연결이 수백 개면 GUNICORN_WORKER_CLASS=gevent, gevent 설치 필요)
+worker_class = os.environ.get('GUNICORN_WORKER_CLASS', 'gthread')
+threads = int(os.environ.get('GUNICORN_THREADS', 8))
+# 작업자당 동시 스트림 수: gthread는 일반 요청용 스레드를 절반 남겨 둠
+os.environ.setdefault('STOCK_STREAM_MAX_CLIENTS', str(1000 if worker_class == 'gevent' else max(1, threads // 2)))
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', 120))
+# 메모리 누수 대비 작업자 주기적 교체 (fork만 하므로 비용이 작음)
+max_requests = int(os.environ.get('GUNICORN_MAX_REQUESTS', 1000))
+max_requests_jitter = 100
+
+
+def on_starting(server):
+    """작업자 fork 전 마스터에서 한 번: 지표 파일 정리, 스키마 마이그레이션, 앱 import와 예열"""
+    start_time = time.time()
+    
+    import metrics
+    # 이전 실행의 프로세스별 지표 파일 정리
+    metrics.registry.clear()
+    
+    from database import StockDatabase
+    StockDatabase().close()
+    os.environ['STOCK_SCHEMA_READY'] = '1'
+    
+    # 작업자가 wsgi:app을 로드할 때 이미 import된 모듈을 그대로 사용
+    import app
+    app.warm_up()
+    server.log.info(f"Master ready in {time.time() - start_time:.2f} seconds (schema, import, warm-up)")
+
+
+def child_exit(server, worker):
+    """작업자 종료 후 마스터에서: 지표를 보관 파일에 합치고 작업자 파일 삭제 (max_requests 교체로 파일이 쌓이지 않도록)"""
+    import metrics
+    metrics.registry.retire(worker.pid)
@@ -0,0 +1,75 @@
+import os
+import hashlib
+from datetime import datetime, timezone
+from functools import wraps
+from flask import request, make_response
+
+# 프록시/브라우저 캐시 유지 시간 (초). 만료 후에는 ETag로 재검증하여 304를 받습니다.
+HTTP_MAX_AGE = int(os.environ.get('STOCK_HTTP_MAX_AGE', 60))
+
+
+def _source_build():
+    """앱 소스(.py) 내용의 해시와 가장 최근 수정 시각"""
+    directory = os.path.dirname(os.path.abspath(__file__))
+    digest = hashlib.sha1()
+    modified = 0
+    for name in sorted(os.listdir(directory)):
+        if name.endswith('.py'):
+            path = os.path.join(directory, name)
+            with open(path, 'rb') as f:
+                digest.update(f.read())
+            modified = max(modified, os.path.getmtime(path))
+    return digest.hexdigest()[:12], modified
+
+
+# 배포 빌드 식별자: 응답 형식이 바뀐 배포 후에는 데이터 버전이 같아도 이전 ETag/Last-Modified로 304가 나가지 않도록
+# 검증자에 포함 (STOCK_APP_BUILD가 없으면 소스 해시, 작업자끼리 같은 값)
+_SOURCE_BUILD, BUILD_TIME = _source_build()
+APP_BUILD = os.environ.get('STOCK_APP_BUILD') or _SOURCE_BUILD
+
+
+def _cache_headers(response, etag, last_modified):
+    response.set_etag(etag, weak=True)
+    if last_modified is not None:
+        response.last_modified = last_modified
+    response.cache_control.public = True
+    response.cache_control.max_age = HTTP_MAX_AGE
+    response.cache_control.must_revalidate = True
+    return response
+
+
+def conditional_get(version_for):
+    """데이터 버전 기반 조건부 GET 데코레이터 (ETag / Last-Modified)
+    
+    version_for(**view_args)는 (version, updated_at) 튜플을 반환해야 하며,
+    If-None-Match 또는 If-Modified-Since가 일치하면 뷰를 실행하지 않고 304를 반환합니다.
+    ETag에는 APP_BUILD를, Last-Modified에는 BUILD_TIME을 반영하므로 배포하면 캐시가 무효화됩니다.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            version, updated_at = version_for(*args, **kwargs)
+            etag = f"v{version}-{APP_BUILD}"
+            last_modified = (
+                datetime.fromtimestamp(int(max(updated_at, BUILD_TIME)), tz=timezone.utc) if updated_at else None
+            )
+            
+            # If-None-Match가 있으면 If-Modified-Since보다 우선 (RFC 9110)
+            if request.if_none_match:
+                not_modified = request.if_none_match.contains_weak(etag)
+            else:
+                not_modified = (
+                    last_modified is not None
+                    and request.if_modified_since is not None
+                    and last_modified <= request.if_modified_since
+                )
+            
+            if not_modified:
+                return _cache_headers(make_response('', 304), etag, last_modified)
+            
+            response = make_response(view(*args, **kwargs))
+            if response.status_code == 200:
+                _cache_headers(response, etag, last_modified)
+            return response
+        return wrapper
+    return decorator
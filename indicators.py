@@ -0,0 +1,184 @@
+import math
+import logging
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# 저장/제공하는 지표 (stock_indicators 테이블 컬럼 순서)
+SMA_WINDOWS = (5, 20, 60, 120)
+EMA_SPANS = (12, 26)
+RSI_PERIOD = 14
+MACD_SIGNAL_SPAN = 9
+BOLLINGER_WINDOW = 20
+BOLLINGER_WIDTH = 2.0
+
+INDICATOR_NAMES = (
+    tuple(f'sma{n}' for n in SMA_WINDOWS)
+    + tuple(f'ema{n}' for n in EMA_SPANS)
+    + (f'rsi{RSI_PERIOD}', 'macd', 'macd_signal', 'macd_hist', 'bb_upper', 'bb_lower')
+)
+
+# 증분 계산 시 이어 붙이는 직전 종가 개수 (가장 긴 이동 창)
+TAIL_SIZE = max(SMA_WINDOWS + (BOLLINGER_WINDOW,))
+
+
+def rolling_mean(values, window):
+    """단순 이동평균 (창이 다 차기 전은 NaN)"""
+    values = np.asarray(values, dtype=np.float64)
+    out = np.full(len(values), np.nan)
+    if len(values) >= window:
+        sums = np.cumsum(np.r_[0.0, values])
+        out[window - 1:] = (sums[window:] - sums[:-window]) / window
+    return out
+
+
+def rolling_std(values, window):
+    """이동 표준편차 (모표준편차, 창이 다 차기 전은 NaN)"""
+    values = np.asarray(values, dtype=np.float64)
+    out = np.full(len(values), np.nan)
+    if len(values) >= window:
+        out[window - 1:] = np.lib.stride_tricks.sliding_window_view(values, window).std(axis=1)
+    return out
+
+
+def ewm(values, alpha, initial=None):
+    """지수 가중 평균 y[t] = (1 - alpha) * y[t-1] + alpha * x[t]
+    
+    initial이 없으면 첫 값에서 시작합니다. 점화식을 닫힌 식(누적합)으로 풀어 블록 단위로 벡터화하며,
+    블록 길이는 (1 - alpha)^-k가 float64 범위를 넘지 않도록 정합니다.
+    """
+    values = np.asarray(values, dtype=np.float64)
+    out = np.empty(len(values))
+    if len(values) == 0:
+        return out
+    
+    beta = 1.0 - alpha
+    previous = values[0] if initial is None else initial
+    block = max(1, int(100 / -math.log10(beta)))
+    for start in range(0, len(values), block):
+        segment = values[start:start + block]
+        powers = beta ** np.arange(len(segment))
+        out[start:start + len(segment)] = (
+            beta * powers * previous + alpha * powers * np.cumsum(segment / powers)
+        )
+        previous = out[start + len(segment) - 1]
+    return out
+
+
+def _rsi_from_averages(avg_gain, avg_loss):
+    with np.errstate(divide='ignore', invalid='ignore'):
+        rsi = 100.0 - 100.0 / (1.0 + avg_gain / avg_loss)
+    # 하락이 없으면 100, 변동이 없으면 50
+    rsi = np.where(avg_loss == 0, np.where(avg_gain == 0, 50.0, 100.0), rsi)
+    return np.where(np.isnan(avg_gain) | np.isnan(avg_loss), np.nan, rsi)
+
+
+def compute_indicators(closes, state=None):
+    """종가 배열의 지표를 계산하고 다음 증분 계산에 쓸 상태를 함께 반환
+    
+    state가 있으면 closes는 state 이후에 추가된 종가이며, 이동평균은 저장된 직전 종가(tail)를
+    앞에 이어 계산하고 EMA/RSI/MACD는 저장된 값에서 이어 계산합니다.
+    비용은 전체 이력이 아니라 새 종가 수에 비례합니다.
+    반환값은 ({지표명: closes와 같은 길이의 배열}, state)입니다.
+    """
+    closes = np.asarray(closes, dtype=np.float64)
+    tail = np.asarray(state['tail_closes'] if state else [], dtype=np.float64)
+    extended = np.r_[tail, closes]
+    offset = len(tail)
+    values = {}
+    
+    for window in SMA_WINDOWS:
+        values[f'sma{window}'] = rolling_mean(extended, window)[offset:]
+    
+    emas = {}
+    for span in EMA_SPANS:
+        emas[span] = ewm(closes, 2.0 / (span + 1), state[f'ema{span}'] if state else None)
+        values[f'ema{span}'] = emas[span]
+    
+    macd = emas[12] - emas[26]
+    signal = ewm(macd, 2.0 / (MACD_SIGNAL_SPAN + 1), state['macd_signal'] if state else None)
+    values['macd'] = macd
+    values['macd_signal'] = signal
+    values['macd_hist'] = macd - signal
+    
+    middle = rolling_mean(extended, BOLLINGER_WINDOW)[offset:]
+    width = BOLLINGER_WIDTH * rolling_std(extended, BOLLINGER_WINDOW)[offset:]
+    values['bb_upper'] = middle + width
+    values['bb_lower'] = middle - width
+    
+    # RSI (Wilder): 첫 평균은 RSI_PERIOD개 변동의 단순평균, 이후 alpha = 1/RSI_PERIOD 평활
+    alpha = 1.0 / RSI_PERIOD
+    avg_gain = np.full(len(closes), np.nan)
+    avg_loss = np.full(len(closes), np.nan)
+    if state:
+        deltas = np.diff(np.r_[state['last_close'], closes])
+        avg_gain[:] = ewm(np.clip(deltas, 0, None), alpha, state['rsi_gain'])
+        avg_loss[:] = ewm(np.clip(-deltas, 0, None), alpha, state['rsi_loss'])
+    elif len(closes) > RSI_PERIOD:
+        deltas = np.diff(closes)
+        gains = np.clip(deltas, 0, None)
+        losses = np.clip(-deltas, 0, None)
+        seed_gain = gains[:RSI_PERIOD].mean()
+        seed_loss = losses[:RSI_PERIOD].mean()
+        avg_gain[RSI_PERIOD] = seed_gain
+        avg_loss[RSI_PERIOD] = seed_loss
+        avg_gain[RSI_PERIOD + 1:] = ewm(gains[RSI_PERIOD:], alpha, seed_gain)
+        avg_loss[RSI_PERIOD + 1:] = ewm(losses[RSI_PERIOD:], alpha, seed_loss)
+    values[f'rsi{RSI_PERIOD}'] = _rsi_from_averages(avg_gain, avg_loss)
+    
+    new_state = None
+    if len(closes) and not np.isnan(avg_gain[-1]):
+        new_state = {
+            'tail_closes': extended[-TAIL_SIZE:].tolist(),
+            'last_close': float(closes[-1]),
+            'ema12': float(emas[12][-1]),
+            'ema26': float(emas[26][-1]),
+            'macd_signal': float(signal[-1]),
+            'rsi_gain': float(avg_gain[-1]),
+            'rsi_loss': float(avg_loss[-1])
+        }
+    return values, new_state
+
+
+def update_indicators(db, symbols=None):
+    """종목별 지표를 저장된 상태에서 이어 계산해 stock_indicators에 기록 (수집 경로에서 호출)
+    
+    상태가 있으면 상태의 직전 종가 TAIL_SIZE개와 이후에 추가된 봉만 읽고 계산하므로
+    하루치 수집 후 갱신 비용은 O(종목 수 + 새 봉 수)입니다.
+    상태가 없거나(첫 계산, RSI 초기화 전) 상태에 저장된 직전 종가가 현재 데이터와 다르면
+    (과거 봉 수정) 해당 종목만 전체 이력으로 다시 계산합니다.
+    갱신한 종목 수를 반환합니다.
+    """
+    states = db.get_indicator_states()
+    if symbols is None:
+        symbols = list(db.get_symbol_stats().keys())
+    
+    updates = []
+    for symbol in symbols:
+        last_date, state = states.get(symbol, (None, None))
+        start = 0
+        if state is not None:
+            tail_closes = np.asarray(state['tail_closes'])
+            history = db.get_closes(symbol, after=last_date, lookback=len(tail_closes))
+            if history is None:
+                continue
+            dates, closes = history
+            start = int(np.searchsorted(dates, last_date, side='right'))
+            if start == len(dates) and np.array_equal(closes, tail_closes, equal_nan=True):
+                continue
+            if start != len(tail_closes) or not np.array_equal(closes[:start], tail_closes, equal_nan=True):
+                state = None
+                start = 0
+        if state is None:
+            history = db.get_closes(symbol)
+            if history is None:
+                continue
+            dates, closes = history
+        
+        values, new_state = compute_indicators(closes[start:], state)
+        updates.append((symbol, dates[start:], values, new_state, state is None))
+    
+    if updates:
+        db.save_indicators(updates)
+        logger.info(f"지표 갱신: {len(updates)}개 종목")
+    return len(updates)
@@ -0,0 +1,113 @@
+import threading
+import time
+import uuid
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+logger = logging.getLogger(__name__)
+
+
+class IngestionJobManager:
+    """주식 데이터 수집을 백그라운드 작업으로 실행하고 진행 상황을 기록
+    
+    작업 상태는 StockDatabase의 ingestion_jobs 테이블에 저장되므로 어느 gunicorn 워커에서도
+    조회할 수 있고, 실행 중인 작업이 있으면 새 작업을 만들지 않고 기존 작업을 돌려줍니다.
+    """
+    
+    # 종목별 결과 저장 최소 간격 (초)
+    RESULTS_FLUSH_INTERVAL = 1.0
+    # 진행 상황과 별개로 heartbeat를 기록하는 간격 (초)
+    # 한 종목이 재시도/백오프로 stale_seconds보다 오래 걸려도 다른 워커가 작업을 버려진 것으로 보지 않도록 함
+    HEARTBEAT_INTERVAL = 30.0
+    
+    def __init__(self, stock_api, stale_seconds=600):
+        self.stock_api = stock_api
+        self.db = stock_api.db
+        self.stale_seconds = stale_seconds
+        # 프로세스 내 수집은 항상 한 번에 하나만 실행
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='ingestion')
+        self._lock = threading.Lock()
+    
+    def submit(self, **options):
+        """수집 작업 등록 후 (job_id, created) 반환"""
+        with self._lock:
+            job_id, created = self.db.create_ingestion_job(
+                uuid.uuid4().hex, options=options, stale_seconds=self.stale_seconds
+            )
+            if job_id is None:
+                raise RuntimeError('Failed to register ingestion job')
+            if created:
+                self._executor.submit(self._run, job_id, options)
+                logger.info(f"Ingestion job {job_id} queued")
+            else:
+                logger.info(f"Ingestion job {job_id} already in progress; reusing it")
+            return job_id, created
+    
+    def get(self, job_id):
+        """작업 상태 조회 (진행률, 종목별 결과, 소요 시간 포함)"""
+        job = self.db.get_ingestion_job(job_id)
+        if job is None:
+            return None
+        
+        end = job['finished_at'] or time.time()
+        job['elapsed'] = round(end - job['started_at'], 3) if job['started_at'] else 0
+        job['progress'] = round(job['done'] / job['total'] * 100, 1) if job['total'] else 0
+        return job
+    
+    def _run(self, job_id, options):
+        """백그라운드 스레드에서 수집 실행"""
+        started_at = time.time()
+        results = []
+        last_flush = [0.0]
+        self.db.update_ingestion_job(job_id, status='running', started_at=started_at)
+        stop_heartbeat = threading.Event()
+        heartbeat = threading.Thread(
+            target=self._heartbeat, args=(job_id, stop_heartbeat), name='ingestion-heartbeat', daemon=True
+        )
+        heartbeat.start()
+        
+        def progress(done, total, item, result):
+            results.append(result)
+            fields = {
+                'total': total,
+                'done': done,
+                'success_count': sum(1 for r in results if r.get('success'))
+            }
+            # 종목별 결과 JSON은 대규모 수집에서 매번 다시 쓰지 않도록 최대 초당 1회만 저장
+            now = time.time()
+            if now - last_flush[0] >= self.RESULTS_FLUSH_INTERVAL or done == total:
+                fields['results'] = results
+                last_flush[0] = now
+            self.db.update_ingestion_job(job_id, **fields)
+        
+        try:
+            success_count = self.stock_api.update_all_kospi_data(progress_callback=progress, **options)
+            self.db.update_ingestion_job(
+                job_id,
+                status='completed',
+                success_count=success_count,
+                results=results,
+                finished_at=time.time()
+            )
+            logger.info(f"Ingestion job {job_id} completed in {time.time() - started_at:.2f} seconds")
+        except Exception as e:
+            logger.error(f"Ingestion job {job_id} failed: {e}")
+            self.db.update_ingestion_job(
+                job_id,
+                status='failed',
+                error=str(e),
+                results=results,
+                finished_at=time.time()
+            )
+        finally:
+            stop_heartbeat.set()
+            heartbeat.join()
+    
+    def _heartbeat(self, job_id, stop):
+        """작업이 끝날 때까지 HEARTBEAT_INTERVAL마다 heartbeat 갱신 (종목별 진행과 무관)"""
+        try:
+            while not stop.wait(self.HEARTBEAT_INTERVAL):
+                self.db.update_ingestion_job(job_id)
+        finally:
+            # 이 스레드의 SQLite 연결 정리
+            self.db.close()
@@ -0,0 +1,454 @@
+import os
+import json
+import time
+import atexit
+import inspect
+import threading
+import logging
+from bisect import bisect_left
+from functools import wraps
+
+logger = logging.getLogger(__name__)
+
+# 프로세스별 지표 파일 디렉터리 (gunicorn 작업자들이 각자 기록하고 /api/metrics에서 합산)
+METRICS_DIR = os.environ.get('STOCK_METRICS_DIR', 'stock_metrics')
+# 프로세스별 지표를 파일로 내보내는 주기 (초)
+FLUSH_INTERVAL = float(os.environ.get('STOCK_METRICS_FLUSH_INTERVAL', 5))
+# 종료된 작업자의 카운터/히스토그램을 합쳐 두는 파일 (gunicorn 마스터의 child_exit에서 갱신)
+ARCHIVE_FILE = 'metrics_archive.json'
+
+# 지연 시간 히스토그램 구간 (초)
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(pairs):
+    pairs = list(pairs)
+    if not pairs:
+        return ''
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in pairs) + '}'
+
+
+def _format_value(value):
+    if value == float('inf'):
+        return '+Inf'
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class Metric:
+    """지표 공통 부분 (레이블 값 튜플별로 값을 보관)"""
+    
+    kind = None
+    
+    def __init__(self, registry, name, help, labelnames=()):
+        self.registry = registry
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+    
+    def _key(self, labels):
+        return tuple(str(labels.get(name, '')) for name in self.labelnames)
+    
+    def _values(self):
+        # registry._lock을 잡은 상태에서 호출
+        return self.registry._values_for(self)
+
+
+class Counter(Metric):
+    """단조 증가 카운터 (프로세스 간 합산)"""
+    
+    kind = 'counter'
+    
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self.registry._lock:
+            values = self._values()
+            values[key] = values.get(key, 0) + amount
+    
+    @staticmethod
+    def merge(current, value):
+        return (current or 0) + value
+    
+    def render(self, merged):
+        for key, value in sorted(merged.items()):
+            yield f'{self.name}{_format_labels(zip(self.labelnames, key))} {_format_value(value)}'
+
+
+class Gauge(Metric):
+    """현재 값 게이지 (프로세스 간에는 가장 최근에 기록된 값 사용)"""
+    
+    kind = 'gauge'
+    
+    def set(self, value, **labels):
+        key = self._key(labels)
+        with self.registry._lock:
+            self._values()[key] = [value, time.time()]
+    
+    @staticmethod
+    def merge(current, value):
+        return value if current is None or value[1] >= current[1] else current
+    
+    def render(self, merged):
+        for key, (value, _) in sorted(merged.items()):
+            yield f'{self.name}{_format_labels(zip(self.labelnames, key))} {_format_value(value)}'
+
+
+class Histogram(Metric):
+    """누적 구간 히스토그램 (프로세스 간 구간별 합산, p50/p99는 Prometheus histogram_quantile로 계산)"""
+    
+    kind = 'histogram'
+    
+    def __init__(self, registry, name, help, labelnames=(), buckets=LATENCY_BUCKETS):
+        super().__init__(registry, name, help, labelnames)
+        self.buckets = tuple(sorted(buckets))
+    
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        index = bisect_left(self.buckets, value)
+        with self.registry._lock:
+            values = self._values()
+            state = values.get(key)
+            if state is None:
+                # [구간별 개수 (마지막은 +Inf), 합계, 개수]
+                state = values[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            state[0][index] += 1
+            state[1] += value
+            state[2] += 1
+    
+    def time(self, **labels):
+        """with 블록 실행 시간을 기록하는 컨텍스트 매니저"""
+        return _Timer(self, labels)
+    
+    @staticmethod
+    def merge(current, value):
+        if current is None:
+            return [list(value[0]), value[1], value[2]]
+        return [[a + b for a, b in zip(current[0], value[0])], current[1] + value[1], current[2] + value[2]]
+    
+    def render(self, merged):
+        for key, (counts, total, count) in sorted(merged.items()):
+            pairs = list(zip(self.labelnames, key))
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float('inf'),), counts):
+                cumulative += bucket_count
+                yield f'{self.name}_bucket{_format_labels(pairs + [("le", _format_value(bound))])} {cumulative}'
+            yield f'{self.name}_sum{_format_labels(pairs)} {_format_value(total)}'
+            yield f'{self.name}_count{_format_labels(pairs)} {count}'
+
+
+class _Timer:
+    def __init__(self, histogram, labels):
+        self.histogram = histogram
+        self.labels = labels
+    
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+    
+    def __exit__(self, exc_type, exc, tb):
+        self.histogram.observe(time.perf_counter() - self.started, **self.labels)
+        return False
+
+
+class Registry:
+    """프로세스 지표 저장소
+    
+    값은 메모리에 누적하고 FLUSH_INTERVAL마다 METRICS_DIR/metrics_<pid>.json으로 내보냅니다.
+    render()는 디렉터리의 모든 프로세스 파일을 합산하므로 어느 작업자가 요청을 받아도
+    전체 작업자의 합계가 나옵니다. fork 이후 자식 프로세스는 부모의 값을 이어받지 않고 0부터 시작합니다.
+    종료된 작업자의 파일은 retire()로 보관 파일에 합치고 삭제하므로 파일 수는 살아 있는 프로세스 수로 유지됩니다.
+    """
+    
+    def __init__(self, directory=METRICS_DIR, flush_interval=FLUSH_INTERVAL):
+        self.directory = directory
+        self.flush_interval = flush_interval
+        self.metrics = {}
+        self._derived = []
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._values = {}
+        self._pid = None
+        self._dirty = False
+        atexit.register(self.flush)
+        # gunicorn 마스터의 flush 스레드가 잠금을 잡은 순간에 fork되어도 작업자가 멈추지 않도록
+        # 자식 프로세스에서 잠금을 새로 만듦
+        if hasattr(os, 'register_at_fork'):
+            os.register_at_fork(after_in_child=self._after_fork)
+    
+    def _after_fork(self):
+        """fork된 자식에서 실행: 잠금과 값을 새로 만들고 flush 스레드는 첫 기록 때 다시 시작"""
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._values = {}
+        self._pid = None
+        self._dirty = False
+    
+    def _add(self, metric):
+        self.metrics[metric.name] = metric
+        return metric
+    
+    def counter(self, name, help, labelnames=()):
+        return self._add(Counter(self, name, help, labelnames))
+    
+    def gauge(self, name, help, labelnames=()):
+        return self._add(Gauge(self, name, help, labelnames))
+    
+    def histogram(self, name, help, labelnames=(), buckets=LATENCY_BUCKETS):
+        return self._add(Histogram(self, name, help, labelnames, buckets))
+    
+    def derived(self, name, help, compute):
+        """합산된 지표로 계산하는 게이지 추가 (compute(merged) -> [(레이블 쌍 리스트, 값), ...])"""
+        self._derived.append((name, help, compute))
+    
+    def _values_for(self, metric):
+        """metric의 값 딕셔너리 (값을 바꾸기 직전에 _lock을 잡은 상태로 호출)"""
+        pid = os.getpid()
+        if pid != self._pid:
+            # 새 프로세스(또는 fork된 자식): 부모 값은 부모 파일에 있으므로 비우고 시작
+            self._values = {}
+            self._pid = pid
+            self._start_flusher()
+        self._dirty = True
+        return self._values.setdefault(metric.name, {})
+    
+    def _start_flusher(self):
+        def run():
+            while True:
+                time.sleep(self.flush_interval)
+                self.flush()
+        
+        threading.Thread(target=run, name='metrics-flush', daemon=True).start()
+    
+    def _path(self, pid):
+        return os.path.join(self.directory, f'metrics_{pid}.json')
+    
+    def flush(self):
+        """이 프로세스의 지표를 파일로 내보냄 (변경이 없으면 생략)"""
+        with self._flush_lock:
+            with self._lock:
+                if not self._dirty or self._pid != os.getpid():
+                    return
+                # 직렬화는 잠금 안에서 (히스토그램 리스트가 기록 중에 바뀌지 않도록)
+                payload = json.dumps({
+                    name: [[list(key), value] for key, value in values.items()]
+                    for name, values in self._values.items()
+                })
+                self._dirty = False
+            try:
+                os.makedirs(self.directory, exist_ok=True)
+                self._write(self._path(os.getpid()), payload)
+            except OSError as e:
+                logger.warning(f"Failed to write metrics file: {e}")
+    
+    def _write(self, path, payload):
+        with open(f"{path}.tmp", 'w') as f:
+            f.write(payload)
+        os.replace(f"{path}.tmp", path)
+    
+    @staticmethod
+    def _read(path):
+        """지표 파일 내용 {지표명: [[레이블 리스트, 값], ...]}"""
+        with open(path) as f:
+            return json.load(f)
+    
+    def retire(self, pid):
+        """종료된 프로세스 pid의 카운터/히스토그램을 보관 파일에 합치고 프로세스 파일을 삭제
+        
+        게이지는 종료된 프로세스의 현재 값이므로 버립니다. 보관 파일은 gunicorn 마스터(child_exit)만 쓰며,
+        프로세스 파일을 지우므로 같은 pid를 다시 받은 작업자가 이전 값을 덮어쓰지 않습니다.
+        """
+        path = self._path(pid)
+        try:
+            data = self._read(path)
+        except FileNotFoundError:
+            return
+        except (OSError, ValueError) as e:
+            logger.warning(f"Discarding unreadable metrics file of process {pid}: {e}")
+            data = {}
+        
+        archive_path = os.path.join(self.directory, ARCHIVE_FILE)
+        try:
+            archive = self._read(archive_path)
+        except (OSError, ValueError):
+            archive = {}
+        merged = {name: {tuple(key): value for key, value in samples} for name, samples in archive.items()}
+        for metric_name, samples in data.items():
+            metric = self.metrics.get(metric_name)
+            if metric is None or metric.kind == 'gauge':
+                continue
+            values = merged.setdefault(metric_name, {})
+            for key, value in samples:
+                key = tuple(key)
+                values[key] = metric.merge(values.get(key), value)
+        
+        try:
+            self._write(archive_path, json.dumps({
+                name: [[list(key), value] for key, value in values.items()]
+                for name, values in merged.items()
+            }))
+            os.remove(path)
+        except OSError as e:
+            logger.warning(f"Failed to archive metrics of process {pid}: {e}")
+    
+    def clear(self):
+        """지표 파일을 모두 삭제 (배포/서버 시작 시 이전 프로세스의 파일 정리)"""
+        try:
+            names = os.listdir(self.directory)
+        except FileNotFoundError:
+            return
+        for name in names:
+            if name.startswith('metrics_'):
+                try:
+                    os.remove(os.path.join(self.directory, name))
+                except OSError:
+                    pass
+    
+    def collect(self):
+        """모든 프로세스 파일을 합산한 {지표명: {레이블 튜플: 값}}"""
+        self.flush()
+        merged = {name: {} for name in self.metrics}
+        try:
+            names = [name for name in os.listdir(self.directory) if name.endswith('.json')]
+        except FileNotFoundError:
+            names = []
+        
+        for name in names:
+            try:
+                data = self._read(os.path.join(self.directory, name))
+            except (OSError, ValueError) as e:
+                logger.debug(f"Skipping metrics file {name}: {e}")
+                continue
+            for metric_name, samples in data.items():
+                metric = self.metrics.get(metric_name)
+                if metric is None:
+                    continue
+                values = merged[metric_name]
+                for key, value in samples:
+                    key = tuple(key)
+                    values[key] = metric.merge(values.get(key), value)
+        return merged
+    
+    def render(self):
+        """Prometheus 텍스트 형식 (0.0.4)"""
+        merged = self.collect()
+        lines = []
+        for name, metric in self.metrics.items():
+            lines.append(f'# HELP {name} {metric.help}')
+            lines.append(f'# TYPE {name} {metric.kind}')
+            lines.extend(metric.render(merged[name]))
+        for name, help, compute in self._derived:
+            lines.append(f'# HELP {name} {help}')
+            lines.append(f'# TYPE {name} gauge')
+            for pairs, value in compute(merged):
+                lines.append(f'{name}{_format_labels(pairs)} {_format_value(value)}')
+        return '\n'.join(lines) + '\n'
+
+
+registry = Registry()
+
+HTTP_REQUEST_SECONDS = registry.histogram(
+    'stock_http_request_duration_seconds', 'API 요청 처리 시간', ('route', 'method', 'status')
+)
+DB_QUERY_SECONDS = registry.histogram(
+    'stock_db_query_duration_seconds', 'StockDatabase 메서드 실행 시간', ('method',)
+)
+UPSTREAM_SECONDS = registry.histogram(
+    'stock_upstream_request_duration_seconds', '업스트림 시세 소스 호출 시간 (호출 한도 대기 포함)', ('source', 'outcome')
+)
+UPSTREAM_ERRORS = registry.counter(
+    'stock_upstream_errors_total', '업스트림 시세 소스 호출 실패 수', ('source',)
+)
+INGEST_ROWS = registry.counter('stock_ingest_rows_total', '수집해 저장한 시세 행 수')
+INGEST_SYMBOLS = registry.counter('stock_ingest_symbols_total', '수집 처리한 종목 수', ('result',))
+INGEST_SECONDS = registry.histogram(
+    'stock_ingest_run_duration_seconds', '수집 실행 한 번의 소요 시간',
+    buckets=(1, 5, 10, 30, 60, 120, 300, 600, 1800, 3600)
+)
+INGEST_ROWS_PER_SECOND = registry.gauge('stock_ingest_rows_per_second', '마지막 수집 실행의 초당 저장 행 수')
+CACHE_REQUESTS = registry.counter(
+    'stock_response_cache_requests_total', '응답 캐시 조회 수', ('cache', 'result')
+)
+STREAM_CONNECTIONS = registry.counter(
+    'stock_stream_connections_total', '시세 스트림 연결 수 (opened - closed가 현재 연결 수)', ('event',)
+)
+STREAM_POLLS = registry.counter('stock_stream_polls_total', '시세 폴러의 소스 조회 수', ('source', 'outcome'))
+STREAM_COALESCED = registry.counter('stock_stream_coalesced_total', '느린 구독자에게 보내지 못하고 합쳐진 시세 수')
+
+
+def _cache_hit_ratio(merged):
+    totals = {}
+    for (cache, result), value in merged['stock_response_cache_requests_total'].items():
+        hits, requests = totals.get(cache, (0, 0))
+        totals[cache] = (hits + (value if result == 'hit' else 0), requests + value)
+    return [([('cache', cache)], hits / requests) for cache, (hits, requests) in sorted(totals.items()) if requests]
+
+
+registry.derived('stock_response_cache_hit_ratio', '응답 캐시 적중률 (전체 작업자 누적)', _cache_hit_ratio)
+
+
+def record_ingest(results, elapsed):
+    """수집 실행 결과(종목별 result 딕셔너리)의 종목 수, 저장 행 수, 처리 속도 기록"""
+    rows = sum(result.get('records', 0) for result in results)
+    succeeded = sum(1 for result in results if result.get('success'))
+    INGEST_SYMBOLS.inc(succeeded, result='success')
+    INGEST_SYMBOLS.inc(len(results) - succeeded, result='failure')
+    INGEST_ROWS.inc(rows)
+    INGEST_SECONDS.observe(elapsed)
+    if elapsed > 0:
+        INGEST_ROWS_PER_SECOND.set(rows / elapsed)
+
+
+def timed_methods(histogram, exclude=()):
+    """클래스 데코레이터: 공개 메서드 실행 시간을 histogram의 method 레이블로 기록
+    
+    제너레이터 메서드는 실행이 호출 시점이 아니라 순회 시점에 일어나므로 제외합니다.
+    """
+    def decorator(cls):
+        for name, func in list(vars(cls).items()):
+            if (
+                name.startswith('_') or name in exclude
+                or not inspect.isfunction(func) or inspect.isgeneratorfunction(func)
+            ):
+                continue
+            setattr(cls, name, _timed(histogram, name, func))
+        return cls
+    return decorator
+
+
+def _timed(histogram, name, func):
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        started = time.perf_counter()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            histogram.observe(time.perf_counter() - started, method=name)
+    return wrapper
+
+
+def init_app(app):
+    """Flask 앱의 요청 처리 시간을 라우트/메서드/상태 코드별로 기록"""
+    from flask import g, request
+    
+    @app.before_request
+    def start_timer():
+        g.metrics_started = time.perf_counter()
+    
+    @app.after_request
+    def record_request(response):
+        started = g.pop('metrics_started', None)
+        if started is not None:
+            HTTP_REQUEST_SECONDS.observe(
+                time.perf_counter() - started,
+                route=request.url_rule.rule if request.url_rule else 'unmatched',
+                method=request.method,
+                status=response.status_code
+            )
+        return response
@@ -0,0 +1,200 @@
+import os
+import sys
+import json
+import time
+import hmac
+import uuid
+import random
+import cProfile
+import threading
+import logging
+from collections import Counter
+
+logger = logging.getLogger(__name__)
+
+# 프로파일 저장 디렉터리
+PROFILE_DIR = os.environ.get('STOCK_PROFILE_DIR', 'stock_profiles')
+# 요청별 프로파일링 토큰 (X-Profile 헤더 또는 _profile 쿼리 값이 일치해야 함, 비어 있으면 요청별 프로파일링 비활성)
+PROFILE_TOKEN = os.environ.get('STOCK_PROFILE_TOKEN', '')
+# 토큰 없이 무작위로 프로파일링할 요청 비율 (0~1, 샘플링 프로파일러만 사용)
+SAMPLE_RATE = float(os.environ.get('STOCK_PROFILE_SAMPLE_RATE', 0))
+# 샘플링 프로파일러의 스택 수집 간격 (초)
+SAMPLE_INTERVAL = float(os.environ.get('STOCK_PROFILE_INTERVAL', 0.005))
+# 보관할 최근 프로파일 수 (초과하면 오래된 것부터 삭제)
+PROFILE_KEEP = int(os.environ.get('STOCK_PROFILE_KEEP', 100))
+
+MODES = ('cprofile', 'sampling')
+
+# cProfile은 프로세스에서 한 번에 하나만 켤 수 있으므로 (Python 3.12+) 사용 중이면 샘플링으로 대체
+_cprofile_lock = threading.Lock()
+
+
+class StackSampler:
+    """대상 스레드의 호출 스택을 interval마다 수집하는 샘플링 프로파일러
+    
+    결과는 flamegraph.pl / speedscope에서 읽을 수 있는 collapsed stack 형식
+    ("바깥 프레임;...;안쪽 프레임 횟수")으로 저장합니다.
+    """
+    
+    def __init__(self, thread_id, interval=SAMPLE_INTERVAL):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='profile-sampler', daemon=True)
+    
+    @staticmethod
+    def _label(code):
+        return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+    
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                stack.append(self._label(frame.f_code))
+                frame = frame.f_back
+            if stack:
+                self.stacks[';'.join(reversed(stack))] += 1
+    
+    def start(self):
+        self._thread.start()
+    
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+    
+    def write(self, path):
+        with open(path, 'w', encoding='utf-8') as f:
+            for stack, count in self.stacks.most_common():
+                f.write(f"{stack} {count}\n")
+
+
+class ProfileSession:
+    """요청 하나의 프로파일링 (cprofile 모드는 cProfile + 샘플러, sampling 모드는 샘플러만)"""
+    
+    def __init__(self, mode, trigger):
+        self.mode = mode
+        self.trigger = trigger
+        self.profile = None
+        if mode == 'cprofile':
+            if _cprofile_lock.acquire(blocking=False):
+                self.profile = cProfile.Profile()
+            else:
+                self.mode = 'sampling'
+        self.sampler = StackSampler(threading.get_ident())
+        self.started = time.perf_counter()
+        self.sampler.start()
+        if self.profile is not None:
+            self.profile.enable()
+    
+    def stop(self, info):
+        """프로파일링을 끝내고 파일로 저장 (메타데이터 딕셔너리 반환)"""
+        if self.profile is not None:
+            self.profile.disable()
+            _cprofile_lock.release()
+        self.sampler.stop()
+        duration = time.perf_counter() - self.started
+        
+        os.makedirs(PROFILE_DIR, exist_ok=True)
+        profile_id = f"{time.strftime('%Y%m%d-%H%M%S')}-{uuid.uuid4().hex[:8]}"
+        files = {'collapsed': f"{profile_id}.collapsed"}
+        self.sampler.write(os.path.join(PROFILE_DIR, files['collapsed']))
+        if self.profile is not None:
+            files['pstats'] = f"{profile_id}.pstats"
+            self.profile.dump_stats(os.path.join(PROFILE_DIR, files['pstats']))
+        
+        meta = dict(
+            info, id=profile_id, mode=self.mode, trigger=self.trigger,
+            duration=round(duration, 4), samples=sum(self.sampler.stacks.values()),
+            created_at=time.time(), files=files
+        )
+        with open(os.path.join(PROFILE_DIR, f"{profile_id}.json"), 'w', encoding='utf-8') as f:
+            json.dump(meta, f, ensure_ascii=False)
+        _prune()
+        return meta
+
+
+def _prune():
+    """PROFILE_KEEP개를 넘는 오래된 프로파일 삭제"""
+    profiles = list_profiles(limit=None)
+    for meta in profiles[PROFILE_KEEP:]:
+        for name in list(meta.get('files', {}).values()) + [f"{meta['id']}.json"]:
+            try:
+                os.remove(os.path.join(PROFILE_DIR, name))
+            except OSError:
+                pass
+
+
+def list_profiles(limit=50):
+    """저장된 프로파일 메타데이터 (최신순)"""
+    try:
+        names = [name for name in os.listdir(PROFILE_DIR) if name.endswith('.json')]
+    except FileNotFoundError:
+        return []
+    profiles = []
+    for name in names:
+        try:
+            with open(os.path.join(PROFILE_DIR, name), encoding='utf-8') as f:
+                profiles.append(json.load(f))
+        except (OSError, ValueError):
+            continue
+    profiles.sort(key=lambda meta: meta.get('created_at', 0), reverse=True)
+    return profiles if limit is None else profiles[:limit]
+
+
+def authorized(request):
+    """요청이 프로파일링 토큰을 가지고 있는지 여부"""
+    token = request.headers.get('X-Profile') or request.args.get('_profile') or ''
+    return bool(PROFILE_TOKEN) and hmac.compare_digest(token.encode('utf-8'), PROFILE_TOKEN.encode('utf-8'))
+
+
+def _session_for(request):
+    """요청에 적용할 ProfileSession (프로파일링하지 않으면 None, 프로파일 조회 API 자체는 제외)"""
+    if request.path.startswith('/api/profiles'):
+        return None
+    if authorized(request):
+        mode = request.headers.get('X-Profile-Mode') or request.args.get('_profile_mode') or 'cprofile'
+        return ProfileSession(mode if mode in MODES else 'cprofile', 'token')
+    if SAMPLE_RATE > 0 and random.random() < SAMPLE_RATE:
+        return ProfileSession('sampling', 'sampled')
+    return None
+
+
+def init_app(app):
+    """Flask 앱에 요청별/샘플링 프로파일링 적용
+    
+    다른 after_request 훅(지표, 압축)보다 먼저 등록해야 JSON 직렬화와 압축까지 프로파일에 포함됩니다.
+    """
+    from flask import g, request
+    
+    @app.before_request
+    def start_profile():
+        g.profile_session = _session_for(request)
+    
+    def finish(status):
+        session = g.pop('profile_session', None)
+        if session is None:
+            return
+        try:
+            meta = session.stop({
+                'method': request.method,
+                'path': request.path,
+                # 토큰이 프로파일 목록에 남지 않도록 _profile* 파라미터 제외
+                'args': {key: value for key, value in request.args.items() if not key.startswith('_profile')},
+                'route': request.url_rule.rule if request.url_rule else None,
+                'status': status
+            })
+            logger.info(f"Profile saved: {meta['id']} ({meta['mode']}, {meta['duration']:.3f}s, {request.path})")
+        except Exception as e:
+            logger.error(f"Failed to save profile: {e}")
+    
+    @app.after_request
+    def stop_profile(response):
+        finish(response.status_code)
+        return response
+    
+    @app.teardown_request
+    def cleanup_profile(error=None):
+        # after_request까지 가지 못한 요청 (처리 중 예외)
+        finish(500 if error is not None else None)
@@ -0,0 +1,313 @@
+import os
+import time
+import uuid
+import random
+import threading
+import logging
+from api_response import dumps
+from metrics import STREAM_CONNECTIONS, STREAM_POLLS, STREAM_COALESCED
+
+logger = logging.getLogger(__name__)
+
+# 시세 소스 (db: 수집된 최신 종가, simulated: 최신 종가 기준 임의 변동 시세)
+QUOTE_SOURCE = os.environ.get('STOCK_QUOTE_SOURCE', 'db')
+# 소스 조회 간격 (초, 프로세스당 하나의 폴러가 모든 구독자 대신 조회)
+POLL_INTERVAL = float(os.environ.get('STOCK_STREAM_POLL_INTERVAL', 5))
+# 변경이 없을 때 보내는 keep-alive 주석 간격 (초, 프록시 유휴 종료 방지와 끊긴 연결 감지)
+HEARTBEAT_INTERVAL = float(os.environ.get('STOCK_STREAM_HEARTBEAT', 15))
+# 연결 하나의 최대 유지 시간 (초, 끝나면 EventSource가 Last-Event-ID로 재접속해 이어 받음)
+MAX_STREAM_SECONDS = float(os.environ.get('STOCK_STREAM_MAX_SECONDS', 300))
+# 프로세스당 최대 동시 스트림 수 (gunicorn.conf.py가 작업자 종류에 맞춰 기본값 지정)
+MAX_CLIENTS = int(os.environ.get('STOCK_STREAM_MAX_CLIENTS', 100))
+# EventSource 재접속 대기 시간 (밀리초)
+RETRY_MS = 3000
+
+
+class QuoteSource:
+    """시세 소스 인터페이스: poll()이 [{'symbol', 'price', 'previous_close', 'volume', 'date'}, ...]를 반환
+    
+    바뀐 것이 없으면 None을 반환해 비교 비용도 생략할 수 있습니다.
+    """
+    
+    name = None
+    
+    def poll(self):
+        raise NotImplementedError
+
+
+class DatabaseQuoteSource(QuoteSource):
+    """symbol_stats의 최신 종가/거래량 (데이터 버전이 바뀐 경우에만 조회)"""
+    
+    name = 'db'
+    
+    def __init__(self, db):
+        self.db = db
+        self._version = None
+    
+    def poll(self):
+        version = self.db.data_version.version
+        if version == self._version:
+            return None
+        self._version = version
+        return [
+            {
+                'symbol': symbol,
+                'price': stats['latest_close'],
+                'previous_close': stats['prev_close'],
+                'volume': stats['latest_volume'],
+                'date': stats['latest_date']
+            }
+            for symbol, stats in self.db.get_symbol_stats().items() if stats['row_count']
+        ]
+
+
+class SimulatedQuoteSource(QuoteSource):
+    """로컬 테스트용 모의 시세: 최신 종가에서 시작해 조회마다 일부 종목이 임의로 움직임"""
+    
+    name = 'simulated'
+    
+    def __init__(self, db, volatility=0.003, move_ratio=0.3, seed=None):
+        self.base = DatabaseQuoteSource(db)
+        self.volatility = volatility
+        self.move_ratio = move_ratio
+        self.random = random.Random(seed)
+        self.quotes = {}
+    
+    def poll(self):
+        base = self.base.poll()
+        if base is not None:
+            # 수집으로 최신 종가가 바뀌면 그 값에서 다시 시작
+            self.quotes = {quote['symbol']: dict(quote) for quote in base}
+        for quote in self.quotes.values():
+            if self.random.random() < self.move_ratio:
+                quote['price'] = round(quote['price'] * (1 + self.random.gauss(0, self.volatility)))
+                quote['volume'] = (quote['volume'] or 0) + self.random.randint(1, 1000)
+        return [dict(quote) for quote in self.quotes.values()]
+
+
+QUOTE_SOURCES = {
+    'db': DatabaseQuoteSource,
+    'simulated': SimulatedQuoteSource,
+}
+
+
+def create_quote_source(db, name=QUOTE_SOURCE):
+    """STOCK_QUOTE_SOURCE에 해당하는 시세 소스 생성 (알 수 없는 이름이면 db)"""
+    factory = QUOTE_SOURCES.get(name)
+    if factory is None:
+        logger.warning(f"Unknown quote source {name}; using db")
+        factory = DatabaseQuoteSource
+    return factory(db)
+
+
+class Subscriber:
+    """스트림 연결 하나의 대기열
+    
+    종목별 최신 시세만 보관하므로, 느린 클라이언트가 밀린 동안의 중간 시세는 합쳐지고(coalesce)
+    대기열 크기는 종목 수를 넘지 않습니다. 폴러는 구독자 때문에 기다리지 않습니다.
+    """
+    
+    def __init__(self, symbols=None):
+        self.symbols = frozenset(symbols) if symbols else None
+        self._pending = {}
+        self._condition = threading.Condition()
+        self.coalesced = 0
+    
+    def wants(self, symbol):
+        return self.symbols is None or symbol in self.symbols
+    
+    def offer(self, quotes):
+        """바뀐 시세 전달 (폴러 스레드에서 호출)"""
+        with self._condition:
+            for quote in quotes:
+                if not self.wants(quote['symbol']):
+                    continue
+                if quote['symbol'] in self._pending:
+                    self.coalesced += 1
+                self._pending[quote['symbol']] = quote
+            if self._pending:
+                self._condition.notify()
+    
+    def drain(self, timeout):
+        """밀린 시세를 모두 꺼냄 (없으면 timeout초 동안 기다림)"""
+        with self._condition:
+            if not self._pending:
+                self._condition.wait(timeout)
+            quotes = list(self._pending.values())
+            self._pending.clear()
+            return quotes
+
+
+class _QuoteStream:
+    """SSE 본문 이터러블 (닫으면 구독 해제)
+    
+    시작하지 않은 제너레이터는 close()해도 finally가 실행되지 않으므로, 첫 이벤트를 보내기 전에
+    연결이 끊겨도 예약한 자리가 남지 않도록 close()에서 직접 해제합니다.
+    """
+    
+    def __init__(self, hub, subscriber, events):
+        self.hub = hub
+        self.subscriber = subscriber
+        self._events = events
+    
+    def __iter__(self):
+        return self._events
+    
+    def close(self):
+        self._events.close()
+        self.hub.unsubscribe(self.subscriber)
+
+
+class QuoteHub:
+    """프로세스당 하나의 시세 폴러와 메모리 시세 테이블
+    
+    첫 구독자가 생기면 폴러 스레드를 시작하고 구독자가 모두 떠나면 멈추므로, 연결 수와 관계없이
+    소스 조회는 POLL_INTERVAL마다 한 번입니다. 바뀐 종목만 순번(seq)을 붙여 구독자에게 보냅니다.
+    """
+    
+    def __init__(self, source, interval=POLL_INTERVAL):
+        self.source = source
+        self.interval = interval
+        self._lock = threading.Lock()
+        self._quotes = {}
+        self._seq = 0
+        self._subscribers = set()
+        self._thread = None
+        self._pid = None
+        # 작업자마다 순번이 다르므로 재접속한 작업자가 다르면 전체 시세부터 다시 보냄
+        self.epoch = uuid.uuid4().hex[:8]
+    
+    def _check_fork(self):
+        # fork 전 부모의 폴러/구독자는 물려받지 않음 (self._lock을 잡은 상태에서 호출)
+        if self._pid != os.getpid():
+            self._pid = os.getpid()
+            self._subscribers = set()
+            self._thread = None
+            self.epoch = uuid.uuid4().hex[:8]
+    
+    def subscribe(self, symbols=None):
+        """구독자 등록 후 폴러가 멈춰 있으면 시작 (최대 동시 스트림 수에 도달했으면 None)
+        
+        자리 확인과 등록을 같은 잠금 안에서 하므로 동시에 접속해도 MAX_CLIENTS를 넘지 않습니다.
+        """
+        with self._lock:
+            self._check_fork()
+            if len(self._subscribers) >= MAX_CLIENTS:
+                return None
+            subscriber = Subscriber(symbols)
+            self._subscribers.add(subscriber)
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='quote-poller', daemon=True)
+                self._thread.start()
+        STREAM_CONNECTIONS.inc(event='opened')
+        return subscriber
+    
+    def unsubscribe(self, subscriber):
+        """구독 해제 (이미 해제된 구독자면 아무것도 하지 않음)"""
+        with self._lock:
+            if subscriber not in self._subscribers:
+                return
+            self._subscribers.discard(subscriber)
+        STREAM_CONNECTIONS.inc(event='closed')
+        STREAM_COALESCED.inc(subscriber.coalesced)
+    
+    def quotes_since(self, seq, symbols=None):
+        """seq 이후 바뀐 시세 (symbols가 있으면 해당 종목만)와 현재 순번"""
+        with self._lock:
+            quotes = [
+                quote for quote in self._quotes.values()
+                if quote['seq'] > seq and (symbols is None or quote['symbol'] in symbols)
+            ]
+            return quotes, self._seq
+    
+    def apply(self, quotes):
+        """조회 결과를 테이블에 반영하고 바뀐 시세만 반환"""
+        changed = []
+        now = time.time()
+        with self._lock:
+            for quote in quotes:
+                previous = self._quotes.get(quote['symbol'])
+                if previous and previous['price'] == quote['price'] and previous['volume'] == quote['volume']:
+                    continue
+                self._seq += 1
+                quote = dict(quote, seq=self._seq, time=now)
+                previous_close = quote.get('previous_close')
+                if previous_close:
+                    quote['change'] = quote['price'] - previous_close
+                    quote['change_rate'] = round(quote['change'] / previous_close * 100, 2)
+                self._quotes[quote['symbol']] = quote
+                changed.append(quote)
+            subscribers = list(self._subscribers)
+        for subscriber in subscribers:
+            subscriber.offer(changed)
+        return changed
+    
+    def poll_once(self):
+        started = time.perf_counter()
+        try:
+            quotes = self.source.poll()
+        except Exception as e:
+            STREAM_POLLS.inc(source=self.source.name, outcome='error')
+            logger.warning(f"Quote poll failed ({self.source.name}): {e}")
+            return []
+        STREAM_POLLS.inc(source=self.source.name, outcome='ok' if quotes is not None else 'unchanged')
+        changed = self.apply(quotes) if quotes else []
+        if changed:
+            logger.debug(f"Quote poll: {len(changed)} changed in {time.perf_counter() - started:.3f}s")
+        return changed
+    
+    def _run(self):
+        logger.info(f"Quote poller started ({self.source.name}, every {self.interval}s)")
+        while True:
+            with self._lock:
+                if not self._subscribers:
+                    self._thread = None
+                    logger.info("Quote poller stopped (no subscribers)")
+                    return
+            self.poll_once()
+            time.sleep(self.interval)
+    
+    def stream(self, symbols=None, last_event_id=None):
+        """SSE 본문 제너레이터 (snapshot 이벤트 후 바뀐 시세마다 quotes 이벤트)
+        
+        last_event_id('epoch-seq')가 같은 작업자의 것이면 그 이후 바뀐 시세만 snapshot으로 보냅니다.
+        구독자 수 제한에 걸리면 None을 반환합니다. 자리는 호출 시점에 예약하며, 반환한 본문을
+        닫으면(WSGI 서버가 응답을 마칠 때) 한 번도 순회하지 않았더라도 해제됩니다.
+        """
+        subscriber = self.subscribe(symbols)
+        if subscriber is None:
+            return None
+        
+        def generate():
+            since = 0
+            epoch, _, seq = (last_event_id or '').partition('-')
+            if epoch == self.epoch and seq.isdigit():
+                since = int(seq)
+            try:
+                yield f"retry: {RETRY_MS}\n\n"
+                quotes, seq = self.quotes_since(since, subscriber.symbols)
+                yield self._event('snapshot', quotes, seq)
+                deadline = time.monotonic() + MAX_STREAM_SECONDS
+                while time.monotonic() < deadline:
+                    quotes = subscriber.drain(min(HEARTBEAT_INTERVAL, max(0, deadline - time.monotonic())))
+                    if quotes:
+                        yield self._event('quotes', quotes, max(quote['seq'] for quote in quotes))
+                    else:
+                        yield ": keep-alive\n\n"
+            finally:
+                self.unsubscribe(subscriber)
+        
+        return _QuoteStream(self, subscriber, generate())
+    
+    def _event(self, name, quotes, seq):
+        return f"id: {self.epoch}-{seq}\nevent: {name}\ndata: {dumps(quotes).decode('utf-8')}\n\n"
+    
+    def stats(self):
+        with self._lock:
+            return {
+                'source': self.source.name,
+                'subscribers': len(self._subscribers) if self._pid == os.getpid() else 0,
+                'symbols': len(self._quotes),
+                'seq': self._seq,
+                'polling': self._thread is not None and self._pid == os.getpid()
+            }
@@ -0,0 +1,293 @@
+import os
+import json
+import time
+import random
+import threading
+import logging
+from datetime import datetime, timedelta
+import numpy as np
+import pandas as pd
+from data_sources import DataSource, SourceRouter, REQUIRED_COLUMNS, normalize_ohlcv
+from universe import MARKETS
+
+logger = logging.getLogger(__name__)
+
+LISTING_COLUMNS = ['symbol', 'name', 'market', 'sector', 'shares', 'market_cap']
+
+
+def _json_default(obj):
+    # NumPy 스칼라(pykrx 시가총액 등)는 파이썬 숫자로 저장
+    return obj.item() if hasattr(obj, 'item') else str(obj)
+
+
+class ReplayArchive:
+    """업스트림 응답을 저장해 두는 로컬 아카이브
+    
+    디렉터리 구성:
+    - prices/<symbol>.csv: 종목별 시세 (Date, Open, High, Low, Close, Volume)
+    - companies.json: 종목별 get_company_info 결과
+    - listing.csv: get_listing 결과 (상장 목록)
+    - manifest.json: 기록 시각과 마지막 시세 날짜
+    """
+    
+    def __init__(self, directory):
+        self.directory = directory
+        self.prices_dir = os.path.join(directory, 'prices')
+        os.makedirs(self.prices_dir, exist_ok=True)
+        self._lock = threading.Lock()
+        self._prices = {}
+        self._companies = None
+        self._manifest = None
+    
+    def _path(self, name):
+        return os.path.join(self.directory, name)
+    
+    def _write_json(self, name, data):
+        # 임시 파일에 쓴 뒤 교체해 중간에 중단되어도 이전 내용이 남도록 함
+        path = self._path(name)
+        with open(f"{path}.tmp", 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False, indent=1, default=_json_default)
+        os.replace(f"{path}.tmp", path)
+    
+    def _read_json(self, name, default):
+        try:
+            with open(self._path(name), encoding='utf-8') as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return default
+    
+    @property
+    def manifest(self):
+        with self._lock:
+            if self._manifest is None:
+                self._manifest = self._read_json('manifest.json', {})
+            return dict(self._manifest)
+    
+    def _update_manifest(self, last_date):
+        # self._lock을 잡은 상태에서 호출
+        if self._manifest is None:
+            self._manifest = self._read_json('manifest.json', {})
+        if last_date > self._manifest.get('last_date', ''):
+            self._manifest['last_date'] = last_date
+        self._manifest['recorded_at'] = datetime.now().isoformat(timespec='seconds')
+        self._write_json('manifest.json', self._manifest)
+    
+    def symbols(self):
+        """시세가 저장된 종목 코드 목록"""
+        return sorted(name[:-4] for name in os.listdir(self.prices_dir) if name.endswith('.csv'))
+    
+    def save_prices(self, symbol, df):
+        """시세 DataFrame을 저장 (기존 기록과 날짜 기준으로 합치고, 겹치는 날짜는 새 값 사용)"""
+        df = normalize_ohlcv(df)
+        if df.empty:
+            return
+        with self._lock:
+            existing = self._load_prices(symbol)
+            if not existing.empty:
+                df = pd.concat([existing[~existing.index.isin(df.index)], df]).sort_index()
+            df.to_csv(os.path.join(self.prices_dir, f'{symbol}.csv'), index_label='Date')
+            self._prices[symbol] = df
+            self._update_manifest(df.index[-1].strftime('%Y-%m-%d'))
+    
+    def _load_prices(self, symbol):
+        df = self._prices.get(symbol)
+        if df is None:
+            path = os.path.join(self.prices_dir, f'{symbol}.csv')
+            if os.path.exists(path):
+                df = pd.read_csv(path, index_col='Date', parse_dates=['Date'])[REQUIRED_COLUMNS]
+            else:
+                df = pd.DataFrame(columns=REQUIRED_COLUMNS, index=pd.DatetimeIndex([], name='Date'))
+            self._prices[symbol] = df
+        return df
+    
+    def load_prices(self, symbol, start_date=None, end_date=None):
+        """저장된 시세 중 start_date~end_date 구간 (없는 종목은 빈 DataFrame)"""
+        with self._lock:
+            df = self._load_prices(symbol)
+        if start_date is not None:
+            df = df[df.index >= pd.Timestamp(start_date).normalize()]
+        if end_date is not None:
+            df = df[df.index <= pd.Timestamp(end_date)]
+        return df
+    
+    def save_company(self, info):
+        self.save_companies([info])
+    
+    def save_companies(self, infos):
+        with self._lock:
+            companies = self._load_companies()
+            for info in infos:
+                companies[info['symbol']] = info
+            self._write_json('companies.json', companies)
+    
+    def _load_companies(self):
+        if self._companies is None:
+            self._companies = self._read_json('companies.json', {})
+        return self._companies
+    
+    def company(self, symbol):
+        """저장된 회사 정보 (없으면 None)"""
+        with self._lock:
+            info = self._load_companies().get(symbol)
+        return dict(info) if info else None
+    
+    def save_listing(self, listing):
+        with self._lock:
+            listing[LISTING_COLUMNS].to_csv(self._path('listing.csv'), index=False)
+    
+    def listing(self, markets=MARKETS):
+        """저장된 상장 목록 중 markets에 속한 종목 (없으면 None)"""
+        path = self._path('listing.csv')
+        if not os.path.exists(path):
+            return None
+        listing = pd.read_csv(path, dtype={'symbol': str})
+        return listing[listing['market'].isin(markets)].reset_index(drop=True)
+    
+    @classmethod
+    def synthetic(cls, directory, symbols=100, days=365, seed=0):
+        """네트워크 없이 벤치마크할 수 있도록 임의 시세(기하 브라운 운동)로 아카이브 생성
+        
+        종목 코드는 '900000'부터 차례로 붙이며, 시세는 오늘까지의 평일 days일치입니다.
+        """
+        archive = cls(directory)
+        rng = np.random.default_rng(seed)
+        dates = pd.bdate_range(end=pd.Timestamp.today().normalize(), periods=days)
+        codes = [f'{900000 + i:06d}' for i in range(symbols)]
+        
+        records = []
+        for i, symbol in enumerate(codes):
+            start = rng.uniform(1000, 500000)
+            closes = np.round(start * np.exp(np.cumsum(rng.normal(0, 0.02, days))))
+            opens = np.round(closes * (1 + rng.normal(0, 0.005, days)))
+            spread = np.abs(rng.normal(0, 0.01, days)) * closes
+            df = pd.DataFrame({
+                'Open': opens,
+                'High': np.round(np.maximum(opens, closes) + spread),
+                'Low': np.round(np.minimum(opens, closes) - spread),
+                'Close': closes,
+                'Volume': rng.integers(10_000, 10_000_000, days)
+            }, index=dates)
+            archive.save_prices(symbol, df)
+            shares = int(rng.integers(1_000_000, 1_000_000_000))
+            records.append({
+                'symbol': symbol,
+                'name': f'종목{symbol}',
+                'market': MARKETS[i % len(MARKETS)],
+                'sector': 'Synthetic',
+                'shares': shares,
+                'market_cap': int(closes[-1] * shares)
+            })
+        
+        archive.save_companies([
+            {key: record[key] for key in ('symbol', 'name', 'market_cap', 'sector')} for record in records
+        ])
+        archive.save_listing(pd.DataFrame(records))
+        logger.info(f"Synthetic archive created: {symbols} symbols x {days} days in {directory}")
+        return archive
+
+
+class FaultInjector:
+    """재생 호출마다 지연 시간과 오류를 주입 (latency초 ± jitter 비율, error_rate 확률로 ConnectionError)"""
+    
+    def __init__(self, latency=0.0, jitter=0.0, error_rate=0.0, seed=None):
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+    
+    def __call__(self, description):
+        with self._lock:
+            delay = self.latency * (1 + self.jitter * self._random.uniform(-1, 1))
+            fail = self._random.random() < self.error_rate
+        if delay > 0:
+            time.sleep(delay)
+        if fail:
+            raise ConnectionError(f"Injected replay error: {description}")
+
+
+class ReplaySource(DataSource):
+    """ReplayArchive에서 시세를 읽는 소스 (주입된 지연 시간/오류 적용)
+    
+    align_to_today이면 아카이브의 마지막 날짜가 최근 주가 되도록 날짜를 주 단위로 옮겨,
+    기록한 지 오래된 아카이브도 요일 구성을 유지한 채 같은 조회 구간을 재현합니다.
+    """
+    
+    def __init__(self, archive, injector=None, align_to_today=True, name='replay'):
+        super().__init__(name)
+        self.archive = archive
+        self.injector = injector or FaultInjector()
+        self.offset = timedelta(0)
+        last_date = archive.manifest.get('last_date')
+        if align_to_today and last_date:
+            weeks = (datetime.now() - pd.to_datetime(last_date).to_pydatetime()).days // 7
+            self.offset = timedelta(weeks=weeks)
+    
+    def read(self, symbol, start_date, end_date):
+        self.injector(f"prices {symbol}")
+        df = self.archive.load_prices(symbol, start_date - self.offset, end_date - self.offset)
+        if self.offset:
+            df = df.set_axis(df.index + self.offset)
+        return df
+
+
+def record(stock_api, archive):
+    """stock_api의 fetch_stock_data/get_company_info/get_listing 결과를 archive에 함께 기록하도록 감쌈"""
+    fetch_stock_data = stock_api.fetch_stock_data
+    get_company_info = stock_api.get_company_info
+    get_listing = stock_api.get_listing
+    
+    def recording_fetch_stock_data(symbol, *args, **kwargs):
+        df = fetch_stock_data(symbol, *args, **kwargs)
+        if df is not None and not df.empty:
+            archive.save_prices(symbol, df)
+        return df
+    
+    def recording_get_company_info(symbol, *args, **kwargs):
+        info = get_company_info(symbol, *args, **kwargs)
+        if info:
+            archive.save_company(info)
+        return info
+    
+    def recording_get_listing(*args, **kwargs):
+        listing = get_listing(*args, **kwargs)
+        if listing is not None and not listing.empty:
+            archive.save_listing(listing)
+        return listing
+    
+    stock_api.fetch_stock_data = recording_fetch_stock_data
+    stock_api.get_company_info = recording_get_company_info
+    stock_api.get_listing = recording_get_listing
+    return stock_api
+
+
+def use_replay(stock_api, archive, latency=0.0, jitter=0.0, error_rate=0.0, seed=None):
+    """stock_api(StockAPIFDR/StockAPI)가 업스트림 대신 archive를 읽도록 교체하고 ReplaySource 반환
+    
+    시세는 ReplaySource 하나로 구성한 라우터를 거치므로 호출 한도('replay'), 재시도, 회로 차단기가
+    실제 수집과 같은 경로로 동작합니다. 회사 정보와 상장 목록에도 같은 지연 시간/오류를 주입합니다.
+    """
+    injector = FaultInjector(latency, jitter, error_rate, seed)
+    source = ReplaySource(archive, injector)
+    stock_api.sources = SourceRouter([source], hedge=False)
+    
+    def replay_get_company_info(symbol, *args, **kwargs):
+        info = archive.company(symbol)
+        try:
+            injector(f"company {symbol}")
+        except ConnectionError as e:
+            logger.error(f"Error getting company info for {symbol}: {e}")
+            info = None
+        return info or {'symbol': symbol, 'name': symbol, 'market_cap': 0, 'sector': 'Unknown'}
+    
+    def replay_get_listing(markets=MARKETS):
+        try:
+            injector("listing")
+        except ConnectionError as e:
+            logger.error(f"Error getting market listing: {e}")
+            return None
+        return archive.listing(markets)
+    
+    stock_api.get_company_info = replay_get_company_info
+    stock_api.get_listing = replay_get_listing
+    return source
@@ -0,0 +1,97 @@
+import threading
+from collections import OrderedDict
+from metrics import CACHE_REQUESTS
+
+
+class _Pending:
+    """진행 중인 계산 (같은 키를 기다리는 요청들이 결과를 공유)"""
+    
+    def __init__(self):
+        self.event = threading.Event()
+        self.value = None
+        self.error = None
+
+
+class ResponseCache:
+    """데이터 버전 기반 LRU 응답 캐시
+    
+    키는 (엔드포인트, 파라미터...) 튜플이며 version_source()가 반환하는 데이터 버전이 바뀌면
+    이전 항목은 모두 무효화됩니다. 같은 키의 캐시 미스가 동시에 들어오면 한 번만 계산합니다.
+    """
+    
+    def __init__(self, version_source, max_entries=256, name='response'):
+        self.version_source = version_source
+        self.name = name
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._pending = {}
+        self._version = None
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+    
+    def get_or_compute(self, key, compute):
+        """캐시된 값을 반환하고, 없으면 compute()로 계산해 저장"""
+        version = self.version_source()
+        
+        with self._lock:
+            if version != self._version:
+                # 수집으로 데이터가 바뀌면 전체 무효화
+                self._entries.clear()
+                self._version = version
+            
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                CACHE_REQUESTS.inc(cache=self.name, result='hit')
+                return self._entries[key]
+            
+            pending = self._pending.get(key)
+            owner = pending is None
+            if owner:
+                pending = _Pending()
+                self._pending[key] = pending
+                self.misses += 1
+            else:
+                self.hits += 1
+        CACHE_REQUESTS.inc(cache=self.name, result='miss' if owner else 'hit')
+        
+        if not owner:
+            pending.event.wait()
+            if pending.error is not None:
+                raise pending.error
+            return pending.value
+        
+        try:
+            pending.value = compute()
+        except Exception as e:
+            pending.error = e
+            raise
+        finally:
+            with self._lock:
+                self._pending.pop(key, None)
+                if pending.error is None and self._version == version:
+                    self._entries[key] = pending.value
+                    self._entries.move_to_end(key)
+                    while len(self._entries) > self.max_entries:
+                        self._entries.popitem(last=False)
+            pending.event.set()
+        
+        return pending.value
+    
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+    
+    def stats(self):
+        """캐시 적중/미스 통계"""
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'max_entries': self.max_entries,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_ratio': round(self.hits / total, 4) if total else 0.0,
+                'version': self._version
+            }
@@ -0,0 +1,261 @@
+"""KRX 거래일 기준 수집 스케줄러
+
+거래일마다 폐장 후 --delay분이 지나면 증분 수집을 한 번 실행합니다. 주말/휴장일에는 아무것도 하지 않고,
+이미 해당 거래일 봉이 저장된 종목은 건너뛰며, 실패한 종목만 --retries번까지 다시 수집합니다.
+수집은 성공했지만 재시도에서도 해당 거래일 봉이 없는 종목(거래정지 등)은 no_data로 기록하고 다시 수집하지 않습니다.
+같은 DB에 대해 스케줄러는 파일 잠금으로, 웹의 /api/update-data 작업과는 ingestion_jobs 테이블로
+동시에 하나만 실행됩니다.
+    
+    # 데몬으로 실행
+    python scheduler.py --universe all
+    
+    # 마지막으로 끝난 거래일을 한 번 수집하고 종료 (cron: 평일 16:00 KST)
+    python scheduler.py --once --universe all
+    
+    # 연도별 휴장일과 장 시간이 다른 날 확인
+    python scheduler.py --calendar 2025
+"""
+import os
+import json
+import time
+import logging
+import argparse
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from api_factory import create_api
+from ingestion_jobs import IngestionJobManager
+from trading_calendar import TradingCalendar, KST
+from universe import parse_shard
+
+try:
+    import fcntl
+except ImportError:  # Windows (deploy.bat) 환경
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+# 폐장 후 수집까지 기다리는 시간 (분, 업스트림에 당일 봉이 반영될 때까지)
+SCHEDULE_DELAY_MINUTES = int(os.environ.get('STOCK_SCHEDULE_DELAY', 30))
+# 실패한 종목 재시도 횟수와 간격 (초)
+SCHEDULE_RETRIES = int(os.environ.get('STOCK_SCHEDULE_RETRIES', 3))
+SCHEDULE_RETRY_DELAY = int(os.environ.get('STOCK_SCHEDULE_RETRY_DELAY', 600))
+
+
+@contextmanager
+def file_lock(path):
+    """비차단 배타 잠금 (다른 프로세스가 잡고 있으면 False, fcntl이 없으면 항상 True)"""
+    with open(path, 'a') as lock_file:
+        if fcntl is None:
+            yield True
+            return
+        try:
+            fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            yield False
+            return
+        try:
+            yield True
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+class IngestionScheduler:
+    """거래일 폐장 후 증분 수집 실행
+    
+    마지막으로 처리한 거래일과 끝내 실패한 종목, 봉이 없는 종목(no_data)은 DB 옆 {db_name}.schedule.json에
+    기록하므로, 재시작하거나 --once로 다시 실행해도 끝난 거래일은 다시 수집하지 않고 실패한 종목만 재시도합니다.
+    """
+    
+    # 다른 수집 작업 완료 대기 시 상태 확인 간격 (초)
+    POLL_INTERVAL = 2.0
+    
+    def __init__(self, stock_api, calendar=None, universe='top10', shard=None, delay_minutes=SCHEDULE_DELAY_MINUTES,
+                 retries=SCHEDULE_RETRIES, retry_delay=SCHEDULE_RETRY_DELAY, max_workers=None):
+        self.stock_api = stock_api
+        self.db = stock_api.db
+        self.calendar = calendar or TradingCalendar()
+        self.universe = universe
+        self.shard = shard
+        self.delay = timedelta(minutes=delay_minutes)
+        self.retries = retries
+        self.retry_delay = retry_delay
+        self.max_workers = max_workers
+        self.jobs = IngestionJobManager(stock_api)
+        self.lock_path = f"{self.db.db_name}.schedule.lock"
+        self.state_path = f"{self.db.db_name}.schedule.json"
+    
+    def load_state(self):
+        try:
+            with open(self.state_path, encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+    
+    def save_state(self, state):
+        tmp_path = f"{self.state_path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(state, f, ensure_ascii=False)
+        os.replace(tmp_path, self.state_path)
+    
+    def due_session(self, now=None):
+        """지금 수집할 거래일 (폐장 후 delay가 지난 마지막 거래일)"""
+        return self.calendar.last_closed_session((now or datetime.now(KST)) - self.delay)
+    
+    def next_run_at(self, now=None):
+        """다음 수집 시각 (다음 폐장 + delay, KST)"""
+        return self.calendar.next_close((now or datetime.now(KST)) - self.delay) + self.delay
+    
+    def pending_targets(self, session_day):
+        """session_day 봉이 아직 없는 수집 대상 (symbol, name) 리스트
+        
+        universe='all'이면 먼저 DB의 유니버스로 확인해, 모두 최신이면 상장 목록도 받지 않습니다.
+        """
+        last_dates = self.db.get_last_dates()
+        session = session_day.isoformat()
+        
+        def stale(targets):
+            return [(symbol, name) for symbol, name in targets if (last_dates.get(symbol) or '') < session]
+        
+        if self.universe == 'all':
+            known = self.stock_api.universe.symbols(parse_shard(self.shard))
+            if known and not stale(known):
+                return []
+        return stale(self.stock_api.universe.targets(self.universe, parse_shard(self.shard)))
+    
+    def run_job(self, targets, session_day):
+        """targets만 수집하는 작업을 실행하고 끝날 때까지 기다린 뒤 (실패, 봉 없음) (symbol, name) 리스트 반환
+        
+        웹에서 시작한 작업이 실행 중이면 그 작업이 끝나길 기다렸다가 다시 등록합니다.
+        수집에 실패한 종목과, 성공으로 보고했지만 session_day 봉이 아직 저장되지 않은 종목(업스트림에 당일 봉이
+        반영되기 전이거나 거래정지로 새 행 0개로 끝난 경우)을 나눠 반환합니다.
+        """
+        options = {'incremental': True, 'conservative_mode': False, 'targets': targets}
+        if self.max_workers:
+            options['max_workers'] = self.max_workers
+        while True:
+            job_id, created = self.jobs.submit(**options)
+            job = self.wait(job_id)
+            if created:
+                break
+            logger.info(f"Waited for running ingestion job {job_id}; resubmitting {len(targets)} symbols")
+        
+        succeeded = {result['symbol'] for result in (job or {}).get('results') or [] if result.get('success')}
+        last_dates = self.db.get_last_dates()
+        session = session_day.isoformat()
+        stale = {symbol for symbol, _ in targets if (last_dates.get(symbol) or '') < session}
+        if stale & succeeded:
+            logger.warning(f"{len(stale & succeeded)}개 종목은 수집에 성공했지만 {session_day} 봉이 아직 없습니다")
+        failed = [(symbol, name) for symbol, name in targets if symbol not in succeeded]
+        no_data = [(symbol, name) for symbol, name in targets if symbol in succeeded and symbol in stale]
+        return failed, no_data
+    
+    def wait(self, job_id):
+        while True:
+            job = self.jobs.get(job_id)
+            if job is None or job['status'] in ('completed', 'failed'):
+                return job
+            time.sleep(self.POLL_INTERVAL)
+    
+    def run_session(self, session_day):
+        """session_day를 수집 (끝난 거래일이면 실패한 종목만, 다른 스케줄러가 실행 중이면 건너뜀)
+        
+        실행하지 않았으면 None, 실행했으면 기록한 상태 딕셔너리를 반환합니다.
+        """
+        with file_lock(self.lock_path) as locked:
+            if not locked:
+                logger.info("다른 스케줄러가 수집 중이라 건너뜁니다")
+                return None
+            
+            state = self.load_state()
+            if state.get('session') == session_day.isoformat():
+                targets = [tuple(item) for item in state.get('failed', [])]
+                if not targets:
+                    logger.info(f"{session_day} 수집이 이미 끝났습니다")
+                    return None
+                logger.info(f"{session_day} 실패 종목 {len(targets)}개 재시도")
+            else:
+                targets = self.pending_targets(session_day)
+                if not targets:
+                    logger.info(f"{session_day} 봉이 모두 저장되어 있어 수집하지 않습니다")
+                    state = {'session': session_day.isoformat(), 'symbols': 0, 'failed': [], 'no_data': [], 'attempts': 0}
+                    self.save_state(state)
+                    return state
+            
+            started = time.time()
+            symbols = len(targets)
+            attempts = 0
+            no_data = []
+            while targets:
+                attempts += 1
+                logger.info(f"{session_day} 수집 시도 {attempts}: {len(targets)}개 종목")
+                targets, missing = self.run_job(targets, session_day)
+                if attempts > 1:
+                    # 재시도에서도 봉이 없으면 거래정지 등으로 보고 더 재시도하지 않음 (수집 오류만 재시도)
+                    no_data.extend(missing)
+                else:
+                    # 첫 시도는 업스트림 반영 지연일 수 있으므로 한 번 더 수집
+                    targets += missing
+                if not targets or attempts > self.retries:
+                    break
+                logger.warning(f"{len(targets)}개 종목 실패, {self.retry_delay}초 후 재시도")
+                time.sleep(self.retry_delay)
+            
+            state = {
+                'session': session_day.isoformat(),
+                'symbols': symbols,
+                'failed': targets,
+                'no_data': no_data,
+                'attempts': attempts,
+                'elapsed': round(time.time() - started, 3),
+                'finished_at': time.time()
+            }
+            self.save_state(state)
+            if no_data:
+                logger.info(f"{session_day} 봉이 없는 종목 {len(no_data)}개 (거래정지 등)")
+            logger.info(f"{session_day} 수집 완료: {symbols - len(targets)}/{symbols} 성공 ({attempts}회 시도)")
+            return state
+    
+    def run_forever(self):
+        """거래일 폐장 + delay마다 run_session 실행 (시작 시 밀린 거래일도 먼저 처리)"""
+        while True:
+            self.run_session(self.due_session())
+            next_run = self.next_run_at()
+            logger.info(f"다음 수집: {next_run:%Y-%m-%d %H:%M} KST")
+            # 시스템 시각 변경/절전에 대비해 최대 1시간씩 나눠서 대기
+            while (remaining := (next_run - datetime.now(KST)).total_seconds()) > 0:
+                time.sleep(min(remaining, 3600))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="KRX 거래일 기준 수집 스케줄러")
+    parser.add_argument('--api', choices=('fdr', 'pykrx'), default='fdr', help="사용할 API 구현")
+    parser.add_argument('--universe', choices=('top10', 'all'), default='top10', help="수집 대상")
+    parser.add_argument('--shard', help="k/n이면 n개로 나눈 종목 중 k번째만 수집")
+    parser.add_argument('--workers', type=int, help="동시 작업자 수")
+    parser.add_argument('--delay', type=int, default=SCHEDULE_DELAY_MINUTES, help="폐장 후 수집까지 대기 (분)")
+    parser.add_argument('--retries', type=int, default=SCHEDULE_RETRIES, help="실패 종목 재시도 횟수")
+    parser.add_argument('--retry-delay', type=int, default=SCHEDULE_RETRY_DELAY, help="재시도 간격 (초)")
+    parser.add_argument('--once', action='store_true', help="마지막으로 끝난 거래일을 한 번 수집하고 종료")
+    parser.add_argument('--calendar', type=int, metavar='YEAR', help="연도의 휴장일/특수 장 시간 출력")
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    
+    calendar = TradingCalendar()
+    if args.calendar:
+        for day, description in calendar.year(args.calendar):
+            print(f"{day} {day:%a} {description}")
+        return
+    
+    parse_shard(args.shard)
+    scheduler = IngestionScheduler(
+        create_api(args.api), calendar, universe=args.universe, shard=args.shard, delay_minutes=args.delay,
+        retries=args.retries, retry_delay=args.retry_delay, max_workers=args.workers
+    )
+    if args.once:
+        scheduler.run_session(scheduler.due_session())
+    else:
+        scheduler.run_forever()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,226 @@
+import os
+import json
+import mmap
+import time
+import struct
+import threading
+import logging
+import numpy as np
+from columnar_store import COLUMNS
+from api_response import dumps, gzip_compress
+
+logger = logging.getLogger(__name__)
+
+# 스냅샷에 담는 종목별 최근 행 수 (1년 차트와 요약 계산에 충분한 길이, 더 긴 조회는 컬럼 캐시로)
+SNAPSHOT_DAYS = int(os.environ.get('STOCK_SNAPSHOT_DAYS', 400))
+
+# 파일 형식: MAGIC, 헤더 길이(uint64), JSON 헤더, 8바이트 정렬된 섹션들
+# 섹션은 미리 직렬화한 응답 본문(JSON, gzip)과 (len(COLUMNS), 전체 행 수) float64 가격 배열입니다.
+MAGIC = b'STKSNAP1'
+HEADER_LENGTH = struct.Struct('<Q')
+ALIGNMENT = 8
+
+
+def summary_columns(summary):
+    """요약 리스트를 {필드: [값, ...]} 컬럼 형태로 변환 (/api/stocks?shape=columns)"""
+    return {field: [stock[field] for stock in summary] for field in (summary[0] if summary else {})}
+
+
+class Snapshot:
+    """매핑된 스냅샷 파일 하나 (읽기 전용, 교체되어도 이 객체의 매핑은 그대로 유효)"""
+    
+    def __init__(self, mapped, header, data_offset):
+        self._mapped = mapped
+        self._buffer = memoryview(mapped)
+        self._data_offset = data_offset
+        self.version = header['version']
+        self.updated_at = header['updated_at']
+        self.created_at = header['created_at']
+        self._sections = header['sections']
+        self._symbols = header['symbols']
+        self._companies = header['companies']
+        
+        offset, length = self._sections['prices']
+        total = length // (len(COLUMNS) * 8)
+        self._prices = np.frombuffer(
+            mapped, dtype=np.float64, count=len(COLUMNS) * total, offset=data_offset + offset
+        ).reshape(len(COLUMNS), total)
+    
+    def body(self, name, compressed=False):
+        """미리 직렬화한 응답 본문 bytes (compressed면 gzip 본문)"""
+        offset, length = self._sections[f"{name}.gz" if compressed else name]
+        start = self._data_offset + offset
+        return bytes(self._buffer[start:start + length])
+    
+    def read(self, symbol, days=None):
+        """최근 days개 행의 컬럼 딕셔너리 (ColumnarStore.read와 같은 형식)
+        
+        스냅샷에 없는 종목이거나 잘라 저장한 것보다 긴 구간을 요청하면 None입니다.
+        """
+        entry = self._symbols.get(symbol)
+        if entry is None:
+            return None
+        start, count, complete = entry
+        if days and days <= count:
+            start, count = start + count - days, days
+        elif not complete:
+            return None
+        if count == 0:
+            return None
+        data = self._prices[:, start:start + count]
+        return {name: data[i] for i, name in enumerate(COLUMNS)}
+    
+    def company(self, symbol):
+        """회사 기본 정보 {'symbol', 'name', 'market_cap', 'sector'} (없으면 None)"""
+        return self._companies.get(symbol)
+
+
+class SnapshotReader:
+    """작업자마다 하나씩 두는 스냅샷 파일 읽기 객체
+    
+    파일이 교체되면(inode/mtime/크기 변경) 새로 mmap합니다. 모든 gunicorn 워커가 같은 파일을
+    매핑하므로 응답 본문과 가격 배열은 페이지 캐시에 한 벌만 존재합니다.
+    """
+    
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._stat_key = None
+        self._snapshot = None
+    
+    def current(self):
+        """현재 스냅샷 (파일이 없거나 읽을 수 없으면 None)"""
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            return None
+        
+        stat_key = (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+        with self._lock:
+            if stat_key == self._stat_key:
+                return self._snapshot
+            try:
+                self._snapshot = self._load()
+            except (OSError, ValueError, KeyError) as e:
+                logger.warning(f"Failed to map snapshot {self.path}: {e}")
+                self._snapshot = None
+            self._stat_key = stat_key
+            return self._snapshot
+    
+    def _load(self):
+        with open(self.path, 'rb') as f:
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if mapped[:len(MAGIC)] != MAGIC:
+            raise ValueError("not a snapshot file")
+        start = len(MAGIC) + HEADER_LENGTH.size
+        header_length, = HEADER_LENGTH.unpack_from(mapped, len(MAGIC))
+        header = json.loads(mapped[start:start + header_length])
+        snapshot = Snapshot(mapped, header, _align(start + header_length))
+        logger.info(f"Mapped snapshot v{snapshot.version} ({len(mapped)} bytes, {len(header['symbols'])} symbols)")
+        return snapshot
+
+
+def _align(offset):
+    return (offset + ALIGNMENT - 1) // ALIGNMENT * ALIGNMENT
+
+
+def write_snapshot(path, state, bodies, companies, arrays):
+    """스냅샷 파일 작성 (임시 파일에 쓰고 fsync 후 원자적으로 교체하므로 읽는 쪽은 반쯤 쓴 파일을 보지 않음)
+    
+    state는 데이터 버전 정보, bodies는 {이름: 응답 객체}, companies는 {symbol: 회사 정보},
+    arrays는 {symbol: get_price_arrays 형식 딕셔너리}입니다.
+    """
+    symbols = {}
+    total = 0
+    for symbol, columns in arrays.items():
+        count = min(len(columns['date']), SNAPSHOT_DAYS)
+        symbols[symbol] = [total, count, count == len(columns['date'])]
+        total += count
+    
+    prices = np.empty((len(COLUMNS), total), dtype=np.float64)
+    for symbol, columns in arrays.items():
+        start, count, _ = symbols[symbol]
+        for i, name in enumerate(COLUMNS):
+            prices[i, start:start + count] = columns[name][-count:] if count else []
+    
+    # 섹션 오프셋은 데이터 영역 시작 기준
+    sections = {}
+    blobs = []
+    offset = 0
+    for name, obj in bodies.items():
+        body = dumps(obj)
+        for section, blob in ((name, body), (f"{name}.gz", gzip_compress(body))):
+            sections[section] = [offset, len(blob)]
+            blobs.append((offset, blob))
+            offset = _align(offset + len(blob))
+    sections['prices'] = [offset, prices.nbytes]
+    blobs.append((offset, prices.tobytes()))
+    
+    header = json.dumps({
+        'version': state['version'],
+        'updated_at': state['updated_at'],
+        'created_at': time.time(),
+        'sections': sections,
+        'symbols': symbols,
+        'companies': companies
+    }, ensure_ascii=False).encode('utf-8')
+    
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    try:
+        with open(tmp_path, 'wb') as f:
+            f.write(MAGIC)
+            f.write(HEADER_LENGTH.pack(len(header)))
+            f.write(header)
+            data_offset = _align(f.tell())
+            for offset, blob in blobs:
+                f.write(b'\0' * (data_offset + offset - f.tell()))
+                f.write(blob)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
+    return total
+
+
+def refresh_snapshot(stock_api):
+    """데이터 버전과 다르면 스냅샷을 다시 만듦 (수집이 끝난 뒤, 마스터 예열 시 호출)
+    
+    버전을 먼저 읽고 데이터를 모으므로, 만드는 도중 수집이 버전을 올리면 스냅샷은 옛 버전으로
+    기록되어 사용되지 않습니다 (다음 갱신까지 작업자는 DB/컬럼 캐시로 응답).
+    """
+    db = stock_api.db
+    if db.snapshot is None or db.current_snapshot() is not None:
+        return False
+    
+    start_time = time.time()
+    try:
+        state = db.data_version.current()
+        summary = stock_api.get_all_stocks_summary()
+        companies = db.get_companies()
+        records = companies.to_dict('records') if not companies.empty else []
+        bodies = {
+            'stocks_rows': {'success': True, 'data': summary, 'shape': 'rows', 'count': len(summary)},
+            'stocks_columns': {'success': True, 'data': summary_columns(summary), 'shape': 'columns', 'count': len(summary)},
+            'companies': {'success': True, 'data': records, 'count': len(records)}
+        }
+        company_info = {
+            record['symbol']: {
+                'symbol': record['symbol'],
+                'name': record['name'],
+                'market_cap': record.get('market_cap'),
+                'sector': record.get('sector')
+            }
+            for record in records
+        }
+        arrays = db.get_price_arrays_batch(list(company_info), days=SNAPSHOT_DAYS + 1)
+        rows = write_snapshot(db.snapshot.path, state, bodies, json.loads(dumps(company_info)), arrays)
+        logger.info(f"Snapshot v{state['version']} written ({len(arrays)} symbols, {rows} rows) in {time.time() - start_time:.2f} seconds")
+        return True
+    except Exception as e:
+        logger.error(f"Failed to write snapshot: {e}")
+        return False
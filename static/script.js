@@ -1,6 +1,7 @@
 // 전역 변수
 let stockChart = null;
 let stocksData = [];
+let quoteStream = null;
 
 // DOM 요소들
 const updateBtn = document.getElementById('updateBtn');
@@ -48,20 +49,30 @@ function setLoading(element, isLoading) {
     }
 }
 
+// {필드: [값, ...]} 컬럼 배열을 객체 배열로 변환
+function rowsFromColumns(columns, count) {
+    const fields = Object.keys(columns);
+    return Array.from({ length: count }, (_, i) =>
+        Object.fromEntries(fields.map(field => [field, columns[field][i]]))
+    );
+}
+
 // 주식 데이터 로드
 async function loadStocksData() {
     try {
         setLoading(refreshBtn, true);
         showMessage('주식 데이터를 불러오는 중...', 'info');
         
-        const response = await fetch('/api/stocks');
+        // 컬럼 배열 형태로 받아 종목마다 반복되는 키 전송을 줄임
+        const response = await fetch('/api/stocks?shape=columns');
         const result = await response.json();
         
         if (result.success) {
-            stocksData = result.data;
+            stocksData = rowsFromColumns(result.data, result.count);
             displayStocks(stocksData);
             updateStatistics(stocksData);
             updateStockSelect(stocksData);
+            startQuoteStream();
             showMessage('주식 데이터를 성공적으로 불러왔습니다!', 'success');
         } else {
             showMessage(`데이터 로드 실패: ${result.error}`, 'error');
@@ -73,11 +84,35 @@ async function loadStocksData() {
     }
 }
 
+// 실시간 시세 구독 (서버가 바뀐 종목만 보내며, 끊기면 EventSource가 Last-Event-ID로 자동 재접속)
+function startQuoteStream() {
+    if (quoteStream || !window.EventSource) return;
+    
+    quoteStream = new EventSource('/api/stream/quotes');
+    quoteStream.addEventListener('snapshot', event => applyQuotes(JSON.parse(event.data)));
+    quoteStream.addEventListener('quotes', event => applyQuotes(JSON.parse(event.data)));
+}
+
+// 받은 시세를 종목 카드와 목록 데이터에 반영
+function applyQuotes(quotes) {
+    const bySymbol = new Map(stocksData.map(stock => [stock.symbol, stock]));
+    quotes.forEach(quote => {
+        const stock = bySymbol.get(quote.symbol);
+        if (!stock || stock.current_price === quote.price) return;
+        stock.current_price = quote.price;
+        
+        const card = stocksGrid.querySelector(`.stock-card[data-symbol="${quote.symbol}"]`);
+        if (card) {
+            card.querySelector('.stock-price').textContent = formatPrice(quote.price);
+        }
+    });
+}
+
 // 주식 데이터 업데이트
 async function updateStockData() {
     try {
         setLoading(updateBtn, true);
-        showMessage('주식 데이터를 업데이트하는 중... (약 1-2분 소요)', 'info');
+        showMessage('주식 데이터 업데이트를 시작합니다...', 'info');
         
         const response = await fetch('/api/update-data', {
             method: 'POST',
@@ -88,14 +123,19 @@ async function updateStockData() {
         
         const result = await response.json();
         
-        if (result.success) {
-            showMessage('주식 데이터 업데이트가 완료되었습니다!', 'success');
-            // 업데이트 후 데이터 다시 로드
-            setTimeout(() => {
-                loadStocksData();
-            }, 1000);
-        } else {
+        if (!result.success) {
             showMessage(`업데이트 실패: ${result.error}`, 'error');
+            return;
+        }
+        
+        // 백그라운드 작업이 끝날 때까지 상태 확인
+        const job = await waitForUpdateJob(result.status_url);
+        
+        if (job.status === 'completed') {
+            showMessage(`주식 데이터 업데이트가 완료되었습니다! (${job.success_count}/${job.total}개 성공)`, 'success');
+            loadStocksData();
+        } else {
+            showMessage(`업데이트 실패: ${job.error || '알 수 없는 오류'}`, 'error');
         }
     } catch (error) {
         showMessage(`네트워크 오류: ${error.message}`, 'error');
@@ -104,6 +144,26 @@ async function updateStockData() {
     }
 }
 
+// 업데이트 작업 상태 폴링
+async function waitForUpdateJob(statusUrl, interval = 2000) {
+    while (true) {
+        const response = await fetch(statusUrl);
+        const result = await response.json();
+        
+        if (!result.success) {
+            throw new Error(result.error);
+        }
+        
+        const job = result.data;
+        if (job.status === 'completed' || job.status === 'failed') {
+            return job;
+        }
+        
+        showMessage(`주식 데이터 업데이트 중... ${job.done}/${job.total || '?'} (${job.progress}%)`, 'info');
+        await new Promise(resolve => setTimeout(resolve, interval));
+    }
+}
+
 // 주식 목록 표시
 function displayStocks(stocks) {
     if (!stocks || stocks.length === 0) {
@@ -123,6 +183,7 @@ function displayStocks(stocks) {
                 <div class="stock-price">${formatPrice(stock.current_price)}</div>
                 <div class="stock-change ${changeClass}">
                     ${changeSymbol}${stock.year_return.toFixed(2)}% (1년)
+                    ${stock.return_1d != null ? ` | ${stock.return_1d > 0 ? '+' : ''}${stock.return_1d.toFixed(2)}% (1일)` : ''}
                 </div>
                 <div class="stock-range">
                     High: ${formatPrice(stock.year_high)} | Low: ${formatPrice(stock.year_low)}
@@ -187,7 +248,9 @@ async function loadChart() {
     try {
         showMessage('차트 데이터를 불러오는 중...', 'info');
         
-        const response = await fetch(`/api/chart-data/${symbol}?days=${days}`);
+        // 차트 폭(픽셀)만큼만 점을 받아 기간과 무관하게 응답/렌더링 크기 유지
+        const maxPoints = Math.max(Math.round(priceChart.clientWidth || 0), 200);
+        const response = await fetch(`/api/chart-data/${symbol}?days=${days}&max_points=${maxPoints}`);
         const result = await response.json();
         
         if (result.success) {
@@ -288,4 +351,7 @@ window.addEventListener('beforeunload', () => {
     if (stockChart) {
         stockChart.destroy();
     }
+    if (quoteStream) {
+        quoteStream.close();
+    }
 }); 
\ No newline at end of file
@@ -1,7 +1,14 @@
-import FinanceDataReader as fdr
 import pandas as pd
 from datetime import datetime, timedelta
 from database import StockDatabase
+from columnar_store import format_days
+from fetch_pipeline import get_limiter, call_with_retry, run_in_batches
+from universe import UniverseManager, parse_shard
+from data_sources import create_router
+from indicators import update_indicators
+from metrics import record_ingest
+from snapshot import refresh_snapshot
+from stock_summary import summarize_universe, SUMMARY_ROWS
 import time
 import logging
 
@@ -10,8 +17,16 @@ logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 class StockAPIFDR:
-    def __init__(self):
-        self.db = StockDatabase()
+    # 증분 수집 시 마지막 저장 날짜보다 앞서 다시 받는 일수 (정정된 시세 반영)
+    INCREMENTAL_OVERLAP_DAYS = 5
+    # 전 종목 수집 시 한 배치로 처리하는 종목 수 (배치마다 지표/데이터 버전 반영)
+    INGEST_BATCH_SIZE = 200
+    # 1년(기본) 백필 일수: 1년 전 날짜가 주말/휴장일이어도 그 이전 거래일 종가(1년 수익률 기준가)가 포함되도록 여유를 둠
+    BACKFILL_DAYS = 400
+    
+    def __init__(self, db=None):
+        # db를 주면 해당 StockDatabase 사용 (벤치마크/재생용 별도 DB)
+        self.db = db or StockDatabase()
         # 코스피 시총 상위 10개 회사
         self.kospi_top10 = {
             '005930': '삼성전자',
@@ -25,16 +40,56 @@ class StockAPIFDR:
             '028260': '삼성물산',
             '012330': '현대모비스'
         }
+        # 전 종목 유니버스 (companies 테이블의 상장 종목)
+        self.universe = UniverseManager(self)
+        # 시세 소스 (KRX → NAVER → 기본 → pykrx, 지연 시간에 따라 재정렬/헤지)
+        self.sources = create_router(('fdr_krx', 'fdr_naver', 'fdr', 'pykrx'))
+    
+    def get_listing(self, markets=('KOSPI', 'KOSDAQ')):
+        """KRX 전 종목 상장 목록을 한 번의 StockListing 호출로 가져와 정규화
+        
+        반환 DataFrame 컬럼: symbol, name, market, sector, shares, market_cap
+        """
+        def read_listing():
+            with get_limiter('fdr'):
+                return fdr.StockListing('KRX')
+        
+        try:
+            # FinanceDataReader는 수집할 때만 로드 (웹 작업자 시작 시간 단축)
+            import FinanceDataReader as fdr
+            listing = call_with_retry(read_listing, description="KRX listing")
+        except Exception as e:
+            logger.error(f"Error getting KRX listing: {e}")
+            return None
+        
+        # 'KOSDAQ GLOBAL' 등 세부 시장은 상위 시장으로 묶음
+        market = listing['Market'].astype(str).str.split().str[0]
+        df = pd.DataFrame({
+            'symbol': listing['Code'].astype(str),
+            'name': listing['Name'],
+            'market': market,
+            'sector': listing['Sector'] if 'Sector' in listing.columns else None,
+            'shares': listing['Stocks'] if 'Stocks' in listing.columns else None,
+            'market_cap': listing['Marcap'] if 'Marcap' in listing.columns else None
+        })
+        return df[df['market'].isin(markets)].reset_index(drop=True)
     
-    def fetch_stock_data(self, symbol, period='1y'):
-        """FinanceDataReader를 사용한 주식 데이터 가져오기"""
+    def fetch_stock_data(self, symbol, period='1y', retries=3, start_date=None):
+        """FinanceDataReader를 사용한 주식 데이터 가져오기
+        
+        start_date를 지정하면 period 대신 해당 날짜부터 오늘까지만 조회합니다 (증분 수집).
+        증분 조회에서는 새 거래일이 없을 수 있으므로 데이터가 없으면 빈 DataFrame을 반환합니다.
+        """
         try:
             logger.info(f"Fetching stock data for {symbol} using FinanceDataReader...")
             
             # 기간 계산
             end_date = datetime.now()
-            if period == '1y':
-                start_date = end_date - timedelta(days=365)
+            incremental = start_date is not None
+            if incremental:
+                start_date = pd.to_datetime(start_date).to_pydatetime()
+            elif period == '1y':
+                start_date = end_date - timedelta(days=self.BACKFILL_DAYS)
             elif period == '6m':
                 start_date = end_date - timedelta(days=180)
             elif period == '3m':
@@ -42,48 +97,27 @@ class StockAPIFDR:
             elif period == '1m':
                 start_date = end_date - timedelta(days=30)
             else:
-                start_date = end_date - timedelta(days=365)
+                start_date = end_date - timedelta(days=self.BACKFILL_DAYS)
             
-            # FinanceDataReader로 데이터 가져오기 (KRX 소스 우선)
-            try:
-                # KRX 소스 시도
-                df = fdr.DataReader(f'KRX:{symbol}', start_date, end_date)
-                logger.info(f"✓ KRX 소스에서 데이터 가져옴: {symbol}")
-            except:
-                try:
-                    # NAVER 소스 시도
-                    df = fdr.DataReader(f'NAVER:{symbol}', start_date, end_date)
-                    logger.info(f"✓ NAVER 소스에서 데이터 가져옴: {symbol}")
-                except:
-                    # 기본 소스 시도
-                    df = fdr.DataReader(symbol, start_date, end_date)
-                    logger.info(f"✓ 기본 소스에서 데이터 가져옴: {symbol}")
+            # 가장 빠른 정상 소스에서 데이터 가져오기 (모든 소스 실패 시 백오프 재시도)
+            df = call_with_retry(
+                self.sources.fetch, symbol, start_date, end_date,
+                retries=retries, description=f"Fetching {symbol}"
+            )
             
             if df.empty:
+                if incremental:
+                    logger.info(f"No new data for {symbol} since {start_date:%Y-%m-%d}")
+                    return df
                 logger.warning(f"No data found for {symbol}")
                 return None
             
-            # 컬럼명이 이미 영어인 경우 그대로 사용
-            if 'Close' not in df.columns and '종가' in df.columns:
-                # 한글 컬럼명을 영어로 변경
-                df.rename(columns={
-                    '시가': 'Open',
-                    '고가': 'High', 
-                    '저가': 'Low',
-                    '종가': 'Close',
-                    '거래량': 'Volume'
-                }, inplace=True)
-            
-            # 필요한 컬럼만 선택
-            required_columns = ['Open', 'High', 'Low', 'Close', 'Volume']
-            df = df[required_columns]
-            
-            # 인덱스를 날짜 문자열로 변환
+            # 인덱스를 날짜 문자열로 변환 (컬럼은 소스에서 Open/High/Low/Close/Volume으로 정규화됨)
             df.index = pd.to_datetime(df.index).strftime('%Y-%m-%d')
             
             logger.info(f"Successfully fetched {len(df)} records for {symbol}")
             return df
-            
+        
         except Exception as e:
             logger.error(f"Error fetching data for {symbol}: {e}")
             return None
@@ -93,16 +127,17 @@ class StockAPIFDR:
         try:
             logger.info(f"Getting company info for {symbol}...")
             
-            # FinanceDataReader로 기본 정보 가져오기
+            # 최근 1개월 데이터로 현재가 정보 얻기 (시세 수집과 같은 소스 라우터를 거쳐 회로 차단기/헤지 적용)
             try:
-                # 최근 1개월 데이터로 현재가 정보 얻기
-                recent_df = fdr.DataReader(symbol, datetime.now() - timedelta(days=30), datetime.now())
+                now = datetime.now()
+                recent_df = self.sources.fetch(symbol, now - timedelta(days=30), now)
                 if not recent_df.empty:
-                    current_price = recent_df['Close'].iloc[-1] if 'Close' in recent_df.columns else recent_df['종가'].iloc[-1]
+                    current_price = recent_df['Close'].iloc[-1]
                     market_cap = current_price * 5969782550  # 삼성전자 기준 상장주식수 (임시)
                 else:
                     market_cap = 0
-            except:
+            except Exception as e:
+                logger.debug(f"Market cap lookup failed for {symbol}: {e}")
                 market_cap = 0
             
             company_info = {
@@ -114,7 +149,7 @@ class StockAPIFDR:
             
             logger.info(f"Successfully got company info for {symbol}")
             return company_info
-            
+        
         except Exception as e:
             logger.error(f"Error getting company info for {symbol}: {e}")
             return {
@@ -124,18 +159,38 @@ class StockAPIFDR:
                 'sector': 'Unknown'
             }
     
-    def update_all_kospi_data(self, conservative_mode=True):
-        """코스피 상위 10개 회사의 데이터 업데이트 (FinanceDataReader 사용)"""
-        logger.info("FinanceDataReader를 사용하여 코스피 상위 10개 회사 데이터 업데이트 시작...")
+    def get_company_infos(self, symbols):
+        """여러 종목의 회사 정보를 {symbol: dict}로 반환 (업스트림 호출 없이 companies 테이블 한 번 조회)
         
-        success_count = 0
-        total_count = len(self.kospi_top10)
+        아직 저장되지 않은 종목은 get_company_info의 실패 시 기본값과 같은 형태로 채웁니다.
+        """
+        infos = self.db.get_companies_by_symbols(symbols)
+        for symbol in symbols:
+            if symbol not in infos:
+                infos[symbol] = {
+                    'symbol': symbol,
+                    'name': self.kospi_top10.get(symbol, f'종목{symbol}'),
+                    'market_cap': 0,
+                    'sector': 'Unknown'
+                }
+        return infos
+    
+    def update_symbol_data(self, symbol, name=None, last_date=None):
+        """단일 종목의 회사 정보와 주가 데이터를 가져와 저장하고 결과를 반환
         
-        for i, (symbol, name) in enumerate(self.kospi_top10.items(), 1):
-            try:
-                logger.info(f"Processing {name} ({symbol})... [{i}/{total_count}]")
-                
-                # 회사 정보 가져오기 및 저장
+        last_date(마지막 저장 날짜)가 주어지면 그 이후 구간만 겹침 일수를 두고 증분 수집하고,
+        없으면 신규 종목으로 보고 1년치(BACKFILL_DAYS일)를 백필합니다.
+        """
+        name = name or self.kospi_top10.get(symbol, symbol)
+        start_time = time.time()
+        result = {
+            'symbol': symbol, 'name': name, 'success': False, 'records': 0, 'error': None,
+            'mode': 'incremental' if last_date else 'backfill'
+        }
+        
+        try:
+            # 회사 정보 가져오기 및 저장 (증분 수집에서는 신규 종목만, 유니버스로 이미 등록된 종목은 생략)
+            if not last_date and symbol not in self.db.get_companies_by_symbols([symbol]):
                 company_info = self.get_company_info(symbol)
                 if company_info:
                     self.db.insert_company(
@@ -144,97 +199,112 @@ class StockAPIFDR:
                         market_cap=company_info['market_cap'],
                         sector=company_info['sector']
                     )
-                    logger.info(f"✓ {name} 회사 정보 저장 완료")
-                
-                # 주식 가격 데이터 가져오기 및 저장
+            
+            # 주식 가격 데이터 가져오기 및 저장
+            if last_date:
+                start_date = pd.to_datetime(last_date) - timedelta(days=self.INCREMENTAL_OVERLAP_DAYS)
+                stock_data = self.fetch_stock_data(symbol, start_date=start_date)
+            else:
                 stock_data = self.fetch_stock_data(symbol, period='1y')
-                if stock_data is not None and not stock_data.empty:
-                    # 데이터베이스에 저장
-                    for date, row in stock_data.iterrows():
-                        self.db.insert_stock_price(
-                            symbol=symbol,
-                            date=date,
-                            open_price=float(row['Open']),
-                            high_price=float(row['High']),
-                            low_price=float(row['Low']),
-                            close_price=float(row['Close']),
-                            volume=int(row['Volume']) if pd.notna(row['Volume']) else 0
-                        )
-                    
-                    success_count += 1
-                    logger.info(f"✓ {name} 주가 데이터 저장 완료 ({len(stock_data)}개 레코드)")
-                else:
-                    logger.warning(f"✗ {name} 주가 데이터 가져오기 실패")
-                
-                # 요청 간격 조정
-                if conservative_mode:
-                    time.sleep(3)  # 3초 대기
+            
+            if stock_data is not None and not stock_data.empty:
+                # 데이터베이스에 저장 (단일 트랜잭션 일괄 upsert)
+                if self.db.insert_stock_prices(symbol, stock_data):
+                    result['success'] = True
+                    result['records'] = len(stock_data)
                 else:
-                    time.sleep(1)  # 1초 대기
-                
-            except Exception as e:
-                logger.error(f"Error processing {name} ({symbol}): {e}")
-                continue
+                    result['error'] = 'Failed to store stock prices'
+            elif stock_data is not None and last_date:
+                # 증분 구간에 새 거래일이 없음
+                result['success'] = True
+            else:
+                result['error'] = 'No stock data fetched'
+        except Exception as e:
+            logger.error(f"Error processing {name} ({symbol}): {e}")
+            result['error'] = str(e)
+        
+        result['elapsed'] = round(time.time() - start_time, 3)
+        return result
+    
+    def update_all_kospi_data(self, conservative_mode=True, max_workers=None, progress_callback=None,
+                              incremental=True, universe='top10', shard=None, targets=None):
+        """수집 대상 종목의 데이터 업데이트 (FinanceDataReader 사용)
+        
+        universe가 'top10'이면 코스피 상위 10개 회사를, 'all'이면 상장 목록을 먼저 동기화한 뒤
+        KOSPI + KOSDAQ 전 종목을 수집합니다. shard('k/n')를 주면 n개로 나눈 종목 중 k번째만 처리하므로
+        여러 프로세스/서버에서 나눠 실행할 수 있습니다.
+        종목들은 INGEST_BATCH_SIZE개씩 작업자 풀에서 병렬로 처리되며, 배치가 끝날 때마다 지표와
+        데이터 버전을 반영합니다. 업스트림 호출 속도는 RateLimiter가 제한합니다.
+        conservative_mode에서는 동시 작업자 수를 줄입니다.
+        incremental이면 이미 저장된 종목은 마지막 저장 날짜 이후만 가져옵니다.
+        targets로 (symbol, name) 리스트를 주면 universe/shard 대신 그 종목들만 수집합니다 (스케줄러 재시도).
+        """
+        started = time.time()
+        if targets is None:
+            targets = self.universe.targets(universe, parse_shard(shard))
+        
+        logger.info(f"FinanceDataReader를 사용하여 {len(targets)}개 종목 데이터 업데이트 시작 (universe={universe}, shard={shard or '-'})...")
+        
+        if max_workers is None:
+            max_workers = 2 if conservative_mode else 4
         
-        logger.info(f"데이터 업데이트 완료: {success_count}/{total_count} 성공")
+        def report(done, total, item, result):
+            symbol, name = item
+            if result.get('success'):
+                logger.info(f"✓ {name} ({symbol}) 저장 완료 ({result['records']}개 레코드) [{done}/{total}]")
+            else:
+                logger.warning(f"✗ {name} ({symbol}) 실패: {result.get('error')} [{done}/{total}]")
+            if progress_callback:
+                progress_callback(done, total, item, result)
+        
+        def apply_batch(batch_results):
+            # 새로 저장된 종목이 있으면 추가된 봉만큼 지표를 이어 계산한 뒤 데이터 버전을 올려 캐시를 무효화
+            updated_symbols = [result['symbol'] for result in batch_results if result.get('records')]
+            if updated_symbols:
+                update_indicators(self.db, updated_symbols)
+                self.db.data_version.bump(updated_symbols)
+        
+        # 모든 종목의 마지막 저장 날짜를 한 번에 조회
+        last_dates = self.db.get_last_dates() if incremental else {}
+        
+        results = run_in_batches(
+            targets,
+            lambda item: self.update_symbol_data(*item, last_date=last_dates.get(item[0])),
+            batch_size=self.INGEST_BATCH_SIZE,
+            max_workers=max_workers,
+            progress_callback=report,
+            batch_callback=apply_batch
+        )
+        
+        record_ingest(results, time.time() - started)
+        # 작업자들이 mmap으로 공유하는 스냅샷 갱신 (바뀐 데이터가 없으면 그대로 둠)
+        refresh_snapshot(self)
+        success_count = sum(1 for result in results if result.get('success'))
+        logger.info(f"데이터 업데이트 완료: {success_count}/{len(results)} 성공")
         return success_count
     
     def get_all_stocks_summary(self):
-        """모든 주식 요약 정보 가져오기"""
-        companies = self.db.get_all_companies()
-        summary = []
+        """모든 주식 요약 정보 가져오기 (기간별 수익률, 52주 최고/최저가, 평균 거래량)
         
-        for company in companies:
-            symbol = company[0]
-            name = company[1]
-            
-            # 최근 주가 정보 가져오기
-            recent_prices = self.db.get_recent_stock_prices(symbol, days=30)
-            
-            if recent_prices:
-                latest_price = recent_prices[0]
-                current_price = latest_price[4]  # close_price
-                
-                # 1년 전 가격과 비교
-                year_ago_prices = self.db.get_stock_prices_by_date_range(
-                    symbol, 
-                    (datetime.now() - timedelta(days=365)).strftime('%Y-%m-%d'),
-                    (datetime.now() - timedelta(days=350)).strftime('%Y-%m-%d')
-                )
-                
-                year_return = 0
-                if year_ago_prices:
-                    year_ago_price = year_ago_prices[0][4]
-                    year_return = ((current_price - year_ago_price) / year_ago_price) * 100
-                
-                summary.append({
-                    'symbol': symbol,
-                    'name': name,
-                    'current_price': current_price,
-                    'year_return': round(year_return, 2)
-                })
-        
-        return summary
+        상장 종목의 최근 SUMMARY_ROWS거래일 시세를 한 번에 읽고(스냅샷/컬럼 캐시 또는 단일 쿼리)
+        stock_summary.summarize_universe로 전 종목을 한 번에 계산합니다.
+        """
+        companies = [(company[0], company[1]) for company in self.db.get_all_companies()]
+        price_arrays = self.db.get_price_arrays_batch([symbol for symbol, _ in companies], days=SUMMARY_ROWS)
+        return summarize_universe(companies, price_arrays)
     
     def get_stock_chart_data(self, symbol, days=365):
         """특정 종목의 차트 데이터 가져오기"""
-        stock_prices = self.db.get_recent_stock_prices(symbol, days)
+        # 날짜 오름차순 배열 (컬럼 캐시가 있으면 memmap 슬라이스)
+        arrays = self.db.get_price_arrays(symbol, days)
         
-        if not stock_prices:
+        if arrays is None:
             return None
         
-        # 날짜 순으로 정렬 (오래된 것부터)
-        stock_prices.reverse()
-        
         chart_data = {
-            'dates': [],
-            'prices': [],
-            'volumes': []
+            'dates': format_days(arrays['date']),
+            'prices': arrays['close'].tolist(),
+            'volumes': arrays['volume'].astype(int).tolist()
         }
         
-        for price in stock_prices:
-            chart_data['dates'].append(price[1])  # date
-            chart_data['prices'].append(price[4])  # close_price
-            chart_data['volumes'].append(price[5])  # volume
-        
         return chart_data 
\ No newline at end of file
@@ -0,0 +1,141 @@
+import numpy as np
+from columnar_store import format_days
+
+# 요약 계산에 읽는 종목별 최근 거래일 수 (1년 전 기준가와 52주 구간을 포함하는 길이)
+SUMMARY_ROWS = 300
+# 기준일 이전 마지막 거래일이 이보다 오래되면(거래정지, 신규 상장 등) 수익률을 계산하지 않음 (달력 일수)
+MAX_GAP_DAYS = 10
+# 평균 거래량 계산 거래일 수
+AVG_VOLUME_DAYS = 20
+
+# 기간별 수익률: (필드 이름, 기준일까지의 개월 수 또는 일수)
+RETURN_HORIZONS = (
+    ('return_1w', {'days': 7}),
+    ('return_1m', {'months': 1}),
+    ('return_3m', {'months': 3}),
+    ('return_6m', {'months': 6}),
+    ('return_1y', {'months': 12}),
+)
+
+# 종목 구간을 하나의 정렬된 키로 합칠 때 종목 번호에 곱하는 값 (날짜 일수보다 커야 함)
+_SEGMENT_STRIDE = 1 << 20
+
+
+def months_ago(days, months):
+    """일수 배열에서 months개월 전 같은 날짜 (그 달에 없는 날이면 말일)"""
+    dates = np.asarray(days, dtype=np.int64).astype('datetime64[D]')
+    month_start = dates.astype('datetime64[M]')
+    day_of_month = (dates - month_start.astype('datetime64[D]')).astype(np.int64)
+    target_month = month_start - months
+    month_length = ((target_month + 1).astype('datetime64[D]') - target_month.astype('datetime64[D]')).astype(np.int64)
+    return (target_month.astype('datetime64[D]') + np.minimum(day_of_month, month_length - 1)).astype(np.int64)
+
+
+def previous_year_end(days):
+    """일수 배열에서 전년도 12월 31일 (연초 대비 수익률 기준일)"""
+    dates = np.asarray(days, dtype=np.int64).astype('datetime64[D]')
+    return (dates.astype('datetime64[Y]').astype('datetime64[D]') - 1).astype(np.int64)
+
+
+class _Universe:
+    """종목별 시세를 이어 붙인 평면 배열과 종목 구간 [starts, ends)"""
+    
+    def __init__(self, arrays_list):
+        counts = np.array([len(arrays['date']) for arrays in arrays_list], dtype=np.int64)
+        self.ends = np.cumsum(counts)
+        self.starts = self.ends - counts
+        self.columns = {
+            name: np.concatenate([arrays[name] for arrays in arrays_list]) if arrays_list else np.empty(0)
+            for name in ('date', 'high', 'low', 'close', 'volume')
+        }
+        segments = np.repeat(np.arange(len(arrays_list), dtype=np.int64), counts)
+        # 종목 번호 * STRIDE + 날짜: 종목 안에서 날짜순이고 종목끼리는 겹치지 않는 단조 증가 키
+        self.keys = segments * _SEGMENT_STRIDE + self.columns['date'].astype(np.int64)
+        self.last = self.ends - 1
+        self.as_of = self.columns['date'][self.last].astype(np.int64) if len(arrays_list) else np.empty(0, np.int64)
+    
+    def index_on_or_before(self, targets):
+        """종목별 targets일 또는 그 이전의 마지막 거래일 인덱스 (없으면 -1)"""
+        segment_keys = np.arange(len(self.starts), dtype=np.int64) * _SEGMENT_STRIDE + targets
+        index = np.searchsorted(self.keys, segment_keys, side='right') - 1
+        dates = self.columns['date'][np.maximum(index, 0)]
+        valid = (index >= self.starts) & (dates >= targets - MAX_GAP_DAYS)
+        return np.where(valid, index, -1)
+    
+    def index_after(self, targets):
+        """종목별 targets일 다음 첫 거래일 인덱스 (구간 시작 이상으로 제한)"""
+        segment_keys = np.arange(len(self.starts), dtype=np.int64) * _SEGMENT_STRIDE + targets
+        return np.maximum(np.searchsorted(self.keys, segment_keys, side='right'), self.starts)
+    
+    def returns(self, base_index):
+        """기준 인덱스 종가 대비 마지막 종가 수익률(%), 기준이 없으면 NaN"""
+        close = self.columns['close']
+        base = np.where(base_index >= 0, close[np.maximum(base_index, 0)], np.nan)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            return np.where(base > 0, (close[self.last] / base - 1) * 100, np.nan)
+    
+    def reduce(self, ufunc, column, starts):
+        """종목별 [starts, ends) 구간을 ufunc으로 집계"""
+        values = np.append(self.columns[column], 0)
+        bounds = np.column_stack([starts, self.ends]).ravel()
+        return ufunc.reduceat(values, bounds)[::2]
+
+
+def _rounded(values, digits=2):
+    """NaN은 None으로 바꾼 반올림 리스트"""
+    return [None if value != value else value for value in np.round(values, digits).tolist()]
+
+
+def summarize_universe(companies, price_arrays):
+    """전 종목 요약을 한 번에 계산
+    
+    companies는 (symbol, name) 리스트, price_arrays는 get_price_arrays_batch 결과입니다.
+    각 종목의 마지막 거래일(as_of)을 기준으로 1일/1주/1/3/6개월/연초 대비/1년 수익률을 기준일 당일 또는
+    그 이전 마지막 거래일 종가로 계산하고, 52주 최고/최저가와 최근 AVG_VOLUME_DAYS거래일 평균 거래량을 구합니다.
+    종목별 반복 없이 모든 종목을 이어 붙인 배열에서 searchsorted/reduceat으로 계산합니다.
+    """
+    companies = [(symbol, name) for symbol, name in companies if symbol in price_arrays]
+    if not companies:
+        return []
+    universe = _Universe([price_arrays[symbol] for symbol, _ in companies])
+    as_of = universe.as_of
+    
+    fields = {}
+    # 1일: 직전 거래일 종가
+    previous = np.where(universe.last > universe.starts, universe.last - 1, -1)
+    fields['return_1d'] = universe.returns(previous)
+    for name, offset in RETURN_HORIZONS:
+        targets = months_ago(as_of, offset['months']) if 'months' in offset else as_of - offset['days']
+        fields[name] = universe.returns(universe.index_on_or_before(targets))
+    fields['return_ytd'] = universe.returns(universe.index_on_or_before(previous_year_end(as_of)))
+    
+    year_start = universe.index_after(months_ago(as_of, 12))
+    year_high = universe.reduce(np.fmax, 'high', year_start)
+    year_low = universe.reduce(np.fmin, 'low', year_start)
+    volume_start = np.maximum(universe.ends - AVG_VOLUME_DAYS, universe.starts)
+    avg_volume = universe.reduce(np.add, 'volume', volume_start) / (universe.ends - volume_start)
+    
+    current_prices = universe.columns['close'][universe.last].tolist()
+    as_of_dates = format_days(as_of)
+    columns = {name: _rounded(values) for name, values in fields.items()}
+    year_highs = year_high.tolist()
+    year_lows = year_low.tolist()
+    avg_volumes = np.round(avg_volume).astype(np.int64).tolist()
+    
+    summary = []
+    for i, (symbol, name) in enumerate(companies):
+        stock = {
+            'symbol': symbol,
+            'name': name,
+            'current_price': current_prices[i],
+            'as_of': as_of_dates[i]
+        }
+        for field in ('return_1d', 'return_1w', 'return_1m', 'return_3m', 'return_6m', 'return_ytd', 'return_1y'):
+            stock[field] = columns[field][i]
+        # 기존 필드: 1년 수익률 (계산할 수 없으면 0), 52주 최고/최저가
+        stock['year_return'] = columns['return_1y'][i] or 0
+        stock['year_high'] = year_highs[i]
+        stock['year_low'] = year_lows[i]
+        stock['avg_volume'] = avg_volumes[i]
+        summary.append(stock)
+    return summary
@@ -0,0 +1,86 @@
+import os
+import sys
+import shutil
+import tempfile
+import numpy as np
+import pandas as pd
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+# 지표/프로파일 파일과 app 모듈의 기본 DB가 저장소 디렉터리에 생기지 않도록 임시 디렉터리 사용
+WORK_DIR = tempfile.mkdtemp(prefix='stock_tests_')
+os.environ.setdefault('STOCK_METRICS_DIR', os.path.join(WORK_DIR, 'stock_metrics'))
+os.environ.setdefault('STOCK_PROFILE_DIR', os.path.join(WORK_DIR, 'stock_profiles'))
+
+
+def pytest_sessionfinish(session, exitstatus):
+    metrics = sys.modules.get('metrics')
+    if metrics is not None:
+        metrics.registry.flush()
+    shutil.rmtree(WORK_DIR, ignore_errors=True)
+
+
+def price_frame(start, periods, seed=0, freq='B'):
+    """start부터 periods개 봉의 임의 OHLCV DataFrame (날짜 인덱스, 기본은 평일)"""
+    rng = np.random.default_rng(seed)
+    index = pd.date_range(start, periods=periods, freq=freq)
+    closes = np.round(10000 * np.exp(np.cumsum(rng.normal(0, 0.02, periods))))
+    return pd.DataFrame({
+        'Open': closes + rng.integers(-50, 50, periods),
+        'High': closes + 100,
+        'Low': closes - 100,
+        'Close': closes,
+        'Volume': rng.integers(1000, 100000, periods)
+    }, index=index)
+
+
+@pytest.fixture
+def make_prices():
+    return price_frame
+
+
+@pytest.fixture
+def db(tmp_path):
+    from database import StockDatabase
+    database = StockDatabase(str(tmp_path / 'stock_data.db'))
+    yield database
+    database.close()
+
+
+@pytest.fixture
+def archive(tmp_path_factory):
+    """임의 시세 5종목 x 평일 365일 재생 아카이브"""
+    from replay import ReplayArchive
+    return ReplayArchive.synthetic(str(tmp_path_factory.mktemp('replay')), symbols=5, days=365)
+
+
+@pytest.fixture
+def replay_api(db, archive):
+    """업스트림 대신 archive를 읽는 StockAPIFDR"""
+    from replay import use_replay
+    from stock_api_fdr import StockAPIFDR
+    api = StockAPIFDR(db)
+    use_replay(api, archive)
+    return api
+
+
+@pytest.fixture(scope='session')
+def app_module():
+    """app 모듈 (import 시 만드는 기본 stock_data.db가 임시 디렉터리에 생기도록 그 안에서 import)"""
+    cwd = os.getcwd()
+    os.chdir(WORK_DIR)
+    try:
+        import app
+    finally:
+        os.chdir(cwd)
+    return app
+
+
+@pytest.fixture
+def client(app_module, db, monkeypatch):
+    """db fixture를 읽는 app 테스트 클라이언트"""
+    monkeypatch.setattr(app_module.stock_api, 'db', db)
+    app_module.response_cache.clear()
+    return app_module.app.test_client()
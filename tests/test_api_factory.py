@@ -0,0 +1,11 @@
+from api_factory import create_api
+from stock_api import StockAPI
+from stock_api_fdr import StockAPIFDR
+
+
+def test_create_api_selects_implementation_with_database(db):
+    fdr = create_api('fdr', db)
+    pykrx = create_api('pykrx', db)
+    
+    assert type(fdr) is StockAPIFDR and fdr.db is db
+    assert type(pykrx) is StockAPI and pykrx.db is db
@@ -0,0 +1,93 @@
+import gzip
+import json
+import numpy as np
+import pytest
+from flask import Flask, Response, jsonify
+import api_response
+
+
+@pytest.fixture(params=['orjson', 'json'])
+def serializer(request, monkeypatch):
+    """orjson 경로와 표준 json 경로를 모두 검사"""
+    if request.param == 'orjson':
+        if api_response.orjson is None:
+            pytest.skip('orjson not installed')
+    else:
+        monkeypatch.setattr(api_response, 'orjson', None)
+    return request.param
+
+
+def test_dumps_numpy_and_nan(serializer, tmp_path):
+    path = tmp_path / 'values.npy'
+    np.save(path, np.array([[1.5, np.nan, 3.0]]))
+    mapped = np.load(path, mmap_mode='r')
+    
+    data = json.loads(api_response.dumps({
+        'floats': np.array([1.5, np.nan, 3.0]),
+        'ints': np.arange(3, dtype=np.int64),
+        'memmap': mapped[0, ::2],
+        'scalar': np.float64(2.5),
+        'count': np.int64(7),
+        'name': '삼성전자'
+    }))
+    
+    assert data == {
+        'floats': [1.5, None, 3.0],
+        'ints': [0, 1, 2],
+        'memmap': [1.5, 3.0],
+        'scalar': 2.5,
+        'count': 7,
+        'name': '삼성전자'
+    }
+
+
+@pytest.fixture
+def client():
+    app = Flask(__name__)
+    api_response.init_app(app)
+    
+    @app.route('/large')
+    def large():
+        return jsonify({'prices': np.arange(2000, dtype=np.float64)})
+    
+    @app.route('/small')
+    def small():
+        return jsonify({'ok': True})
+    
+    @app.route('/stream')
+    def stream():
+        return Response((b'x' * 2000 for _ in range(2)), mimetype='text/plain')
+    
+    @app.route('/missing')
+    def missing():
+        return jsonify({'prices': list(range(2000))}), 404
+    
+    return app.test_client()
+
+
+def test_large_json_is_gzipped(client):
+    response = client.get('/large', headers={'Accept-Encoding': 'gzip'})
+    
+    assert response.headers['Content-Encoding'] == 'gzip'
+    assert 'Accept-Encoding' in response.headers['Vary']
+    assert json.loads(gzip.decompress(response.get_data()))['prices'][-1] == 1999.0
+
+
+@pytest.mark.parametrize('path, headers', [
+    ('/large', {}),
+    ('/small', {'Accept-Encoding': 'gzip'}),
+    ('/stream', {'Accept-Encoding': 'gzip'}),
+    ('/missing', {'Accept-Encoding': 'gzip'}),
+])
+def test_responses_left_uncompressed(client, path, headers):
+    response = client.get(path, headers=headers)
+    
+    assert 'Content-Encoding' not in response.headers
+
+
+def test_brotli_preferred_when_installed(client):
+    brotli = pytest.importorskip('brotli')
+    response = client.get('/large', headers={'Accept-Encoding': 'gzip, br'})
+    
+    assert response.headers['Content-Encoding'] == 'br'
+    assert json.loads(brotli.decompress(response.get_data()))['prices'][0] == 0.0
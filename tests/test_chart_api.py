@@ -0,0 +1,73 @@
+import pandas as pd
+import pytest
+
+
+@pytest.fixture
+def chart_db(db, make_prices):
+    # 000660은 거래일 하나가 빠져 공통 축에서 null이 생김
+    db.insert_stock_prices('005930', make_prices('2024-01-01', 10))
+    db.insert_stock_prices('000660', make_prices('2024-01-01', 10, seed=1).drop(pd.Timestamp('2024-01-04')))
+    db.insert_company('005930', '삼성전자', 400_000_000_000_000, 'Technology')
+    return db
+
+
+def test_batch_chart_aligns_series_on_union_axis(client, chart_db):
+    response = client.get('/api/chart-data?symbols=005930,000660,999999&days=5')
+    
+    body = response.get_json()
+    assert response.status_code == 200
+    assert body['symbols'] == ['005930', '000660']
+    assert body['missing'] == ['999999']
+    data = body['data']
+    assert data['labels'] == [f'2024-01-{day:02d}' for day in (8, 9, 10, 11, 12)]
+    assert data['series']['005930']['prices'] == chart_db.get_price_arrays('005930', days=5)['close'].tolist()
+    assert len(data['series']['000660']['volumes']) == 5
+    assert data['companies']['005930']['name'] == '삼성전자'
+    assert data['companies']['000660']['sector'] == 'Unknown'
+
+
+def test_batch_chart_marks_missing_days_null(client, chart_db):
+    data = client.get('/api/chart-data?symbols=005930,000660&days=0').get_json()['data']
+    
+    gap = data['labels'].index('2024-01-04')
+    assert data['series']['000660']['prices'][gap] is None
+    assert data['series']['000660']['volumes'][gap] is None
+    assert data['series']['005930']['prices'][gap] is not None
+
+
+def test_batch_chart_matches_single_symbol_endpoint(client, chart_db):
+    batch = client.get('/api/chart-data?symbols=005930&days=7').get_json()['data']
+    single = client.get('/api/chart-data/005930?days=7').get_json()['data']
+    
+    assert batch['labels'] == single['labels']
+    assert batch['series']['005930']['prices'] == single['prices']
+    assert batch['series']['005930']['volumes'] == single['volumes']
+
+
+@pytest.mark.parametrize('count', [0, 201])
+def test_batch_chart_rejects_symbol_count(client, chart_db, count):
+    symbols = ','.join(f'{i:06d}' for i in range(count))
+    assert client.get(f'/api/chart-data?symbols={symbols}').status_code == 400
+
+
+def test_batch_chart_not_found(client, chart_db):
+    assert client.get('/api/chart-data?symbols=999999').status_code == 404
+
+
+@pytest.mark.parametrize('symbol', ['../../etc/passwd', '..%2F005930', '00593', '005930.npy'])
+def test_batch_chart_rejects_invalid_symbols(client, chart_db, symbol):
+    response = client.get(f'/api/chart-data?symbols=005930,{symbol}')
+    
+    assert response.status_code == 400
+    assert 'Invalid symbols' in response.get_json()['error']
+
+
+def test_single_chart_resolution_and_max_points(client, chart_db):
+    weekly = client.get('/api/chart-data/005930?days=0&resolution=week').get_json()
+    sampled = client.get('/api/chart-data/005930?days=0&max_points=4').get_json()
+    
+    assert weekly['data']['labels'] == ['2024-01-01', '2024-01-08']
+    assert set(weekly['data']) >= {'opens', 'highs', 'lows'}
+    assert sampled['data_points'] == 4
+    assert sum(sampled['data']['volumes']) == sum(client.get('/api/chart-data/005930?days=0').get_json()['data']['volumes'])
+    assert client.get('/api/chart-data/005930?resolution=year').status_code == 400
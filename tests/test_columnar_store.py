@@ -0,0 +1,88 @@
+import numpy as np
+import pytest
+from columnar_store import ColumnarStore, yyyymmdd_to_days, days_to_yyyymmdd, format_days
+from database import StockDatabase
+
+
+def test_yyyymmdd_round_trip():
+    dates = np.array([19700101, 20000229, 20231231, 20240101, 20240229, 20241231])
+    
+    days = yyyymmdd_to_days(dates)
+    
+    assert days[0] == 0
+    assert np.array_equal(days_to_yyyymmdd(days), dates)
+    assert format_days(days[1:3]) == ['2000-02-29', '2023-12-31']
+
+
+def test_store_write_read_and_replace(tmp_path):
+    store = ColumnarStore(str(tmp_path / 'columns'))
+    store.write('005930', [20240102, 20240103, 20240104], [1, 2, 3], [4, 5, 6], [0, 1, 2], [2, 3, 4], [10, 20, 30])
+    
+    arrays = store.read('005930')
+    assert format_days(arrays['date']) == ['2024-01-02', '2024-01-03', '2024-01-04']
+    assert arrays['close'].tolist() == [2, 3, 4]
+    assert store.read('005930', days=2)['volume'].tolist() == [20, 30]
+    
+    # 파일이 교체되면 새로 매핑
+    store.write('005930', [20240102], [1], [4], [0], [9], [10])
+    assert store.read('005930')['close'].tolist() == [9]
+    
+    store.remove('005930')
+    assert store.read('005930') is None
+
+
+def test_columnar_cache_matches_sqlite(tmp_path, make_prices):
+    cached = StockDatabase(str(tmp_path / 'stock_data.db'))
+    df = make_prices('2024-01-01', 30)
+    cached.insert_stock_prices('005930', df)
+    cached.insert_stock_prices('005930', make_prices('2024-01-20', 15, seed=1))
+    # 컬럼 캐시 없이 같은 DB를 읽는 인스턴스
+    plain = StockDatabase(str(tmp_path / 'stock_data.db'), columnar=False)
+    
+    mapped = cached.get_price_arrays('005930', days=20)
+    queried = plain.get_price_arrays('005930', days=20)
+    
+    assert isinstance(mapped['close'], np.memmap)
+    for name in queried:
+        assert np.array_equal(mapped[name], queried[name])
+    batch = cached.get_price_arrays_batch(['005930', '000660'])
+    assert list(batch) == ['005930']
+    assert len(batch['005930']['date']) == cached.get_symbol_stats()['005930']['row_count']
+    cached.close()
+    plain.close()
+
+
+def test_rebuild_columnar_store(tmp_path, make_prices):
+    db = StockDatabase(str(tmp_path / 'stock_data.db'))
+    db.insert_stock_prices('005930', make_prices('2024-01-01', 10))
+    db.insert_stock_prices('000660', make_prices('2024-01-01', 5))
+    db.columns.remove('005930')
+    db.columns.remove('000660')
+    
+    assert db.rebuild_columnar_store() == 2
+    assert len(db.columns.read('000660')['date']) == 5
+    db.close()
+
+
+@pytest.mark.parametrize('columnar', [True, False])
+def test_missing_symbol_has_no_arrays(tmp_path, columnar):
+    db = StockDatabase(str(tmp_path / 'stock_data.db'), columnar=columnar)
+    assert db.get_price_arrays('005930') is None
+    assert db.get_price_arrays_batch(['005930']) == {}
+    db.close()
+
+
+def test_store_rejects_path_traversal_symbols(tmp_path, make_prices):
+    store = ColumnarStore(str(tmp_path / 'columns'))
+    # 디렉터리 밖의 .npy 파일
+    np.save(tmp_path / 'outside.npy', np.zeros((6, 3)))
+    
+    with pytest.raises(ValueError):
+        store.path('../outside')
+    assert store.read('../outside') is None
+    
+    db = StockDatabase(str(tmp_path / 'stock_data.db'))
+    db.insert_stock_prices('005930', make_prices('2024-01-01', 5))
+    assert list(db.get_price_arrays_batch(['005930', '../outside'])) == ['005930']
+    assert db.get_price_arrays('../outside') is None
+    db.close()
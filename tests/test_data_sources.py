@@ -0,0 +1,196 @@
+import threading
+import time
+from datetime import datetime, timedelta
+import pandas as pd
+import pytest
+import fetch_pipeline
+from data_sources import CircuitBreaker, DataSource, SourceRouter, SourceUnavailableError
+from replay import ReplaySource
+from stock_api_fdr import StockAPIFDR
+
+
+def frame(close):
+    return pd.DataFrame(
+        {'Open': [close], 'High': [close], 'Low': [close], 'Close': [close], 'Volume': [1]},
+        index=pd.DatetimeIndex(['2024-01-02'])
+    )
+
+
+class FakeSource(DataSource):
+    """지정한 지연 시간 뒤 고정된 종가를 반환하거나 실패하는 소스"""
+    
+    def __init__(self, name, close=100.0, delay=0.0, fail=False):
+        super().__init__(name)
+        fetch_pipeline.configure_limiter(name, rate=10000, burst=10000, max_in_flight=64)
+        self.close = close
+        self.delay = delay
+        self.fail = fail
+        self.calls = 0
+    
+    def read(self, symbol, start_date, end_date):
+        self.calls += 1
+        time.sleep(self.delay)
+        if self.fail:
+            raise ConnectionError(f"{self.name} down")
+        return frame(self.close)
+
+
+def fetch(router):
+    return router.fetch('005930', datetime(2024, 1, 1), datetime(2024, 1, 31))['Close'].iloc[-1]
+
+
+def opened(breaker):
+    for _ in range(breaker.failure_threshold):
+        breaker.record_failure()
+    return breaker
+
+
+def test_breaker_opens_after_threshold():
+    breaker = CircuitBreaker('test', failure_threshold=3, reset_timeout=60)
+    breaker.record_failure()
+    breaker.record_failure()
+    assert breaker.state == 'closed' and breaker.allow()
+    
+    breaker.record_failure()
+    assert breaker.state == 'open'
+    assert not breaker.allow() and not breaker.available()
+
+
+def test_half_open_allows_single_probe():
+    breaker = opened(CircuitBreaker('test', failure_threshold=2, reset_timeout=0.05))
+    time.sleep(0.06)
+    assert breaker.state == 'half_open' and breaker.available()
+    
+    barrier = threading.Barrier(8)
+    allowed = []
+    
+    def call():
+        barrier.wait()
+        allowed.append(breaker.allow())
+    
+    threads = [threading.Thread(target=call) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    
+    assert allowed.count(True) == 1
+    assert not breaker.available()
+    breaker.record_success()
+    assert breaker.state == 'closed'
+    assert all(breaker.allow() for _ in range(3))
+
+
+def test_failed_probe_reopens():
+    breaker = opened(CircuitBreaker('test', failure_threshold=2, reset_timeout=0.05))
+    time.sleep(0.06)
+    assert breaker.allow()
+    
+    breaker.record_failure()
+    
+    assert breaker.state == 'open' and not breaker.allow()
+
+
+def test_stale_probe_expires():
+    breaker = opened(CircuitBreaker('test', failure_threshold=2, reset_timeout=0.05))
+    time.sleep(0.06)
+    assert breaker.allow()
+    # 시험 호출 결과가 기록되지 않아도 reset_timeout 뒤 다시 시험 호출 허용
+    time.sleep(0.06)
+    assert breaker.allow()
+
+
+def test_source_fails_fast_while_probe_in_flight():
+    source = FakeSource('probe-test', delay=0.3)
+    source.breaker.reset_timeout = 0.2
+    opened(source.breaker)
+    time.sleep(0.21)
+    
+    probe = threading.Thread(target=source.fetch, args=('005930', None, None))
+    probe.start()
+    time.sleep(0.02)
+    with pytest.raises(SourceUnavailableError):
+        source.fetch('005930', None, None)
+    probe.join()
+    
+    assert source.calls == 1
+    assert source.breaker.state == 'closed'
+    assert source.stats.errors == 0
+
+
+def test_router_falls_back_to_next_source():
+    broken = FakeSource('broken-test', fail=True)
+    backup = FakeSource('backup-test', close=200.0)
+    router = SourceRouter([broken, backup], hedge=False)
+    
+    assert fetch(router) == 200.0
+    assert broken.stats.errors == 1
+
+
+def test_router_skips_open_breaker():
+    broken = FakeSource('skipped-test', fail=True)
+    opened(broken.breaker)
+    router = SourceRouter([broken, FakeSource('healthy-test', close=300.0)], hedge=False)
+    
+    assert fetch(router) == 300.0
+    assert broken.calls == 0
+
+
+def test_router_raises_when_all_sources_open():
+    source = FakeSource('closed-test')
+    opened(source.breaker)
+    
+    with pytest.raises(SourceUnavailableError):
+        fetch(SourceRouter([source]))
+
+
+def test_router_raises_when_all_sources_fail():
+    router = SourceRouter([FakeSource('fail-a-test', fail=True), FakeSource('fail-b-test', fail=True)], hedge=False)
+    
+    with pytest.raises(RuntimeError, match='fail-a-test.*fail-b-test'):
+        fetch(router)
+
+
+def test_router_hedges_slow_source(monkeypatch):
+    monkeypatch.setattr(SourceRouter, 'DEFAULT_HEDGE_DELAY', 0.05)
+    slow = FakeSource('slow-test', close=1.0, delay=0.5)
+    fast = FakeSource('fast-test', close=2.0)
+    router = SourceRouter([slow, fast])
+    
+    assert fetch(router) == 2.0
+    assert (router.hedges, router.hedge_wins) == (1, 1)
+
+
+def test_router_prefers_lower_latency():
+    slow = FakeSource('ranked-slow-test')
+    fast = FakeSource('ranked-fast-test', close=2.0)
+    for _ in range(slow.stats.MIN_SAMPLES):
+        slow.stats.record(1.0, True)
+        fast.stats.record(0.01, True)
+    
+    assert fetch(SourceRouter([slow, fast], hedge=False)) == 2.0
+    assert slow.calls == 0
+
+
+def test_router_timeout(monkeypatch):
+    monkeypatch.setattr(SourceRouter, 'TIMEOUT', 0.05)
+    
+    with pytest.raises(TimeoutError):
+        fetch(SourceRouter([FakeSource('hung-test', delay=0.3)], hedge=False))
+
+
+def test_company_info_goes_through_router(db, archive):
+    api = StockAPIFDR(db)
+    source = ReplaySource(archive)
+    api.sources = SourceRouter([source], hedge=False)
+    symbol = archive.symbols()[0]
+    
+    info = api.get_company_info(symbol)
+    
+    assert info['market_cap'] == archive.load_prices(symbol)['Close'].iloc[-1] * 5969782550
+    assert source.stats.calls == 1
+    
+    # 회로가 열려 있으면 업스트림을 호출하지 않고 기본값
+    opened(source.breaker)
+    assert api.get_company_info(symbol)['market_cap'] == 0
+    assert source.stats.calls == 1
@@ -0,0 +1,272 @@
+import sqlite3
+import threading
+import pandas as pd
+import pytest
+from database import StockDatabase
+
+
+def stored_rows(db, symbol):
+    return db.get_connection().execute(
+        "SELECT date, open_price, high_price, low_price, close_price, volume FROM stock_prices WHERE symbol = ? ORDER BY date",
+        (symbol,)
+    ).fetchall()
+
+
+def test_insert_stock_prices_stores_every_row(db, make_prices):
+    df = make_prices('2024-01-01', 30)
+    
+    assert db.insert_stock_prices('005930', df)
+    
+    rows = stored_rows(db, '005930')
+    assert len(rows) == 30
+    assert rows[0][0] == 20240101
+    assert rows[-1][4] == df['Close'].iloc[-1]
+    assert rows[-1][5] == int(df['Volume'].iloc[-1])
+
+
+def test_insert_stock_prices_upserts_overlapping_dates(db, make_prices):
+    db.insert_stock_prices('005930', make_prices('2024-01-01', 10))
+    update = make_prices('2024-01-08', 10, seed=1)
+    
+    assert db.insert_stock_prices('005930', update)
+    
+    rows = stored_rows(db, '005930')
+    # 1/1~1/12 평일 10개 + 겹치지 않는 1/15~1/19 5개
+    assert len(rows) == 15
+    closes = {date: close for date, _, _, _, close, _ in rows}
+    assert closes[20240108] == update['Close'].iloc[0]
+    assert closes[20240119] == update['Close'].iloc[-1]
+
+
+def test_insert_stock_prices_accepts_string_index_and_empty_frame(db, make_prices):
+    df = make_prices('2024-03-04', 5)
+    df.index = df.index.strftime('%Y-%m-%d')
+    
+    assert db.insert_stock_prices('000660', df)
+    assert db.insert_stock_prices('000660', pd.DataFrame())
+    assert [row[0] for row in stored_rows(db, '000660')] == [20240304, 20240305, 20240306, 20240307, 20240308]
+
+
+def test_insert_stock_prices_rolls_back_whole_frame_on_error(db, make_prices):
+    db.insert_stock_prices('005930', make_prices('2024-01-01', 5))
+    conn = db.get_connection()
+    # 두 번째 행에서 실패하도록 트리거 설정: 앞 행의 upsert도 함께 취소되어야 함
+    conn.execute('''
+    CREATE TRIGGER reject_price BEFORE INSERT ON stock_prices
+    WHEN NEW.date = 20240109 BEGIN SELECT RAISE(ABORT, 'rejected'); END
+    ''')
+    
+    assert not db.insert_stock_prices('005930', make_prices('2024-01-08', 3, seed=2))
+    
+    assert [row[0] for row in stored_rows(db, '005930')] == [20240101, 20240102, 20240103, 20240104, 20240105]
+
+
+def test_connections_are_reused_per_thread(db):
+    assert db.get_connection() is db.get_connection()
+    assert db.get_connection(readonly=True) is not db.get_connection()
+    
+    other = []
+    thread = threading.Thread(target=lambda: other.append(db.get_connection()))
+    thread.start()
+    thread.join()
+    assert other[0] is not db.get_connection()
+
+
+def test_connection_pragmas(db):
+    conn = db.get_connection()
+    
+    assert conn.execute("PRAGMA journal_mode").fetchone()[0] == 'wal'
+    assert conn.execute("PRAGMA busy_timeout").fetchone()[0] == db.BUSY_TIMEOUT_MS
+    # NORMAL = 1
+    assert conn.execute("PRAGMA synchronous").fetchone()[0] == 1
+
+
+def test_readonly_connection_rejects_writes(db):
+    with pytest.raises(sqlite3.OperationalError):
+        db.get_connection(readonly=True).execute("DELETE FROM companies")
+
+
+def test_close_reopens_connection(db):
+    conn = db.get_connection()
+    
+    db.close()
+    
+    assert db.get_connection() is not conn
+    assert db.insert_company('005930', '삼성전자')
+
+
+LEGACY_SCHEMA = '''
+CREATE TABLE companies (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    symbol TEXT UNIQUE NOT NULL,
+    name TEXT NOT NULL,
+    market_cap REAL,
+    sector TEXT,
+    created_at DATETIME DEFAULT CURRENT_TIMESTAMP
+);
+CREATE TABLE stock_prices (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    symbol TEXT NOT NULL,
+    date DATE NOT NULL,
+    open_price REAL,
+    high_price REAL,
+    low_price REAL,
+    close_price REAL,
+    volume INTEGER,
+    created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+    UNIQUE(symbol, date)
+);
+'''
+
+
+@pytest.fixture
+def legacy_db(tmp_path):
+    """스키마 버전이 없는 초기 형식 DB (문자열 날짜, 시각이 붙은 날짜 포함)"""
+    path = str(tmp_path / 'legacy.db')
+    conn = sqlite3.connect(path)
+    conn.executescript(LEGACY_SCHEMA)
+    conn.execute("INSERT INTO companies (symbol, name) VALUES ('005930', '삼성전자')")
+    conn.executemany(
+        "INSERT INTO stock_prices (symbol, date, open_price, high_price, low_price, close_price, volume) VALUES (?, ?, ?, ?, ?, ?, ?)",
+        [
+            ('005930', '2024-01-04', 100, 110, 90, 105, 1000),
+            ('005930', '2024-01-05', 105, 115, 95, 110, 2000),
+            # 같은 날짜가 시각이 붙은 문자열로 다시 저장된 행 (나중 행이 최신 값)
+            ('005930', '2024-01-05 00:00:00', 105, 116, 95, 111, 2100),
+            ('000660', '2024-01-05', 50, 55, 45, 52, 500),
+        ]
+    )
+    conn.commit()
+    conn.close()
+    return path
+
+
+def test_migration_upgrades_legacy_database(legacy_db):
+    db = StockDatabase(legacy_db)
+    
+    assert db.get_schema_version() == StockDatabase.SCHEMA_VERSION
+    assert stored_rows(db, '005930') == [
+        (20240104, 100, 110, 90, 105, 1000),
+        (20240105, 105, 116, 95, 111, 2100)
+    ]
+    assert db.get_last_dates() == {'005930': '2024-01-05', '000660': '2024-01-05'}
+    stats = db.get_symbol_stats()['005930']
+    assert (stats['row_count'], stats['latest_close'], stats['prev_close']) == (2, 111, 105)
+    # 기존 회사는 상장 상태로 유니버스에 포함
+    assert db.get_universe() == [('005930', '삼성전자')]
+    # 컬럼 캐시도 기존 데이터로 채워짐
+    assert db.get_price_arrays('005930')['close'].tolist() == [105, 111]
+    db.close()
+
+
+def test_migration_runs_once(legacy_db, capsys):
+    StockDatabase(legacy_db).close()
+    capsys.readouterr()
+    db = StockDatabase(legacy_db)
+    
+    assert 'Migrating' not in capsys.readouterr().out
+    assert len(stored_rows(db, '005930')) == 2
+    db.close()
+
+
+def test_init_schema_false_skips_migration(legacy_db, capsys):
+    # gunicorn 마스터가 마이그레이션을 마친 뒤 작업자는 스키마를 건드리지 않음
+    db = StockDatabase(legacy_db, init_schema=False)
+    
+    assert db.get_schema_version() == 0
+    assert 'Migrating' not in capsys.readouterr().out
+    db.close()
+
+
+
+def recomputed_stats(db, symbol):
+    """stock_prices 전체에서 직접 계산한 요약 통계"""
+    conn = db.get_connection()
+    count, close_count, first_date, min_close, max_close, sum_close = conn.execute(
+        "SELECT COUNT(*), COUNT(close_price), MIN(date), MIN(close_price), MAX(close_price), SUM(close_price) "
+        "FROM stock_prices WHERE symbol = ?",
+        (symbol,)
+    ).fetchone()
+    latest = conn.execute(
+        "SELECT date, close_price, volume FROM stock_prices WHERE symbol = ? ORDER BY date DESC LIMIT 2", (symbol,)
+    ).fetchall()
+    return {
+        'row_count': count,
+        'first_date': f"{first_date // 10000:04d}-{first_date // 100 % 100:02d}-{first_date % 100:02d}",
+        'latest_date': f"{latest[0][0] // 10000:04d}-{latest[0][0] // 100 % 100:02d}-{latest[0][0] % 100:02d}",
+        'latest_close': latest[0][1],
+        'latest_volume': latest[0][2],
+        'prev_close': latest[1][1] if len(latest) > 1 else None,
+        'min_close': min_close,
+        'max_close': max_close,
+        'avg_close': pytest.approx(sum_close / close_count)
+    }
+
+
+def test_symbol_stats_match_full_recompute_after_upserts(db, make_prices):
+    frames = [
+        make_prices('2024-01-01', 40),
+        # 겹치는 구간 갱신 (기존 최소/최대 종가가 바뀔 수 있음)
+        make_prices('2024-01-15', 20, seed=1),
+        # 과거 구간 추가 (first_date 갱신)
+        make_prices('2023-11-01', 10, seed=2),
+        # 최신 봉 하나
+        make_prices('2024-03-01', 1, seed=3),
+    ]
+    for df in frames:
+        db.insert_stock_prices('005930', df)
+        stats = db.get_symbol_stats()['005930']
+        assert {key: stats[key] for key in recomputed_stats(db, '005930')} == recomputed_stats(db, '005930')
+
+
+def test_symbol_stats_recomputed_when_extreme_close_is_overwritten(db, make_prices):
+    df = make_prices('2024-01-01', 10)
+    db.insert_stock_prices('005930', df)
+    highest = df['Close'].idxmax()
+    lowered = df.loc[[highest]].assign(Close=df['Close'].min() + 1)
+    
+    db.insert_stock_prices('005930', lowered)
+    
+    stats = db.get_symbol_stats()['005930']
+    assert stats['max_close'] == recomputed_stats(db, '005930')['max_close'] < df['Close'].max()
+
+
+def test_single_price_insert_updates_stats(db):
+    db.insert_stock_price('005930', '2024-01-02', 100, 110, 90, 105, 1000)
+    db.insert_stock_price('005930', '2024-01-03 00:00:00', 105, 120, 100, 115, 2000)
+    
+    stats = db.get_symbol_stats()['005930']
+    
+    assert (stats['latest_date'], stats['latest_close'], stats['prev_close'], stats['row_count']) == ('2024-01-03', 115, 105, 2)
+
+
+def test_missing_closes_are_stored_and_excluded_from_stats(db, make_prices):
+    db.insert_stock_prices('005930', make_prices('2024-01-01', 5))
+    # 기존 구간 갱신과 새 구간 추가에 NaN 종가가 섞인 프레임
+    update = make_prices('2024-01-04', 4, seed=1)
+    update.iloc[0, update.columns.get_loc('Close')] = float('nan')
+    update.iloc[2, update.columns.get_loc('Close')] = float('nan')
+    
+    assert db.insert_stock_prices('005930', update)
+    assert db.insert_stock_price('005930', '2024-01-11', 100, 110, 90, None, 1000)
+    
+    rows = stored_rows(db, '005930')
+    assert len(rows) == 8
+    assert [row[4] is None for row in rows].count(True) == 3
+    stats = db.get_symbol_stats()['005930']
+    expected = recomputed_stats(db, '005930')
+    assert {key: stats[key] for key in expected} == expected
+    assert stats['avg_close'] == pytest.approx(sum(row[4] for row in rows if row[4] is not None) / 5)
+
+
+def test_missing_close_averages_with_first_insert(db):
+    df = pd.DataFrame({
+        'Open': [1.0, 2.0, 3.0], 'High': [1.0, 2.0, 3.0], 'Low': [1.0, 2.0, 3.0],
+        'Close': [1.0, float('nan'), 3.0], 'Volume': [10, 20, 30]
+    }, index=pd.to_datetime(['2024-01-02', '2024-01-03', '2024-01-04']))
+    
+    assert db.insert_stock_prices('005930', df)
+    assert db.insert_stock_prices('005930', df.iloc[1:].assign(Close=[float('nan'), 5.0]))
+    
+    stats = db.get_symbol_stats()['005930']
+    assert (stats['row_count'], stats['avg_close'], stats['max_close']) == (3, 3.0, 5.0)
@@ -0,0 +1,103 @@
+import numpy as np
+import pandas as pd
+import pytest
+from columnar_store import yyyymmdd_to_days
+from downsample import bucket_ohlc, lttb_indices, downsample
+
+
+def reference_lttb(x, y, max_points):
+    """원 논문 그대로의 반복문 LTTB (버킷 경계는 lttb_indices와 같은 방식)"""
+    n = len(y)
+    edges = [int(i * (n - 2) / (max_points - 2)) + 1 for i in range(max_points - 1)]
+    edges[-1] = n - 1
+    selected = [0]
+    a = 0
+    for i in range(max_points - 2):
+        start, end = edges[i], edges[i + 1]
+        next_start = end
+        next_end = edges[i + 2] if i + 2 < len(edges) else n
+        avg_x = np.mean(x[next_start:next_end])
+        avg_y = np.mean(y[next_start:next_end])
+        areas = [abs((x[a] - avg_x) * (y[j] - y[a]) - (x[a] - x[j]) * (avg_y - y[a])) for j in range(start, end)]
+        a = start + int(np.argmax(areas))
+        selected.append(a)
+    selected.append(n - 1)
+    return np.array(selected)
+
+
+def to_days(index):
+    return yyyymmdd_to_days(pd.DatetimeIndex(index).strftime('%Y%m%d').astype(int))
+
+
+def daily_arrays(frame):
+    return {
+        'date': to_days(frame.index),
+        'open': frame['Open'].to_numpy(dtype=float),
+        'high': frame['High'].to_numpy(dtype=float),
+        'low': frame['Low'].to_numpy(dtype=float),
+        'close': frame['Close'].to_numpy(dtype=float),
+        'volume': frame['Volume'].to_numpy(dtype=float)
+    }
+
+
+@pytest.mark.parametrize('n, max_points', [(1000, 100), (257, 3), (500, 499), (37, 10)])
+def test_lttb_matches_reference(n, max_points):
+    rng = np.random.default_rng(n)
+    x = np.arange(n, dtype=float)
+    y = np.cumsum(rng.normal(size=n))
+    
+    indices = lttb_indices(x, y, max_points)
+    
+    assert len(indices) == max_points
+    assert indices[0] == 0 and indices[-1] == n - 1
+    assert np.all(np.diff(indices) > 0)
+    assert np.array_equal(indices, reference_lttb(x, y, max_points))
+
+
+def test_lttb_short_series_kept():
+    assert lttb_indices([0, 1, 2], [1, 2, 3], 10).tolist() == [0, 1, 2]
+    assert lttb_indices([0, 1, 2, 3], [1, 5, 2, 3], 2).tolist() == [0, 3]
+
+
+def test_lttb_keeps_spike():
+    y = np.zeros(1000)
+    y[613] = 100
+    assert 613 in lttb_indices(np.arange(1000), y, 50)
+
+
+@pytest.mark.parametrize('resolution, period', [('week', 'W'), ('month', 'M')])
+def test_bucket_ohlc_matches_pandas_groupby(make_prices, resolution, period):
+    frame = make_prices('2023-12-20', 120)
+    
+    buckets = bucket_ohlc(daily_arrays(frame), resolution)
+    
+    # 주 기간은 월요일~일요일
+    grouped = frame.groupby(frame.index.to_period(period))
+    expected = pd.DataFrame({
+        'open': grouped['Open'].first(),
+        'high': grouped['High'].max(),
+        'low': grouped['Low'].min(),
+        'close': grouped['Close'].last(),
+        'volume': grouped['Volume'].sum()
+    })
+    assert np.array_equal(buckets['date'], to_days(grouped.apply(lambda g: g.index[0])))
+    for name in ('open', 'high', 'low', 'close', 'volume'):
+        assert np.array_equal(buckets[name], expected[name].to_numpy(dtype=float)), name
+
+
+def test_bucket_ohlc_rejects_unknown_resolution(make_prices):
+    with pytest.raises(ValueError):
+        bucket_ohlc(daily_arrays(make_prices('2024-01-01', 5)), 'year')
+
+
+def test_downsample_preserves_volume_and_endpoints(make_prices):
+    arrays = daily_arrays(make_prices('2020-01-01', 1500))
+    
+    sampled = downsample(arrays, max_points=200)
+    
+    assert len(sampled['date']) == 200
+    assert sampled['date'][0] == arrays['date'][0] and sampled['date'][-1] == arrays['date'][-1]
+    assert sampled['volume'].sum() == arrays['volume'].sum()
+    assert set(sampled['close']) <= set(arrays['close'])
+    # 점 수가 충분하면 그대로 반환
+    assert downsample(arrays, max_points=5000) is arrays
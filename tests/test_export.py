@@ -0,0 +1,86 @@
+import csv
+import io
+import json
+from datetime import date, datetime
+import pytest
+from database import encode_date, EXPORT_COLUMNS
+from exporter import stream_export
+
+pa = pytest.importorskip('pyarrow')
+
+
+@pytest.mark.parametrize('value, expected', [
+    ('2024-01-05', 20240105),
+    ('2024-01-05 00:00:00', 20240105),
+    (date(2024, 1, 5), 20240105),
+    (datetime(2024, 1, 5, 15, 30), 20240105),
+    (20240105, 20240105),
+])
+def test_encode_date(value, expected):
+    assert encode_date(value) == expected
+
+
+@pytest.mark.parametrize('value', ['2024-1-5', '2024-13-01', '2024-02-30', 'latest', ''])
+def test_encode_date_rejects_malformed(value):
+    with pytest.raises(ValueError):
+        encode_date(value)
+
+
+@pytest.fixture
+def filled_db(db, make_prices):
+    db.insert_stock_prices('005930', make_prices('2024-01-01', 30))
+    db.insert_stock_prices('000660', make_prices('2024-01-01', 30, seed=1))
+    return db
+
+
+def test_iter_stock_prices_filters_and_chunks(filled_db):
+    chunks = list(filled_db.iter_stock_prices(['000660'], '2024-01-03', '2024-01-12', chunk_size=3))
+    
+    rows = [row for chunk in chunks for row in chunk]
+    assert [len(chunk) for chunk in chunks] == [3, 3, 2]
+    assert {row[0] for row in rows} == {'000660'}
+    assert (rows[0][1], rows[-1][1]) == ('2024-01-03', '2024-01-12')
+
+
+def rows_of(db):
+    return [row for chunk in db.iter_stock_prices() for row in chunk]
+
+
+def test_formats_round_trip(filled_db):
+    expected = rows_of(filled_db)
+    
+    ndjson = b''.join(stream_export(filled_db.iter_stock_prices(chunk_size=7), 'ndjson')).decode()
+    assert [tuple(json.loads(line).values()) for line in ndjson.splitlines()] == expected
+    
+    text = b''.join(stream_export(filled_db.iter_stock_prices(chunk_size=7), 'csv')).decode()
+    reader = csv.reader(io.StringIO(text))
+    assert tuple(next(reader)) == EXPORT_COLUMNS
+    assert [row[:2] for row in reader] == [list(row[:2]) for row in expected]
+    
+    data = b''.join(stream_export(filled_db.iter_stock_prices(chunk_size=7), 'arrow'))
+    table = pa.ipc.open_stream(data).read_all()
+    assert table.num_rows == len(expected)
+    assert table.column('close_price').to_pylist() == [row[5] for row in expected]
+
+
+def test_unknown_format_rejected(filled_db):
+    with pytest.raises(ValueError):
+        stream_export(filled_db.iter_stock_prices(), 'xml')
+
+
+def test_export_endpoint_streams(client, filled_db):
+    response = client.get('/api/export?format=csv&symbols=005930&start=2024-01-08&end=2024-01-09')
+    
+    assert response.status_code == 200
+    assert response.headers['Content-Disposition'] == 'attachment; filename=stock_prices.csv'
+    assert response.get_data(as_text=True).splitlines()[1:] == [
+        ','.join(map(str, row)) for row in rows_of(filled_db) if row[0] == '005930' and '2024-01-08' <= row[1] <= '2024-01-09'
+    ]
+
+
+@pytest.mark.parametrize('query', ['start=2024-1-5', 'end=2024-01-5', 'start=yesterday', 'format=xml'])
+def test_export_endpoint_rejects_bad_parameters(client, filled_db, query):
+    response = client.get(f'/api/export?{query}')
+    
+    assert response.status_code == 400
+    assert response.get_json()['success'] is False
@@ -0,0 +1,107 @@
+import time
+import threading
+import pytest
+import fetch_pipeline
+from fetch_pipeline import RateLimiter, call_with_retry, run_pipeline, run_in_batches
+
+
+def test_rate_limiter_allows_burst_then_paces_calls():
+    limiter = RateLimiter('test', rate=20, burst=2, max_in_flight=4)
+    
+    started = time.monotonic()
+    for _ in range(6):
+        with limiter:
+            pass
+    elapsed = time.monotonic() - started
+    
+    # 처음 2개는 바로, 나머지 4개는 초당 20개 속도 (약 0.2초)
+    assert 0.15 <= elapsed < 1.0
+
+
+def test_rate_limiter_caps_in_flight_calls():
+    limiter = RateLimiter('test', rate=1000, burst=1000, max_in_flight=2)
+    lock = threading.Lock()
+    active = [0]
+    peak = [0]
+    
+    def work():
+        with limiter:
+            with lock:
+                active[0] += 1
+                peak[0] = max(peak[0], active[0])
+            time.sleep(0.02)
+            with lock:
+                active[0] -= 1
+    
+    threads = [threading.Thread(target=work) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    
+    assert peak[0] == 2
+
+
+def test_get_limiter_is_shared_and_configurable():
+    fetch_pipeline.configure_limiter('unit-test', rate=5, burst=3, max_in_flight=1)
+    
+    limiter = fetch_pipeline.get_limiter('unit-test')
+    
+    assert limiter is fetch_pipeline.get_limiter('unit-test')
+    assert (limiter.rate, limiter.burst, limiter.max_in_flight) == (5, 3, 1)
+
+
+def test_call_with_retry_retries_then_succeeds(monkeypatch):
+    monkeypatch.setattr(fetch_pipeline.time, 'sleep', lambda seconds: None)
+    calls = []
+    
+    def flaky():
+        calls.append(1)
+        if len(calls) < 3:
+            raise ConnectionError('temporary')
+        return 'ok'
+    
+    assert call_with_retry(flaky, retries=3) == 'ok'
+    assert len(calls) == 3
+
+
+def test_call_with_retry_raises_last_error(monkeypatch):
+    monkeypatch.setattr(fetch_pipeline.time, 'sleep', lambda seconds: None)
+    calls = []
+    
+    def failing():
+        calls.append(1)
+        raise ConnectionError(f'failure {len(calls)}')
+    
+    with pytest.raises(ConnectionError, match='failure 3'):
+        call_with_retry(failing, retries=2)
+
+
+def test_run_pipeline_reports_progress_and_worker_errors():
+    progress = []
+    
+    def worker(item):
+        if item == 3:
+            raise ValueError('bad item')
+        return {'item': item, 'success': True}
+    
+    results = run_pipeline(range(5), worker, max_workers=3, progress_callback=lambda *args: progress.append(args[:2]))
+    
+    assert sorted(result['item'] for result in results) == [0, 1, 2, 3, 4]
+    assert [result for result in results if not result['success']][0]['error'] == 'bad item'
+    assert sorted(progress) == [(done, 5) for done in range(1, 6)]
+
+
+def test_run_in_batches_calls_back_per_batch_with_cumulative_progress():
+    batches = []
+    progress = []
+    
+    results = run_in_batches(
+        range(7), lambda item: {'item': item}, batch_size=3, max_workers=2,
+        progress_callback=lambda done, total, item, result: progress.append((done, total)),
+        batch_callback=lambda batch: batches.append(sorted(result['item'] for result in batch))
+    )
+    
+    assert len(results) == 7
+    assert batches == [[0, 1, 2], [3, 4, 5], [6]]
+    assert sorted(progress) == [(done, 7) for done in range(1, 8)]
@@ -0,0 +1,90 @@
+import time
+import pytest
+from flask import Flask, jsonify
+import http_cache
+from http_cache import APP_BUILD, conditional_get
+
+
+@pytest.fixture
+def client():
+    state = {'version': 3, 'updated_at': time.time() - 100, 'calls': 0}
+    app = Flask(__name__)
+    
+    @app.route('/data')
+    @conditional_get(lambda: (state['version'], state['updated_at']))
+    def data():
+        state['calls'] += 1
+        return jsonify({'version': state['version']})
+    
+    @app.route('/missing')
+    @conditional_get(lambda: (state['version'], state['updated_at']))
+    def missing():
+        return jsonify({'error': 'not found'}), 404
+    
+    client = app.test_client()
+    client.state = state
+    return client
+
+
+def test_response_carries_validators(client):
+    response = client.get('/data')
+    
+    assert response.status_code == 200
+    assert response.headers['ETag'] == f'W/"v3-{APP_BUILD}"'
+    assert response.last_modified is not None
+    assert 'max-age' in response.headers['Cache-Control']
+
+
+def test_matching_etag_returns_304_without_running_view(client):
+    etag = client.get('/data').headers['ETag']
+    
+    response = client.get('/data', headers={'If-None-Match': etag})
+    
+    assert response.status_code == 304
+    assert response.data == b''
+    assert client.state['calls'] == 1
+
+
+def test_if_modified_since_returns_304(client):
+    last_modified = client.get('/data').headers['Last-Modified']
+    
+    assert client.get('/data', headers={'If-Modified-Since': last_modified}).status_code == 304
+
+
+def test_new_version_invalidates_validators(client):
+    etag = client.get('/data').headers['ETag']
+    client.state['version'] += 1
+    client.state['updated_at'] = time.time()
+    
+    response = client.get('/data', headers={'If-None-Match': etag})
+    
+    assert response.status_code == 200
+    assert response.headers['ETag'] == f'W/"v4-{APP_BUILD}"'
+
+
+def test_etag_takes_precedence_over_if_modified_since(client):
+    last_modified = client.get('/data').headers['Last-Modified']
+    
+    response = client.get('/data', headers={'If-None-Match': 'W/"v1"', 'If-Modified-Since': last_modified})
+    
+    assert response.status_code == 200
+
+
+def test_error_responses_are_not_cacheable(client):
+    response = client.get('/missing')
+    
+    assert response.status_code == 404
+    assert 'ETag' not in response.headers
+
+
+def test_new_build_invalidates_validators(client, monkeypatch):
+    # 데이터 버전은 같고 응답 형식이 바뀐 배포
+    first = client.get('/data')
+    monkeypatch.setattr(http_cache, 'APP_BUILD', 'next')
+    monkeypatch.setattr(http_cache, 'BUILD_TIME', time.time() + 10)
+    
+    response = client.get('/data', headers={'If-None-Match': first.headers['ETag']})
+    
+    assert response.status_code == 200
+    assert response.headers['ETag'] == 'W/"v3-next"'
+    assert client.get('/data', headers={'If-Modified-Since': first.headers['Last-Modified']}).status_code == 200
@@ -0,0 +1,148 @@
+import numpy as np
+import pandas as pd
+import pytest
+from indicators import INDICATOR_NAMES, RSI_PERIOD, TAIL_SIZE, compute_indicators, update_indicators, ewm
+
+
+def closes(n, seed=0):
+    rng = np.random.default_rng(seed)
+    return np.round(10000 * np.exp(np.cumsum(rng.normal(0, 0.02, n))))
+
+
+def assert_indicators_close(actual, expected):
+    for name in INDICATOR_NAMES:
+        assert np.allclose(actual[name], expected[name], equal_nan=True, rtol=1e-9, atol=1e-6), name
+
+
+def test_matches_pandas_reference():
+    prices = pd.Series(closes(300))
+    
+    values, _ = compute_indicators(prices.to_numpy())
+    
+    assert np.allclose(values['sma20'], prices.rolling(20).mean(), equal_nan=True)
+    assert np.allclose(values['ema12'], prices.ewm(span=12, adjust=False).mean())
+    macd = prices.ewm(span=12, adjust=False).mean() - prices.ewm(span=26, adjust=False).mean()
+    assert np.allclose(values['macd_signal'], macd.ewm(span=9, adjust=False).mean())
+    std = prices.rolling(20).std(ddof=0)
+    assert np.allclose(values['bb_upper'], prices.rolling(20).mean() + 2 * std, equal_nan=True)
+    
+    # Wilder RSI: 첫 RSI_PERIOD개 변동의 단순평균 이후 1/RSI_PERIOD 평활
+    deltas = prices.diff()
+    gain = deltas.clip(lower=0).to_numpy()
+    loss = (-deltas).clip(lower=0).to_numpy()
+    avg_gain, avg_loss = gain[1:RSI_PERIOD + 1].mean(), loss[1:RSI_PERIOD + 1].mean()
+    expected = [np.nan] * RSI_PERIOD + [100 - 100 / (1 + avg_gain / avg_loss)]
+    for g, l in zip(gain[RSI_PERIOD + 1:], loss[RSI_PERIOD + 1:]):
+        avg_gain = (avg_gain * (RSI_PERIOD - 1) + g) / RSI_PERIOD
+        avg_loss = (avg_loss * (RSI_PERIOD - 1) + l) / RSI_PERIOD
+        expected.append(100 - 100 / (1 + avg_gain / avg_loss))
+    assert np.allclose(values[f'rsi{RSI_PERIOD}'], expected, equal_nan=True)
+
+
+@pytest.mark.parametrize('splits', [(150,), (20, 21, 200), (16, 100, 101, 102)])
+def test_incremental_state_matches_full_recompute(splits):
+    prices = closes(300, seed=1)
+    full, _ = compute_indicators(prices)
+    
+    first, state = compute_indicators(prices[:splits[0]])
+    parts = [first]
+    for start, end in zip(splits, splits[1:] + (len(prices),)):
+        values, state = compute_indicators(prices[start:end], state)
+        parts.append(values)
+    
+    assert_indicators_close({name: np.concatenate([p[name] for p in parts]) for name in INDICATOR_NAMES}, full)
+
+
+def test_no_state_before_rsi_warmup():
+    _, state = compute_indicators(closes(RSI_PERIOD))
+    assert state is None
+
+
+def test_ewm_long_series_stays_finite():
+    values = ewm(np.ones(5000), 2.0 / 27)
+    assert np.allclose(values, 1.0)
+
+
+def stored_indicators(db, symbol):
+    df = db.get_indicators(symbol)
+    return {name: df[name].to_numpy(dtype=float) for name in INDICATOR_NAMES}
+
+
+def test_update_indicators_incremental_matches_full(db, make_prices):
+    df = make_prices('2023-01-02', 260)
+    db.insert_stock_prices('005930', df.iloc[:200])
+    assert update_indicators(db) == 1
+    
+    db.insert_stock_prices('005930', df.iloc[200:])
+    assert update_indicators(db) == 1
+    # 새 봉이 없으면 건너뜀
+    assert update_indicators(db) == 0
+    
+    full, _ = compute_indicators(df['Close'].to_numpy(dtype=float))
+    assert_indicators_close(stored_indicators(db, '005930'), full)
+    assert db.get_indicator_states()['005930'][0] == int(df.index[-1].strftime('%Y%m%d'))
+
+
+def test_update_indicators_recomputes_after_past_revision(db, make_prices):
+    df = make_prices('2023-01-02', 120)
+    db.insert_stock_prices('005930', df)
+    update_indicators(db)
+    
+    # 상태에 저장된 직전 종가 구간 안의 과거 봉 수정 + 새 봉
+    revised = df.copy()
+    revised.iloc[-3, revised.columns.get_loc('Close')] += 500
+    more = make_prices(df.index[-1] + pd.offsets.BDay(), 5, seed=4)
+    db.insert_stock_prices('005930', pd.concat([revised.iloc[-3:], more]))
+    update_indicators(db)
+    
+    full, _ = compute_indicators(pd.concat([revised, more])['Close'].to_numpy(dtype=float))
+    assert_indicators_close(stored_indicators(db, '005930'), full)
+
+
+def test_update_indicators_reads_only_tail_and_new_bars(db, make_prices, monkeypatch):
+    df = make_prices('2023-01-02', 400)
+    db.insert_stock_prices('005930', df.iloc[:395])
+    update_indicators(db)
+    db.insert_stock_prices('005930', df.iloc[395:])
+    get_closes = db.get_closes
+    reads = []
+    
+    def spy(symbol, after=None, lookback=0):
+        history = get_closes(symbol, after=after, lookback=lookback)
+        reads.append(len(history[0]))
+        return history
+    
+    monkeypatch.setattr(db, 'get_closes', spy)
+    monkeypatch.setattr(db, 'get_price_arrays', lambda *args, **kwargs: pytest.fail('full history read'))
+    
+    assert update_indicators(db) == 1
+    
+    assert reads == [TAIL_SIZE + 5]
+    full, _ = compute_indicators(df['Close'].to_numpy(dtype=float))
+    assert_indicators_close(stored_indicators(db, '005930'), full)
+
+
+def test_get_closes_bounded_by_last_date(db, make_prices):
+    df = make_prices('2024-01-01', 30)
+    db.insert_stock_prices('005930', df)
+    
+    dates, closes = db.get_closes('005930', after=20240131, lookback=3)
+    
+    assert dates.tolist() == [20240129, 20240130, 20240131, 20240201, 20240202, 20240205, 20240206, 20240207, 20240208, 20240209]
+    assert closes.tolist() == df['Close'].iloc[-10:].tolist()
+    assert len(db.get_closes('005930')[0]) == 30
+    assert db.get_closes('000660') is None
+
+
+def test_indicator_endpoint_does_not_write(client, db, make_prices):
+    db.insert_stock_prices('005930', make_prices('2024-01-01', 60))
+    
+    assert client.get('/api/indicators/005930').status_code == 404
+    assert db.get_indicator_states() == {}
+    
+    # 수집 경로에서 계산한 뒤에는 저장된 값을 제공
+    update_indicators(db, ['005930'])
+    response = client.get('/api/indicators/005930?names=sma20')
+    
+    assert response.status_code == 200
+    assert len(response.get_json()['data']['labels']) == 60
@@ -0,0 +1,46 @@
+import pandas as pd
+
+
+def targets(archive):
+    return [(symbol, f'종목{symbol}') for symbol in archive.symbols()]
+
+
+def test_first_run_backfills_and_second_run_is_incremental(replay_api, archive):
+    symbol = archive.symbols()[0]
+    
+    backfill = replay_api.update_symbol_data(symbol)
+    last_date = replay_api.db.get_last_dates()[symbol]
+    incremental = replay_api.update_symbol_data(symbol, last_date=last_date)
+    
+    assert backfill['mode'] == 'backfill' and backfill['success'] and backfill['records'] > 200
+    assert incremental['mode'] == 'incremental' and incremental['success']
+    # 마지막 저장 날짜 앞 겹침 구간만 다시 받음
+    assert incremental['records'] <= replay_api.INCREMENTAL_OVERLAP_DAYS + 1
+
+
+def test_incremental_fetch_starts_overlap_days_before_last_date(replay_api, archive):
+    symbol = archive.symbols()[0]
+    replay_api.update_symbol_data(symbol)
+    last_date = replay_api.db.get_last_dates()[symbol]
+    requested = []
+    source = replay_api.sources.sources[0]
+    read = source.read
+    source.read = lambda symbol, start_date, end_date: requested.append(start_date) or read(symbol, start_date, end_date)
+    
+    replay_api.update_symbol_data(symbol, last_date=last_date)
+    
+    assert requested == [pd.Timestamp(last_date) - pd.Timedelta(days=replay_api.INCREMENTAL_OVERLAP_DAYS)]
+
+
+def test_incremental_run_fills_missing_recent_bars(replay_api, archive):
+    replay_api.update_all_kospi_data(targets=targets(archive), conservative_mode=False)
+    symbol = archive.symbols()[1]
+    conn = replay_api.db.get_connection()
+    count = "SELECT COUNT(*), MAX(date) FROM stock_prices WHERE symbol = ?"
+    before = conn.execute(count, (symbol,)).fetchone()
+    with conn:
+        conn.execute("DELETE FROM stock_prices WHERE symbol = ? AND date = ?", (symbol, before[1]))
+    
+    replay_api.update_all_kospi_data(targets=targets(archive), conservative_mode=False, incremental=True)
+    
+    assert conn.execute(count, (symbol,)).fetchone() == before
@@ -0,0 +1,101 @@
+import time
+import threading
+from ingestion_jobs import IngestionJobManager
+
+
+class BlockingAPI:
+    """update_all_kospi_data가 release 전까지 진행 없이 멈춰 있는 수집 API (재시도 중인 종목 흉내)"""
+    
+    def __init__(self, db):
+        self.db = db
+        self.started = threading.Event()
+        self.release = threading.Event()
+    
+    def update_all_kospi_data(self, progress_callback=None, **options):
+        self.started.set()
+        self.release.wait(10)
+        return 0
+
+
+def wait_for(manager, job_id, timeout=30):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        job = manager.get(job_id)
+        if job['status'] in ('completed', 'failed'):
+            return job
+        time.sleep(0.05)
+    raise AssertionError(f"job {job_id} did not finish")
+
+
+def test_job_runs_in_background_and_records_results(replay_api, archive):
+    manager = IngestionJobManager(replay_api)
+    targets = [(symbol, symbol) for symbol in archive.symbols()]
+    
+    job_id, created = manager.submit(targets=targets, conservative_mode=False)
+    job = wait_for(manager, job_id)
+    
+    assert created
+    assert job['status'] == 'completed'
+    assert job['total'] == job['done'] == job['success_count'] == len(targets)
+    assert job['progress'] == 100.0
+    assert sorted(result['symbol'] for result in job['results']) == archive.symbols()
+
+
+def test_submit_reuses_running_job(db):
+    api = BlockingAPI(db)
+    manager = IngestionJobManager(api)
+    
+    job_id, created = manager.submit()
+    api.started.wait(5)
+    again, created_again = manager.submit()
+    api.release.set()
+    wait_for(manager, job_id)
+    
+    assert created and not created_again
+    assert again == job_id
+
+
+def test_job_without_heartbeat_is_abandoned(db):
+    db.create_ingestion_job('old', stale_seconds=600)
+    with db.get_connection() as conn:
+        conn.execute("UPDATE ingestion_jobs SET heartbeat_at = ? WHERE id = 'old'", (time.time() - 601,))
+    
+    job_id, created = db.create_ingestion_job('new', stale_seconds=600)
+    
+    assert (job_id, created) == ('new', True)
+    assert db.get_ingestion_job('old')['status'] == 'failed'
+
+
+def test_heartbeat_keeps_a_stalled_job_alive(db):
+    api = BlockingAPI(db)
+    manager = IngestionJobManager(api, stale_seconds=0.5)
+    manager.HEARTBEAT_INTERVAL = 0.05
+    
+    job_id, _ = manager.submit()
+    api.started.wait(5)
+    time.sleep(1.0)
+    # 종목 진행(done) 없이 stale_seconds가 지났지만 heartbeat가 갱신되어 다른 워커가 중복 작업을 만들지 않음
+    again, created = manager.submit()
+    job = manager.get(job_id)
+    api.release.set()
+    
+    assert (again, created) == (job_id, False)
+    assert job['status'] == 'running' and job['done'] == 0
+    assert time.time() - job['heartbeat_at'] < 0.5
+    assert wait_for(manager, job_id)['status'] == 'completed'
+
+
+def test_failed_job_records_error(db):
+    class FailingAPI:
+        def __init__(self):
+            self.db = db
+        
+        def update_all_kospi_data(self, **options):
+            raise RuntimeError('upstream down')
+    
+    manager = IngestionJobManager(FailingAPI())
+    
+    job = wait_for(manager, manager.submit()[0])
+    
+    assert job['status'] == 'failed'
+    assert job['error'] == 'upstream down'
@@ -0,0 +1,157 @@
+import json
+import os
+import threading
+import time
+import pytest
+from metrics import Registry, timed_methods
+
+
+@pytest.fixture
+def registry(tmp_path):
+    return Registry(str(tmp_path / 'metrics'), flush_interval=3600)
+
+
+def test_render_prometheus_text(registry):
+    requests = registry.counter('test_requests_total', '요청 수', ('route',))
+    latency = registry.histogram('test_latency_seconds', '지연 시간', buckets=(0.1, 1.0))
+    level = registry.gauge('test_level', '현재 값')
+    requests.inc(route='/a')
+    requests.inc(2, route='/a')
+    latency.observe(0.05)
+    latency.observe(0.5)
+    latency.observe(5)
+    level.set(1.5)
+    
+    text = registry.render()
+    
+    assert '# TYPE test_requests_total counter' in text
+    assert 'test_requests_total{route="/a"} 3' in text
+    assert 'test_latency_seconds_bucket{le="0.1"} 1' in text
+    assert 'test_latency_seconds_bucket{le="1"} 2' in text
+    assert 'test_latency_seconds_bucket{le="+Inf"} 3' in text
+    assert 'test_latency_seconds_count 3' in text
+    assert 'test_level 1.5' in text
+
+
+def test_collect_merges_process_files(registry):
+    requests = registry.counter('test_requests_total', '요청 수', ('route',))
+    level = registry.gauge('test_level', '현재 값')
+    requests.inc(route='/a')
+    level.set(1)
+    registry.flush()
+    # 다른 작업자가 남긴 파일
+    with open(os.path.join(registry.directory, 'metrics_999999.json'), 'w') as f:
+        json.dump({
+            'test_requests_total': [[['/a'], 4], [['/b'], 1]],
+            'test_level': [[[], [7, time.time() + 60]]]
+        }, f)
+    
+    merged = registry.collect()
+    
+    assert merged['test_requests_total'] == {('/a',): 5, ('/b',): 1}
+    assert merged['test_level'][()][0] == 7
+    registry.clear()
+    assert os.listdir(registry.directory) == []
+
+
+def test_derived_gauge(registry):
+    hits = registry.counter('test_cache_total', '조회 수', ('result',))
+    registry.derived('test_hit_ratio', '적중률', lambda merged: [([], merged['test_cache_total'][('hit',)] / 4)])
+    hits.inc(3, result='hit')
+    hits.inc(result='miss')
+    
+    assert 'test_hit_ratio 0.75' in registry.render()
+
+
+def test_timed_methods(registry):
+    histogram = registry.histogram('test_method_seconds', '메서드 실행 시간', ('method',))
+    
+    @timed_methods(histogram, exclude=('skipped',))
+    class Service:
+        def work(self):
+            return 1
+        
+        def skipped(self):
+            return 2
+        
+        def rows(self):
+            yield 3
+    
+    service = Service()
+    assert (service.work(), service.skipped(), list(service.rows())) == (1, 2, [3])
+    assert set(registry.collect()['test_method_seconds']) == {('work',)}
+
+
+@pytest.mark.skipif(not hasattr(os, 'fork'), reason='fork not available')
+def test_fork_while_lock_held_does_not_deadlock_child(registry):
+    requests = registry.counter('test_requests_total', '요청 수')
+    requests.inc()
+    # 마스터의 flush 스레드가 잠금을 잡고 있는 순간의 fork 재현
+    held = threading.Event()
+    release = threading.Event()
+    
+    def hold_lock():
+        with registry._lock:
+            held.set()
+            release.wait()
+    
+    holder = threading.Thread(target=hold_lock)
+    holder.start()
+    held.wait()
+    pid = os.fork()
+    if pid == 0:
+        try:
+            requests.inc(5)
+            registry.flush()
+        finally:
+            os._exit(0)
+    release.set()
+    holder.join()
+    
+    deadline = time.monotonic() + 5
+    while time.monotonic() < deadline:
+        finished, status = os.waitpid(pid, os.WNOHANG)
+        if finished:
+            break
+        time.sleep(0.01)
+    else:
+        os.kill(pid, 9)
+        os.waitpid(pid, 0)
+        pytest.fail('forked child deadlocked on the metrics lock')
+    
+    assert os.waitstatus_to_exitcode(status) == 0
+    # 자식은 0부터 시작해 자기 파일에 기록하고, 부모 값과 합산됨
+    assert registry.collect()['test_requests_total'] == {(): 6}
+
+
+@pytest.mark.skipif(not hasattr(os, 'fork'), reason='fork not available')
+def test_retired_worker_totals_survive_exit(registry):
+    requests = registry.counter('test_requests_total', '요청 수', ('route',))
+    latency = registry.histogram('test_latency_seconds', '지연 시간', buckets=(0.1, 1.0))
+    level = registry.gauge('test_level', '현재 값')
+    requests.inc(route='/a')
+    registry.flush()
+    
+    # max_requests로 교체되는 작업자 두 개 (종료 시 atexit 대신 직접 flush)
+    for amount in (2, 3):
+        pid = os.fork()
+        if pid == 0:
+            try:
+                requests.inc(amount, route='/a')
+                latency.observe(0.5)
+                level.set(amount)
+                registry.flush()
+            finally:
+                os._exit(0)
+        os.waitpid(pid, 0)
+        # gunicorn.conf.py의 child_exit
+        registry.retire(pid)
+        assert not os.path.exists(registry._path(pid))
+    
+    merged = registry.collect()
+    
+    assert merged['test_requests_total'] == {('/a',): 6}
+    assert merged['test_latency_seconds'][()][2] == 2
+    # 종료된 작업자의 게이지는 보고하지 않음
+    assert merged['test_level'] == {}
+    assert sorted(os.listdir(registry.directory)) == sorted(['metrics_archive.json', f'metrics_{os.getpid()}.json'])
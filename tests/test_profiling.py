@@ -0,0 +1,84 @@
+import os
+import time
+import pytest
+from flask import Flask, jsonify
+import profiling
+
+
+@pytest.fixture
+def client(tmp_path, monkeypatch):
+    monkeypatch.setattr(profiling, 'PROFILE_DIR', str(tmp_path / 'profiles'))
+    monkeypatch.setattr(profiling, 'PROFILE_TOKEN', 'secret')
+    app = Flask(__name__)
+    profiling.init_app(app)
+    
+    @app.route('/api/work')
+    def work():
+        # 샘플러가 스택을 수집할 수 있을 만큼 실행
+        deadline = time.perf_counter() + 0.05
+        while time.perf_counter() < deadline:
+            sum(range(1000))
+        return jsonify({'ok': True})
+    
+    @app.route('/api/profiles')
+    def profiles():
+        return jsonify(profiling.list_profiles())
+    
+    return app.test_client()
+
+
+def saved_files():
+    return sorted(os.listdir(profiling.PROFILE_DIR)) if os.path.isdir(profiling.PROFILE_DIR) else []
+
+
+@pytest.mark.parametrize('headers, query', [({}, ''), ({'X-Profile': 'wrong'}, ''), ({}, '?_profile=secre')])
+def test_requests_without_token_are_not_profiled(client, headers, query):
+    assert client.get(f'/api/work{query}', headers=headers).status_code == 200
+    assert profiling.list_profiles() == []
+
+
+def test_empty_token_never_authorizes(client, monkeypatch):
+    monkeypatch.setattr(profiling, 'PROFILE_TOKEN', '')
+    client.get('/api/work', headers={'X-Profile': ''})
+    assert profiling.list_profiles() == []
+
+
+def test_token_request_saves_cprofile_and_stacks(client):
+    client.get('/api/work?days=5', headers={'X-Profile': 'secret'})
+    
+    [meta] = profiling.list_profiles()
+    assert (meta['mode'], meta['trigger'], meta['route'], meta['status']) == ('cprofile', 'token', '/api/work', 200)
+    assert meta['args'] == {'days': '5'}
+    assert meta['samples'] > 0
+    assert sorted(meta['files']) == ['collapsed', 'pstats']
+    with open(os.path.join(profiling.PROFILE_DIR, meta['files']['collapsed']), encoding='utf-8') as f:
+        assert any('work (test_profiling.py' in line for line in f)
+
+
+def test_sampling_mode_via_query(client):
+    client.get('/api/work?_profile=secret&_profile_mode=sampling')
+    
+    [meta] = profiling.list_profiles()
+    assert meta['mode'] == 'sampling'
+    assert list(meta['files']) == ['collapsed']
+    # 토큰은 목록에 남지 않음
+    assert meta['args'] == {}
+
+
+def test_random_sampling(client, monkeypatch):
+    monkeypatch.setattr(profiling, 'SAMPLE_RATE', 1.0)
+    client.get('/api/work')
+    # 프로파일 조회 API 자체는 프로파일링하지 않음
+    client.get('/api/profiles')
+    
+    assert [meta['trigger'] for meta in profiling.list_profiles()] == ['sampled']
+
+
+def test_old_profiles_pruned(client, monkeypatch):
+    monkeypatch.setattr(profiling, 'PROFILE_KEEP', 2)
+    for _ in range(4):
+        client.get('/api/work', headers={'X-Profile': 'secret', 'X-Profile-Mode': 'sampling'})
+        time.sleep(0.01)
+    
+    assert len(profiling.list_profiles(limit=None)) == 2
+    assert len(saved_files()) == 4
@@ -0,0 +1,145 @@
+import json
+import itertools
+import threading
+import pytest
+import quote_stream
+from quote_stream import QuoteHub, QuoteSource, Subscriber, DatabaseQuoteSource
+
+
+class StaticSource(QuoteSource):
+    """바뀐 시세가 없는 소스 (테스트에서 apply로 직접 시세를 넣음)"""
+    
+    name = 'static'
+    
+    def poll(self):
+        return None
+
+
+def quote(symbol, price, volume=100):
+    return {'symbol': symbol, 'price': price, 'previous_close': 100, 'volume': volume, 'date': '2024-01-02'}
+
+
+def events(chunks):
+    """SSE 조각에서 (event, id, data) 목록"""
+    parsed = []
+    for chunk in chunks:
+        fields = dict(line.split(': ', 1) for line in chunk.strip().splitlines() if ': ' in line and not line.startswith(':'))
+        if 'event' in fields:
+            parsed.append((fields['event'], fields['id'], json.loads(fields['data'])))
+    return parsed
+
+
+def take(stream, count):
+    """본문에서 count개 조각을 읽고 스트림을 닫음"""
+    chunks = list(itertools.islice(stream, count))
+    stream.close()
+    return chunks
+
+
+@pytest.fixture
+def hub():
+    return QuoteHub(StaticSource(), interval=0.01)
+
+
+def test_subscriber_coalesces_pending_quotes():
+    subscriber = Subscriber(['005930'])
+    subscriber.offer([quote('005930', 101), quote('000660', 50)])
+    subscriber.offer([quote('005930', 102)])
+    
+    assert [q['price'] for q in subscriber.drain(0)] == [102]
+    assert subscriber.coalesced == 1
+    assert subscriber.drain(0.01) == []
+
+
+def test_apply_reports_only_changes(hub):
+    assert [q['seq'] for q in hub.apply([quote('005930', 101), quote('000660', 50)])] == [1, 2]
+    changed = hub.apply([quote('005930', 101), quote('000660', 55)])
+    
+    assert [(q['symbol'], q['seq']) for q in changed] == [('000660', 3)]
+    assert changed[0]['change_rate'] == -45.0
+
+
+def test_stream_snapshot_and_resume(hub):
+    hub.apply([quote('005930', 101), quote('000660', 50)])
+    [(name, event_id, data)] = events(take(hub.stream(), 2))
+    assert name == 'snapshot'
+    assert event_id == f'{hub.epoch}-2'
+    assert len(data) == 2
+    
+    hub.apply([quote('000660', 51)])
+    # 같은 작업자면 마지막 id 이후 바뀐 시세만, 다른 작업자의 id면 전체
+    assert [q['symbol'] for q in events(take(hub.stream(last_event_id=event_id), 2))[0][2]] == ['000660']
+    assert len(events(take(hub.stream(last_event_id='other-2'), 2))[0][2]) == 2
+
+
+def test_stream_delivers_changes(hub, monkeypatch):
+    monkeypatch.setattr(quote_stream, 'HEARTBEAT_INTERVAL', 0.01)
+    stream = hub.stream(symbols=['005930'])
+    iterator = iter(stream)
+    next(iterator)
+    next(iterator)
+    
+    hub.apply([quote('005930', 120), quote('000660', 50)])
+    chunk = next(iterator)
+    while chunk.startswith(':'):
+        chunk = next(iterator)
+    stream.close()
+    
+    [(name, _, data)] = events([chunk])
+    assert name == 'quotes'
+    assert [q['symbol'] for q in data] == ['005930']
+
+
+def test_subscriber_cap_is_atomic(hub, monkeypatch):
+    monkeypatch.setattr(quote_stream, 'MAX_CLIENTS', 5)
+    barrier = threading.Barrier(20)
+    streams = []
+    
+    def connect():
+        barrier.wait()
+        streams.append(hub.stream())
+    
+    threads = [threading.Thread(target=connect) for _ in range(20)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    
+    accepted = [stream for stream in streams if stream is not None]
+    assert len(accepted) == 5
+    assert hub.stats()['subscribers'] == 5
+    for stream in accepted:
+        stream.close()
+    assert hub.stats()['subscribers'] == 0
+
+
+def test_closing_unstarted_stream_releases_slot(hub, monkeypatch):
+    monkeypatch.setattr(quote_stream, 'MAX_CLIENTS', 1)
+    stream = hub.stream()
+    assert hub.stream() is None
+    
+    # 첫 이벤트 전에 연결이 끊겨도 자리 해제 (두 번 닫아도 안전)
+    stream.close()
+    stream.close()
+    
+    assert hub.stats()['subscribers'] == 0
+    assert hub.stream() is not None
+
+
+def test_database_source_polls_on_version_change(db, make_prices):
+    source = DatabaseQuoteSource(db)
+    db.insert_stock_prices('005930', make_prices('2024-01-01', 3))
+    db.data_version.bump(['005930'])
+    
+    [latest] = source.poll()
+    assert latest['price'] == db.get_symbol_stats()['005930']['latest_close']
+    assert source.poll() is None
+
+
+def test_stream_endpoint_rejects_when_full(client, app_module, monkeypatch):
+    monkeypatch.setattr(quote_stream, 'MAX_CLIENTS', 0)
+    
+    response = client.get('/api/stream/quotes')
+    
+    assert response.status_code == 503
+    assert response.headers['Retry-After'] == '10'
@@ -0,0 +1,108 @@
+from datetime import datetime, timedelta
+import pandas as pd
+import pytest
+from replay import ReplayArchive, FaultInjector, ReplaySource, record, use_replay
+from stock_api_fdr import StockAPIFDR
+
+
+def test_save_prices_merges_and_persists(tmp_path, make_prices):
+    archive = ReplayArchive(str(tmp_path))
+    first = make_prices('2024-01-01', 10)
+    update = make_prices('2024-01-10', 5, seed=1)
+    archive.save_prices('005930', first)
+    archive.save_prices('005930', update)
+    
+    reloaded = ReplayArchive(str(tmp_path))
+    prices = reloaded.load_prices('005930')
+    
+    assert len(prices) == 12
+    assert prices.loc['2024-01-10', 'Close'] == update.loc['2024-01-10', 'Close']
+    assert prices.loc['2024-01-09', 'Close'] == first.loc['2024-01-09', 'Close']
+    assert reloaded.manifest['last_date'] == '2024-01-16'
+    assert reloaded.symbols() == ['005930']
+    assert len(reloaded.load_prices('005930', '2024-01-08', '2024-01-09')) == 2
+    assert reloaded.load_prices('000660').empty
+
+
+def test_synthetic_archive_listing(archive):
+    listing = archive.listing()
+    
+    assert listing['symbol'].tolist() == archive.symbols()
+    assert set(archive.listing(('KOSDAQ',))['market']) == {'KOSDAQ'}
+    assert archive.company(archive.symbols()[0])['name'] == f'종목{archive.symbols()[0]}'
+    assert archive.company('005930') is None
+
+
+def test_fault_injector():
+    with pytest.raises(ConnectionError):
+        FaultInjector(error_rate=1.0)('prices 005930')
+    FaultInjector(error_rate=0.0)('prices 005930')
+    
+    def outcomes(seed):
+        injector = FaultInjector(error_rate=0.5, seed=seed)
+        results = []
+        for _ in range(50):
+            try:
+                injector('call')
+                results.append(True)
+            except ConnectionError:
+                results.append(False)
+        return results
+    
+    assert outcomes(7) == outcomes(7)
+    assert 10 < outcomes(7).count(False) < 40
+
+
+def test_replay_source_aligns_old_archive_to_today(tmp_path, make_prices):
+    archive = ReplayArchive(str(tmp_path))
+    archive.save_prices('005930', make_prices('2020-01-01', 60))
+    source = ReplaySource(archive)
+    
+    df = source.read('005930', datetime.now() - timedelta(days=30), datetime.now())
+    
+    assert source.offset.days % 7 == 0
+    assert 0 <= (datetime.now() - df.index[-1]).days < 7
+    # 주 단위로 옮기므로 요일 구성 유지
+    assert set(df.index.dayofweek) <= {0, 1, 2, 3, 4}
+
+
+def test_record_writes_upstream_results(tmp_path, make_prices):
+    class Upstream:
+        def fetch_stock_data(self, symbol, period='1y'):
+            return make_prices('2024-01-01', 5)
+        
+        def get_company_info(self, symbol):
+            return {'symbol': symbol, 'name': '삼성전자', 'market_cap': 1, 'sector': 'Technology'}
+        
+        def get_listing(self, markets=None):
+            return pd.DataFrame([('005930', '삼성전자', 'KOSPI', None, 1, 1)],
+                                columns=['symbol', 'name', 'market', 'sector', 'shares', 'market_cap'])
+    
+    archive = ReplayArchive(str(tmp_path))
+    api = record(Upstream(), archive)
+    api.fetch_stock_data('005930')
+    api.get_company_info('005930')
+    api.get_listing()
+    
+    assert len(archive.load_prices('005930')) == 5
+    assert archive.company('005930')['name'] == '삼성전자'
+    assert archive.listing()['symbol'].tolist() == ['005930']
+
+
+def test_replayed_ingestion_matches_archive(replay_api, archive):
+    symbol = archive.symbols()[0]
+    
+    df = replay_api.fetch_stock_data(symbol)
+    
+    assert df['Close'].tolist() == archive.load_prices(symbol, datetime.now() - timedelta(days=replay_api.BACKFILL_DAYS))['Close'].tolist()
+    assert replay_api.get_company_info(symbol)['name'] == f'종목{symbol}'
+
+
+def test_use_replay_injects_errors(db, archive):
+    api = StockAPIFDR(db)
+    use_replay(api, archive, error_rate=1.0, seed=0)
+    symbol = archive.symbols()[0]
+    
+    assert api.fetch_stock_data(symbol, retries=1) is None
+    assert api.get_company_info(symbol)['sector'] == 'Unknown'
+    assert api.get_listing() is None
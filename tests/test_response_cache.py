@@ -0,0 +1,99 @@
+import time
+import threading
+import pytest
+from response_cache import ResponseCache
+from data_version import DataVersion
+
+
+def test_cache_hits_until_version_changes():
+    version = [1]
+    cache = ResponseCache(lambda: version[0])
+    calls = []
+    
+    def compute():
+        calls.append(version[0])
+        return f'v{version[0]}'
+    
+    assert cache.get_or_compute(('stocks',), compute) == 'v1'
+    assert cache.get_or_compute(('stocks',), compute) == 'v1'
+    version[0] = 2
+    assert cache.get_or_compute(('stocks',), compute) == 'v2'
+    
+    assert calls == [1, 2]
+    assert cache.stats()['hits'] == 1 and cache.stats()['misses'] == 2
+
+
+def test_concurrent_misses_compute_once():
+    cache = ResponseCache(lambda: 1)
+    calls = []
+    release = threading.Event()
+    
+    def compute():
+        calls.append(1)
+        release.wait(5)
+        return 'value'
+    
+    results = []
+    threads = [
+        threading.Thread(target=lambda: results.append(cache.get_or_compute(('key',), compute)))
+        for _ in range(8)
+    ]
+    for thread in threads:
+        thread.start()
+    time.sleep(0.1)
+    release.set()
+    for thread in threads:
+        thread.join()
+    
+    assert len(calls) == 1
+    assert results == ['value'] * 8
+
+
+def test_errors_are_shared_and_not_cached():
+    cache = ResponseCache(lambda: 1)
+    
+    def fail():
+        raise RuntimeError('boom')
+    
+    with pytest.raises(RuntimeError):
+        cache.get_or_compute(('key',), fail)
+    assert cache.get_or_compute(('key',), lambda: 'ok') == 'ok'
+
+
+def test_value_computed_during_version_change_is_not_stored():
+    version = [1]
+    cache = ResponseCache(lambda: version[0])
+    
+    def compute():
+        # 계산 도중 수집이 끝나 버전이 바뀜
+        version[0] = 2
+        cache.get_or_compute(('other',), lambda: None)
+        return 'stale'
+    
+    assert cache.get_or_compute(('key',), compute) == 'stale'
+    assert cache.get_or_compute(('key',), lambda: 'fresh') == 'fresh'
+
+
+def test_lru_eviction():
+    cache = ResponseCache(lambda: 1, max_entries=2)
+    for key in 'abc':
+        cache.get_or_compute((key,), lambda key=key: key)
+    
+    assert cache.stats()['entries'] == 2
+    assert cache.get_or_compute(('a',), lambda: 'recomputed') == 'recomputed'
+
+
+def test_data_version_bump_is_seen_by_other_instances(tmp_path):
+    path = str(tmp_path / 'stock_data.db.version')
+    writer = DataVersion(path)
+    reader = DataVersion(path)
+    
+    assert reader.version == 0
+    assert writer.bump(['005930']) == 1
+    writer.bump(['000660'])
+    
+    assert reader.version == 2
+    assert reader.symbol_version('005930')[0] == 1
+    assert reader.symbol_version('000660')[0] == 2
+    # 기록이 없는 종목은 전체 버전
+    assert reader.symbol_version('035420')[0] == 2
@@ -0,0 +1,87 @@
+from datetime import date, datetime, timedelta
+import pytest
+from scheduler import IngestionScheduler, file_lock
+from trading_calendar import TradingCalendar, KST
+
+
+@pytest.fixture
+def scheduler(replay_api):
+    scheduler = IngestionScheduler(replay_api, TradingCalendar(), universe='all', retries=1, retry_delay=0)
+    scheduler.POLL_INTERVAL = 0.01
+    return scheduler
+
+
+@pytest.fixture
+def last_day(archive):
+    return date.fromisoformat(archive.manifest['last_date'])
+
+
+def test_run_session_collects_pending_targets(scheduler, archive, last_day):
+    assert len(scheduler.pending_targets(last_day)) == len(archive.symbols())
+    
+    state = scheduler.run_session(last_day)
+    
+    assert (state['symbols'], state['failed'], state['attempts']) == (len(archive.symbols()), [], 1)
+    assert scheduler.pending_targets(last_day) == []
+    # 끝난 거래일은 다시 수집하지 않음
+    assert scheduler.run_session(last_day) is None
+    assert scheduler.load_state()['session'] == last_day.isoformat()
+
+
+def test_run_job_separates_missing_session_bar_from_failure(scheduler, last_day):
+    targets = scheduler.pending_targets(last_day)
+    assert scheduler.run_job(targets, last_day) == ([], [])
+    
+    # 업스트림에 아직 다음 거래일 봉이 없음: 작업은 새 행 0개로 성공하지만 해당 봉이 없음
+    next_day = last_day + timedelta(days=1)
+    assert scheduler.run_job(targets, next_day) == ([], targets)
+
+
+def test_run_session_retries_symbols_without_session_bar_once(scheduler, archive, last_day):
+    next_day = last_day + timedelta(days=1)
+    
+    state = scheduler.run_session(next_day)
+    
+    assert state['attempts'] == 2
+    assert state['failed'] == []
+    assert sorted(symbol for symbol, _ in state['no_data']) == archive.symbols()
+    # 봉이 없는 종목은 다음 실행에서 다시 수집하지 않음
+    assert scheduler.run_session(next_day) is None
+
+
+def test_run_session_retries_only_fetch_errors(scheduler, archive, last_day, monkeypatch):
+    # 첫 종목은 수집 오류, 나머지는 거래정지처럼 session 봉을 끝내 받지 못함
+    scheduler.retries = 3
+    next_day = last_day + timedelta(days=1)
+    broken = archive.symbols()[0]
+    fetch = scheduler.stock_api.fetch_stock_data
+    calls = {}
+    
+    def fetch_stock_data(symbol, *args, **kwargs):
+        calls[symbol] = calls.get(symbol, 0) + 1
+        return None if symbol == broken else fetch(symbol, *args, **kwargs)
+    
+    monkeypatch.setattr(scheduler.stock_api, 'fetch_stock_data', fetch_stock_data)
+    
+    state = scheduler.run_session(next_day)
+    
+    assert state['attempts'] == 4
+    assert [symbol for symbol, _ in state['failed']] == [broken]
+    assert sorted(symbol for symbol, _ in state['no_data']) == archive.symbols()[1:]
+    assert calls == {symbol: 4 if symbol == broken else 2 for symbol in archive.symbols()}
+    # 다음 실행에서는 수집 오류 종목만 재시도
+    assert scheduler.run_session(next_day)['symbols'] == 1
+
+
+def test_run_session_skips_when_locked(scheduler, last_day):
+    with file_lock(scheduler.lock_path) as locked:
+        assert locked
+        assert scheduler.run_session(last_day) is None
+
+
+def test_due_session_and_next_run_respect_delay(replay_api):
+    scheduler = IngestionScheduler(replay_api, TradingCalendar(), delay_minutes=30)
+    
+    assert scheduler.due_session(datetime(2024, 6, 10, 15, 50, tzinfo=KST)) == date(2024, 6, 7)
+    assert scheduler.due_session(datetime(2024, 6, 10, 16, 0, tzinfo=KST)) == date(2024, 6, 10)
+    assert scheduler.next_run_at(datetime(2024, 6, 10, 15, 50, tzinfo=KST)) == datetime(2024, 6, 10, 16, 0, tzinfo=KST)
@@ -0,0 +1,111 @@
+import gzip
+import json
+import os
+import numpy as np
+import pytest
+import snapshot as snapshot_module
+from snapshot import SnapshotReader, write_snapshot, refresh_snapshot
+from stock_api_fdr import StockAPIFDR
+
+STATE = {'version': 3, 'updated_at': 1700000000.0}
+
+
+def arrays(n, start=0):
+    days = np.arange(start, start + n, dtype=np.float64)
+    return {'date': days, 'open': days + 1, 'high': days + 2, 'low': days - 1, 'close': days + 0.5, 'volume': days * 10}
+
+
+def test_write_and_read_snapshot(tmp_path, monkeypatch):
+    monkeypatch.setattr(snapshot_module, 'SNAPSHOT_DAYS', 5)
+    path = str(tmp_path / 'stock_data.db.snapshot')
+    companies = {'005930': {'symbol': '005930', 'name': '삼성전자', 'market_cap': 1, 'sector': 'Technology'}}
+    body = {'success': True, 'data': [{'symbol': '005930', 'return_1y': np.float64('nan')}]}
+    
+    rows = write_snapshot(path, STATE, {'stocks_rows': body}, companies, {'005930': arrays(8), '000660': arrays(3, 100)})
+    snapshot = SnapshotReader(path).current()
+    
+    assert rows == 8
+    assert (snapshot.version, snapshot.updated_at) == (3, STATE['updated_at'])
+    assert json.loads(snapshot.body('stocks_rows')) == {'success': True, 'data': [{'symbol': '005930', 'return_1y': None}]}
+    assert gzip.decompress(snapshot.body('stocks_rows', compressed=True)) == snapshot.body('stocks_rows')
+    assert snapshot.company('005930')['name'] == '삼성전자'
+    assert snapshot.company('000660') is None
+    
+    # 잘라 저장한 종목은 저장된 길이까지만
+    assert snapshot.read('005930', days=5)['close'].tolist() == arrays(8)['close'][-5:].tolist()
+    assert snapshot.read('005930', days=6) is None
+    assert snapshot.read('005930') is None
+    # 전체를 담은 종목은 더 긴 요청에도 전체
+    assert snapshot.read('000660', days=10)['date'].tolist() == [100, 101, 102]
+    assert snapshot.read('000660')['volume'].tolist() == [1000, 1010, 1020]
+    assert snapshot.read('999999') is None
+
+
+def test_reader_remaps_replaced_file_and_ignores_garbage(tmp_path):
+    path = str(tmp_path / 'stock_data.db.snapshot')
+    reader = SnapshotReader(path)
+    assert reader.current() is None
+    
+    write_snapshot(path, STATE, {}, {}, {'005930': arrays(2)})
+    first = reader.current()
+    assert reader.current() is first
+    
+    write_snapshot(path, dict(STATE, version=4), {}, {}, {'005930': arrays(3)})
+    second = reader.current()
+    assert second.version == 4
+    # 교체 전 매핑은 그대로 읽을 수 있음
+    assert len(first.read('005930')['date']) == 2
+    
+    with open(path, 'wb') as f:
+        f.write(b'not a snapshot')
+    assert reader.current() is None
+    assert not [name for name in os.listdir(tmp_path) if name.endswith('.tmp')]
+
+
+@pytest.fixture
+def snapshot_api(db, make_prices):
+    db.insert_stock_prices('005930', make_prices('2023-01-02', 300))
+    db.insert_stock_prices('000660', make_prices('2023-01-02', 300, seed=1))
+    db.insert_company('005930', '삼성전자', 1000, 'Technology')
+    db.insert_company('000660', 'SK하이닉스', 500, 'Technology')
+    db.data_version.bump(['005930', '000660'])
+    return StockAPIFDR(db)
+
+
+def test_refresh_snapshot_follows_data_version(snapshot_api):
+    db = snapshot_api.db
+    assert db.current_snapshot() is None
+    
+    assert refresh_snapshot(snapshot_api)
+    assert db.current_snapshot().version == db.data_version.version
+    # 같은 버전이면 다시 만들지 않음
+    assert not refresh_snapshot(snapshot_api)
+    
+    db.data_version.bump(['005930'])
+    assert db.current_snapshot() is None
+    assert refresh_snapshot(snapshot_api)
+    assert db.current_snapshot().version == db.data_version.version
+
+
+def test_snapshot_arrays_match_database(snapshot_api):
+    db = snapshot_api.db
+    expected = db.get_price_arrays('005930', days=250)
+    refresh_snapshot(snapshot_api)
+    
+    served = db.get_price_arrays('005930', days=250)
+    
+    assert db.current_snapshot().read('005930', days=250) is not None
+    for name in expected:
+        assert np.array_equal(served[name], expected[name])
+
+
+def test_stocks_endpoint_serves_snapshot(client, db, snapshot_api):
+    live = client.get('/api/stocks').get_json()
+    refresh_snapshot(snapshot_api)
+    
+    served = client.get('/api/stocks', headers={'Accept-Encoding': 'gzip'})
+    
+    assert served.headers['Content-Encoding'] == 'gzip'
+    assert json.loads(gzip.decompress(served.get_data())) == live
+    columns = client.get('/api/stocks?shape=columns').get_json()
+    assert columns['data']['symbol'] == [stock['symbol'] for stock in live['data']]
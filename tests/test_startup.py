@@ -0,0 +1,59 @@
+import json
+import os
+import subprocess
+import sys
+from database import StockDatabase
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def run_python(code, cwd, **env):
+    """저장소 모듈을 import할 수 있는 새 인터프리터에서 code를 실행하고 마지막 줄의 JSON 반환"""
+    env = dict(os.environ, PYTHONPATH=ROOT, STOCK_METRICS_DIR=str(cwd / 'metrics'), **env)
+    result = subprocess.run([sys.executable, '-c', code], cwd=cwd, env=env, capture_output=True, text=True, timeout=60)
+    assert result.returncode == 0, result.stderr
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def test_worker_import_skips_upstream_libraries_and_schema(tmp_path):
+    StockDatabase(str(tmp_path / 'stock_data.db')).close()
+    
+    loaded = run_python(
+        "import sys, json\n"
+        "import database\n"
+        "calls = []\n"
+        "database.StockDatabase.init_db = lambda self: calls.append(1)\n"
+        "import wsgi, stock_api\n"
+        "print(json.dumps({'libraries': [name for name in ('FinanceDataReader', 'pykrx') if name in sys.modules],"
+        " 'init_db': len(calls)}))",
+        tmp_path, STOCK_SCHEMA_READY='1'
+    )
+    
+    assert loaded['libraries'] == []
+    assert loaded['init_db'] == 0
+
+
+def test_import_without_schema_ready_migrates(tmp_path):
+    loaded = run_python(
+        "import json, app\n"
+        "print(json.dumps(app.stock_api.db.get_schema_version()))",
+        tmp_path
+    )
+    
+    assert loaded == StockDatabase.SCHEMA_VERSION
+
+
+def test_warm_up_builds_snapshot_and_freezes(tmp_path, make_prices):
+    db = StockDatabase(str(tmp_path / 'stock_data.db'))
+    db.insert_stock_prices('005930', make_prices('2024-01-01', 30))
+    db.close()
+    
+    warmed = run_python(
+        "import gc, json, app\n"
+        "app.warm_up()\n"
+        "print(json.dumps({'frozen': gc.get_freeze_count(), 'snapshot': app.stock_api.db.current_snapshot() is not None}))",
+        tmp_path
+    )
+    
+    assert warmed['snapshot']
+    assert warmed['frozen'] > 0
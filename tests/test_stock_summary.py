@@ -0,0 +1,116 @@
+from datetime import date, timedelta
+import numpy as np
+import pandas as pd
+import pytest
+from columnar_store import yyyymmdd_to_days
+from stock_api_fdr import StockAPIFDR
+from stock_summary import MAX_GAP_DAYS, AVG_VOLUME_DAYS, summarize_universe, months_ago, previous_year_end
+from trading_calendar import TradingCalendar
+
+calendar = TradingCalendar()
+
+
+def trading_days(start, end):
+    """start~end(포함) KRX 거래일 리스트"""
+    days = []
+    day = start
+    while day <= end:
+        if calendar.is_trading_day(day):
+            days.append(day)
+        day += timedelta(days=1)
+    return days
+
+
+def price_arrays(days, seed=0):
+    """거래일 리스트의 임의 시세 배열 (get_price_arrays 형식)"""
+    rng = np.random.default_rng(seed)
+    n = len(days)
+    close = np.round(10000 * np.exp(np.cumsum(rng.normal(0, 0.02, n))))
+    return {
+        'date': yyyymmdd_to_days([int(f"{day:%Y%m%d}") for day in days]).astype(np.float64),
+        'high': close + rng.integers(0, 300, n),
+        'low': close - rng.integers(0, 300, n),
+        'close': close,
+        'volume': rng.integers(1000, 100000, n).astype(np.float64)
+    }
+
+
+def summary_for(days, seed=0):
+    return summarize_universe([('900000', '종목900000')], {'900000': price_arrays(days, seed)})[0]
+
+
+def test_backfill_starting_exactly_one_year_back_has_no_base_price():
+    # 2024-06-02는 일요일: 1년 전 당일부터 받은 구간에는 1년 수익률 기준가(그 이전 거래일)가 없음
+    as_of = date(2025, 6, 2)
+    
+    stock = summary_for(trading_days(as_of - timedelta(days=365), as_of))
+    
+    assert stock['return_1y'] is None
+    assert stock['year_return'] == 0
+
+
+def test_backfill_window_covers_one_year_base_price_for_every_session():
+    # 2025년 모든 거래일을 마지막 거래일로 하는 종목들을 한 번에 계산
+    sessions = trading_days(date(2025, 1, 1), date(2025, 12, 31))
+    companies = [(f'{900000 + i}', f'종목{i}') for i in range(len(sessions))]
+    arrays = {
+        symbol: price_arrays(trading_days(as_of - timedelta(days=StockAPIFDR.BACKFILL_DAYS), as_of), seed=i)
+        for i, ((symbol, _), as_of) in enumerate(zip(companies, sessions))
+    }
+    
+    summary = summarize_universe(companies, arrays)
+    
+    missing = [stock['as_of'] for stock in summary if stock['return_1y'] is None]
+    assert missing == []
+
+
+def reference_summary(days, arrays):
+    """pandas로 종목 하나의 요약을 직접 계산"""
+    dates = pd.to_datetime(days)
+    close = pd.Series(arrays['close'], index=dates)
+    as_of = dates[-1]
+    as_of_days = int(yyyymmdd_to_days([int(f"{as_of:%Y%m%d}")])[0])
+    
+    def base_return(target_days):
+        target = pd.Timestamp(np.datetime64(int(target_days), 'D'))
+        base = close[close.index <= target]
+        if base.empty or base.index[-1] < target - pd.Timedelta(days=MAX_GAP_DAYS):
+            return None
+        return round((close.iloc[-1] / base.iloc[-1] - 1) * 100, 2)
+    
+    year_mask = dates > pd.Timestamp(np.datetime64(int(months_ago([as_of_days], 12)[0]), 'D'))
+    return {
+        'return_1d': round((close.iloc[-1] / close.iloc[-2] - 1) * 100, 2),
+        'return_1w': base_return(as_of_days - 7),
+        'return_1m': base_return(months_ago([as_of_days], 1)[0]),
+        'return_3m': base_return(months_ago([as_of_days], 3)[0]),
+        'return_6m': base_return(months_ago([as_of_days], 6)[0]),
+        'return_ytd': base_return(previous_year_end([as_of_days])[0]),
+        'return_1y': base_return(months_ago([as_of_days], 12)[0]),
+        'year_high': arrays['high'][year_mask].max(),
+        'year_low': arrays['low'][year_mask].min(),
+        'avg_volume': int(round(arrays['volume'][-AVG_VOLUME_DAYS:].mean()))
+    }
+
+
+@pytest.mark.parametrize('as_of', [date(2025, 3, 31), date(2025, 6, 2), date(2025, 10, 10), date(2026, 1, 2)])
+def test_summary_matches_reference(as_of):
+    days = trading_days(as_of - timedelta(days=StockAPIFDR.BACKFILL_DAYS), as_of)
+    arrays = price_arrays(days, seed=as_of.month)
+    
+    stock = summarize_universe([('900000', '종목900000')], {'900000': arrays})[0]
+    
+    expected = reference_summary(days, arrays)
+    assert {key: stock[key] for key in expected} == pytest.approx(expected)
+    assert stock['as_of'] == as_of.isoformat()
+    assert stock['year_return'] == expected['return_1y']
+
+
+def test_replayed_backfill_has_one_year_return(replay_api, archive):
+    for symbol in archive.symbols():
+        assert replay_api.update_symbol_data(symbol)['success']
+    
+    summary = replay_api.get_all_stocks_summary()
+    
+    assert sorted(stock['symbol'] for stock in summary) == archive.symbols()
+    assert all(stock['return_1y'] is not None for stock in summary)
@@ -0,0 +1,93 @@
+from datetime import date, datetime, time, timezone
+import pytest
+from trading_calendar import TradingCalendar, KST, load_holidays_file
+
+
+@pytest.fixture
+def calendar():
+    return TradingCalendar()
+
+
+def kst(*args):
+    return datetime(*args, tzinfo=KST)
+
+
+@pytest.mark.parametrize('day, name', [
+    (date(2024, 1, 1), '신정'),
+    (date(2024, 2, 12), '설날 대체공휴일'),
+    (date(2024, 4, 10), '국회의원 선거'),
+    (date(2024, 9, 17), '추석'),
+    (date(2024, 12, 25), '성탄절'),
+    (date(2024, 12, 31), '연말 휴장일'),
+    (date(2025, 12, 31), '연말 휴장일'),
+    (date(2024, 6, 8), '주말'),
+])
+def test_holidays(calendar, day, name):
+    assert calendar.holiday_name(day) == name
+    assert not calendar.is_trading_day(day)
+    assert calendar.session(day) is None
+
+
+def test_year_end_closing_moves_off_weekend(calendar):
+    # 2027-12-31은 금요일, 2022-12-31은 토요일이라 12월 30일 금요일이 휴장
+    assert calendar.holiday_name(date(2027, 12, 31)) == '연말 휴장일'
+    assert calendar.holiday_name(date(2022, 12, 30)) == '연말 휴장일'
+
+
+def test_regular_session(calendar):
+    assert calendar.session(date(2024, 6, 10)) == (kst(2024, 6, 10, 9, 0), kst(2024, 6, 10, 15, 30))
+
+
+def test_first_session_of_year_opens_late(calendar):
+    assert calendar.session(date(2024, 1, 2))[0] == kst(2024, 1, 2, 10, 0)
+    assert calendar.session(date(2024, 1, 3))[0] == kst(2024, 1, 3, 9, 0)
+    # 2025-01-01은 휴장, 1월 2일이 첫 거래일
+    assert calendar.session(date(2025, 1, 2))[0].time() == time(10, 0)
+
+
+def test_csat_day_late_session(calendar):
+    assert calendar.session(date(2024, 11, 14)) == (kst(2024, 11, 14, 10, 0), kst(2024, 11, 14, 16, 30))
+
+
+def test_next_and_previous_trading_day_skip_chuseok(calendar):
+    assert calendar.next_trading_day(date(2024, 9, 13)) == date(2024, 9, 19)
+    assert calendar.previous_trading_day(date(2024, 9, 19)) == date(2024, 9, 13)
+    assert calendar.next_trading_day(date(2024, 9, 13), inclusive=True) == date(2024, 9, 13)
+
+
+@pytest.mark.parametrize('now, expected', [
+    (kst(2024, 6, 10, 15, 29), date(2024, 6, 7)),
+    (kst(2024, 6, 10, 15, 30), date(2024, 6, 10)),
+    (kst(2024, 6, 9, 12, 0), date(2024, 6, 7)),
+    (kst(2024, 11, 14, 16, 0), date(2024, 11, 13)),
+    (kst(2024, 11, 14, 16, 30), date(2024, 11, 14)),
+    # UTC 입력도 KST로 변환
+    (datetime(2024, 6, 10, 7, 0, tzinfo=timezone.utc), date(2024, 6, 10)),
+])
+def test_last_closed_session(calendar, now, expected):
+    assert calendar.last_closed_session(now) == expected
+
+
+def test_next_close(calendar):
+    assert calendar.next_close(kst(2024, 6, 10, 10, 0)) == kst(2024, 6, 10, 15, 30)
+    assert calendar.next_close(kst(2024, 6, 10, 15, 30)) == kst(2024, 6, 11, 15, 30)
+    assert calendar.next_close(kst(2024, 9, 13, 16, 0)) == kst(2024, 9, 19, 15, 30)
+    assert calendar.next_close(kst(2024, 11, 14, 16, 0)) == kst(2024, 11, 14, 16, 30)
+
+
+def test_year_listing(calendar):
+    days = dict(calendar.year(2024))
+    
+    assert days[date(2024, 1, 2)] == '10:00-15:30'
+    assert days[date(2024, 11, 14)] == '10:00-16:30'
+    assert days[date(2024, 5, 15)] == '휴장 (부처님오신날)'
+    assert all(day.weekday() < 5 for day in days)
+
+
+def test_extra_holidays_and_file(tmp_path):
+    path = tmp_path / 'holidays.txt'
+    path.write_text("# 임시 휴장\n2030-02-04 설날\n2030-02-05\n\n", encoding='utf-8')
+    assert load_holidays_file(str(path)) == {date(2030, 2, 4): '설날', date(2030, 2, 5): '휴장일'}
+    
+    calendar = TradingCalendar(extra_holidays=load_holidays_file(str(path)))
+    assert calendar.next_trading_day(date(2030, 2, 1)) == date(2030, 2, 6)
@@ -0,0 +1,104 @@
+import pandas as pd
+import pytest
+from universe import parse_shard, in_shard
+
+
+@pytest.mark.parametrize('shard, expected', [(None, None), ('', None), ('1/1', (1, 1)), ('3/4', (3, 4))])
+def test_parse_shard(shard, expected):
+    assert parse_shard(shard) == expected
+
+
+@pytest.mark.parametrize('shard', ['0/4', '5/4', '1/0', '1', 'a/b', '1/2/3'])
+def test_parse_shard_rejects_invalid(shard):
+    with pytest.raises(ValueError):
+        parse_shard(shard)
+
+
+def test_shards_partition_symbols():
+    symbols = [f'{code:06d}' for code in range(0, 400000, 137)]
+    
+    shards = [[symbol for symbol in symbols if in_shard(symbol, (k, 4))] for k in range(1, 5)]
+    
+    assert sorted(sum(shards, [])) == symbols
+    assert all(len(shard) > len(symbols) // 8 for shard in shards)
+    assert all(in_shard(symbol, None) for symbol in symbols)
+
+
+def test_shard_assignment_independent_of_listing():
+    # 다른 종목이 상장/폐지되어도 샤드가 바뀌지 않음 (목록 위치가 아닌 종목 코드 기준)
+    assert [in_shard('005930', (k, 3)) for k in (1, 2, 3)].count(True) == 1
+    assert in_shard('005930', (2, 3)) == in_shard('005930', parse_shard('2/3'))
+
+
+def listing(*rows):
+    return pd.DataFrame(
+        [(symbol, f'종목{symbol}', market, None, 1000, cap) for symbol, market, cap in rows],
+        columns=['symbol', 'name', 'market', 'sector', 'shares', 'market_cap']
+    )
+
+
+@pytest.fixture
+def universe_api(replay_api):
+    """get_listing이 current 목록을 반환하는 StockAPIFDR"""
+    replay_api.current = listing()
+    replay_api.get_listing = lambda markets: replay_api.current[replay_api.current['market'].isin(markets)]
+    return replay_api
+
+
+def events(db):
+    return db.get_connection().execute("SELECT symbol, event FROM universe_events ORDER BY id").fetchall()
+
+
+def test_sync_records_listing_changes(universe_api):
+    db = universe_api.db
+    universe_api.current = listing(('000001', 'KOSPI', 300), ('000002', 'KOSDAQ', 200), ('000003', 'KONEX', 900),
+                                   ('000004', 'KOSPI', 100), ('000005', 'KOSDAQ', 50))
+    assert universe_api.universe.sync()['listed'] == ['000001', '000002', '000004', '000005']
+    
+    universe_api.current = listing(('000001', 'KOSPI', 300), ('000002', 'KOSDAQ', 200), ('000004', 'KOSPI', 100),
+                                   ('000006', 'KOSPI', 400))
+    changes = universe_api.universe.sync()
+    assert (changes['listed'], changes['delisted']) == (['000006'], ['000005'])
+    
+    universe_api.current = listing(('000001', 'KOSPI', 300), ('000002', 'KOSDAQ', 200), ('000004', 'KOSPI', 100),
+                                   ('000005', 'KOSDAQ', 50), ('000006', 'KOSPI', 400))
+    assert universe_api.universe.sync()['relisted'] == ['000005']
+    
+    assert [symbol for symbol, _ in universe_api.universe.symbols()] == ['000006', '000001', '000002', '000004', '000005']
+    assert events(db)[-3:] == [('000006', 'listed'), ('000005', 'delisted'), ('000005', 'relisted')]
+
+
+def test_sync_skips_delisting_when_listing_shrinks(universe_api):
+    universe_api.current = listing(*[(f'{i:06d}', 'KOSPI', i) for i in range(1, 11)])
+    universe_api.universe.sync()
+    
+    # 업스트림 오류로 목록이 절반으로 줄면 상장폐지 처리하지 않음
+    universe_api.current = universe_api.current.iloc[:5]
+    assert universe_api.universe.sync()['delisted'] == []
+    assert len(universe_api.universe.symbols()) == 10
+
+
+def test_sync_without_listing_returns_none(universe_api):
+    universe_api.get_listing = lambda markets: None
+    assert universe_api.universe.sync() is None
+
+
+def test_targets(universe_api):
+    top10 = list(universe_api.kospi_top10.items())
+    assert universe_api.universe.targets() == top10
+    # 유니버스가 비어 있으면 top10으로 대체
+    assert universe_api.universe.targets('all') == top10
+    
+    universe_api.current = listing(*[(f'{i:06d}', 'KOSPI', i) for i in range(1, 21)])
+    everything = universe_api.universe.targets('all')
+    shards = [universe_api.universe.targets('all', (k, 3)) for k in (1, 2, 3)]
+    assert len(everything) == 20
+    assert sorted(sum(shards, [])) == sorted(everything)
+    with pytest.raises(ValueError):
+        universe_api.universe.targets('kosdaq')
+
+
+def test_replay_listing_syncs_archive_symbols(replay_api, archive):
+    changes = replay_api.universe.sync()
+    
+    assert sorted(changes['listed']) == archive.symbols()
@@ -0,0 +1,181 @@
+import os
+import logging
+from datetime import date, datetime, time, timedelta, timezone
+
+logger = logging.getLogger(__name__)
+
+# 한국 표준시 (서머타임 없음)
+KST = timezone(timedelta(hours=9), 'KST')
+
+# 정규장 시간
+SESSION_OPEN = time(9, 0)
+SESSION_CLOSE = time(15, 30)
+
+# 매년 같은 날짜의 휴장일 (주말과 겹쳐도 대체 휴장일은 HOLIDAYS에 따로 기록)
+FIXED_HOLIDAYS = {
+    (1, 1): '신정',
+    (3, 1): '삼일절',
+    (5, 1): '근로자의 날',
+    (5, 5): '어린이날',
+    (6, 6): '현충일',
+    (8, 15): '광복절',
+    (10, 3): '개천절',
+    (10, 9): '한글날',
+    (12, 25): '성탄절'
+}
+
+# 음력 공휴일, 대체공휴일, 선거일, 임시공휴일 (KRX 휴장일 공지 기준, 해마다 추가)
+HOLIDAYS = {
+    date(2024, 2, 9): '설날',
+    date(2024, 2, 12): '설날 대체공휴일',
+    date(2024, 4, 10): '국회의원 선거',
+    date(2024, 5, 6): '어린이날 대체공휴일',
+    date(2024, 5, 15): '부처님오신날',
+    date(2024, 9, 16): '추석',
+    date(2024, 9, 17): '추석',
+    date(2024, 9, 18): '추석',
+    date(2024, 10, 1): '국군의 날 임시공휴일',
+    date(2025, 1, 27): '임시공휴일',
+    date(2025, 1, 28): '설날',
+    date(2025, 1, 29): '설날',
+    date(2025, 1, 30): '설날',
+    date(2025, 3, 3): '삼일절 대체공휴일',
+    date(2025, 5, 6): '대체공휴일',
+    date(2025, 6, 3): '대통령 선거',
+    date(2025, 10, 6): '추석',
+    date(2025, 10, 7): '추석',
+    date(2025, 10, 8): '추석 대체공휴일',
+    date(2026, 2, 16): '설날',
+    date(2026, 2, 17): '설날',
+    date(2026, 2, 18): '설날',
+    date(2026, 3, 2): '삼일절 대체공휴일',
+    date(2026, 5, 25): '부처님오신날 대체공휴일',
+    date(2026, 6, 3): '지방선거',
+    date(2026, 8, 17): '광복절 대체공휴일',
+    date(2026, 9, 24): '추석',
+    date(2026, 9, 25): '추석',
+    date(2026, 10, 5): '개천절 대체공휴일'
+}
+# HOLIDAYS에 음력 공휴일이 기록된 연도 (그 밖의 연도는 STOCK_HOLIDAYS_FILE로 보완)
+HOLIDAY_YEARS = {2024, 2025, 2026}
+
+# 수능일: 1시간 늦게 열고 1시간 늦게 닫음
+LATE_SESSIONS = {
+    date(2024, 11, 14): (time(10, 0), time(16, 30)),
+    date(2025, 11, 13): (time(10, 0), time(16, 30)),
+    date(2026, 11, 19): (time(10, 0), time(16, 30))
+}
+
+# 추가 휴장일 파일 (한 줄에 "YYYY-MM-DD 이름", #은 주석)
+HOLIDAYS_FILE = os.environ.get('STOCK_HOLIDAYS_FILE')
+
+
+def load_holidays_file(path):
+    """추가 휴장일 파일을 {date: 이름}으로 읽음"""
+    holidays = {}
+    with open(path, encoding='utf-8') as f:
+        for line in f:
+            line = line.split('#', 1)[0].strip()
+            if not line:
+                continue
+            day, _, name = line.partition(' ')
+            holidays[date.fromisoformat(day)] = name.strip() or '휴장일'
+    return holidays
+
+
+class TradingCalendar:
+    """KRX 거래일/장 시간 계산
+    
+    주말, 공휴일(FIXED_HOLIDAYS, HOLIDAYS, 추가 휴장일 파일), 연말 휴장일(12월 마지막 평일)을 휴장으로 보고,
+    연초 개장일(10시 개장)과 수능일(10시 개장, 16시 30분 폐장)의 장 시간을 반영합니다.
+    """
+    
+    def __init__(self, extra_holidays=None):
+        self.holidays = dict(HOLIDAYS)
+        if HOLIDAYS_FILE:
+            self.holidays.update(load_holidays_file(HOLIDAYS_FILE))
+        self.holidays.update(extra_holidays or {})
+        self._warned_years = set()
+    
+    def holiday_name(self, day):
+        """휴장 사유 (거래일이면 None)"""
+        if day.weekday() >= 5:
+            return '주말'
+        if day in self.holidays:
+            return self.holidays[day]
+        if (day.month, day.day) in FIXED_HOLIDAYS:
+            return FIXED_HOLIDAYS[(day.month, day.day)]
+        if day == self._year_end_closing(day.year):
+            return '연말 휴장일'
+        if day.year not in HOLIDAY_YEARS and day.year not in self._warned_years:
+            self._warned_years.add(day.year)
+            logger.warning(f"{day.year}년 음력 공휴일/대체공휴일 정보가 없습니다 (STOCK_HOLIDAYS_FILE로 추가)")
+        return None
+    
+    def is_trading_day(self, day):
+        return self.holiday_name(day) is None
+    
+    def _year_end_closing(self, year):
+        # 12월 마지막 평일
+        day = date(year, 12, 31)
+        while day.weekday() >= 5:
+            day -= timedelta(days=1)
+        return day
+    
+    def session(self, day):
+        """거래일의 (개장, 폐장) KST datetime (휴장일이면 None)"""
+        if not self.is_trading_day(day):
+            return None
+        open_time, close_time = LATE_SESSIONS.get(day, (SESSION_OPEN, SESSION_CLOSE))
+        if day == self.next_trading_day(date(day.year, 1, 1), inclusive=True):
+            # 연초 개장일은 10시 개장
+            open_time = time(10, 0)
+        return (
+            datetime.combine(day, open_time, tzinfo=KST),
+            datetime.combine(day, close_time, tzinfo=KST)
+        )
+    
+    def next_trading_day(self, day, inclusive=False):
+        day = day if inclusive else day + timedelta(days=1)
+        while not self.is_trading_day(day):
+            day += timedelta(days=1)
+        return day
+    
+    def previous_trading_day(self, day, inclusive=False):
+        day = day if inclusive else day - timedelta(days=1)
+        while not self.is_trading_day(day):
+            day -= timedelta(days=1)
+        return day
+    
+    def last_closed_session(self, now):
+        """now(aware datetime) 이전에 폐장한 마지막 거래일"""
+        now = now.astimezone(KST)
+        day = self.previous_trading_day(now.date(), inclusive=True)
+        if self.session(day)[1] > now:
+            day = self.previous_trading_day(day)
+        return day
+    
+    def next_close(self, now):
+        """now 이후 처음 오는 폐장 시각 (KST datetime)"""
+        now = now.astimezone(KST)
+        day = self.next_trading_day(now.date(), inclusive=True)
+        close = self.session(day)[1]
+        if close <= now:
+            close = self.session(self.next_trading_day(day))[1]
+        return close
+    
+    def year(self, year):
+        """연도의 휴장일과 장 시간이 다른 날 목록 [(date, 설명)] (주말 제외)"""
+        days = []
+        day = date(year, 1, 1)
+        while day.year == year:
+            if day.weekday() < 5:
+                name = self.holiday_name(day)
+                if name:
+                    days.append((day, f"휴장 ({name})"))
+                else:
+                    open_at, close_at = self.session(day)
+                    if (open_at.time(), close_at.time()) != (SESSION_OPEN, SESSION_CLOSE):
+                        days.append((day, f"{open_at:%H:%M}-{close_at:%H:%M}"))
+            day += timedelta(days=1)
+        return days
@@ -0,0 +1,93 @@
+import zlib
+import logging
+
+logger = logging.getLogger(__name__)
+
+# 수집 대상 시장 (KONEX 제외)
+MARKETS = ('KOSPI', 'KOSDAQ')
+
+
+def parse_shard(shard):
+    """'k/n' 형식(1부터 시작)의 샤드 지정을 (k, n) 튜플로 변환 (None이면 None)"""
+    if not shard:
+        return None
+    index, count = (int(part) for part in str(shard).split('/'))
+    if count < 1 or not 1 <= index <= count:
+        raise ValueError(f"Invalid shard: {shard} (expected k/n with 1 <= k <= n)")
+    return index, count
+
+
+def in_shard(symbol, shard):
+    """종목이 샤드 (k, n)에 속하는지 여부
+    
+    종목 코드의 CRC32로 나누므로 상장/폐지로 목록이 바뀌어도 다른 종목의 샤드는 그대로입니다.
+    """
+    if shard is None:
+        return True
+    index, count = shard
+    return zlib.crc32(symbol.encode('utf-8')) % count == index - 1
+
+
+class UniverseManager:
+    """전 종목(KOSPI + KOSDAQ) 유니버스 관리
+    
+    stock_api.get_listing()으로 상장 목록을 한 번에 받아 companies에 반영하고,
+    실행 사이에 새로 상장되거나 폐지된 종목을 universe_events에 기록합니다.
+    """
+    
+    # 상장 종목 수가 기존 대비 이 비율 미만이면 업스트림 오류로 보고 상장폐지 처리를 건너뜀
+    MIN_LISTING_RATIO = 0.8
+    
+    def __init__(self, stock_api, markets=MARKETS):
+        self.stock_api = stock_api
+        self.db = stock_api.db
+        self.markets = markets
+    
+    def sync(self):
+        """상장 목록을 받아 companies 동기화 (변경 내역 반환, 목록을 받지 못하면 None)"""
+        listing = self.stock_api.get_listing(self.markets)
+        if listing is None or listing.empty:
+            logger.warning("상장 종목 목록을 가져오지 못해 유니버스 동기화를 건너뜁니다")
+            return None
+        
+        listing = listing.astype(object).where(listing.notna(), None)
+        records = listing.to_dict('records')
+        
+        previous = len(self.db.get_universe())
+        mark_delisted = len(records) >= previous * self.MIN_LISTING_RATIO
+        if not mark_delisted:
+            logger.warning(f"상장 종목 수가 {previous}개에서 {len(records)}개로 급감해 상장폐지 처리를 건너뜁니다")
+        
+        changes = self.db.sync_universe(records, mark_delisted=mark_delisted)
+        if changes:
+            logger.info(
+                f"유니버스 동기화: {changes['total']}개 종목 "
+                f"(신규 {len(changes['listed'])}, 재상장 {len(changes['relisted'])}, 폐지 {len(changes['delisted'])})"
+            )
+        return changes
+    
+    def symbols(self, shard=None):
+        """수집 대상 (symbol, name) 리스트 (시가총액 내림차순, shard가 있으면 해당 샤드만)"""
+        return [
+            (symbol, name) for symbol, name in self.db.get_universe(self.markets)
+            if in_shard(symbol, shard)
+        ]
+    
+    def targets(self, universe='top10', shard=None):
+        """수집 대상 (symbol, name) 리스트
+        
+        universe가 'all'이면 상장 목록을 동기화한 뒤 전 종목을, 'top10'이거나 유니버스가 비어 있으면
+        stock_api.kospi_top10을 반환합니다. shard는 parse_shard 결과 (k, n)입니다.
+        """
+        if universe not in ('top10', 'all'):
+            raise ValueError(f"Unknown universe: {universe} (use top10 or all)")
+        if universe == 'all':
+            self.sync()
+            targets = self.symbols(shard)
+            if targets:
+                return targets
+            logger.warning("유니버스가 비어 있어 코스피 상위 10개 회사로 수집합니다")
+        return [
+            (symbol, name) for symbol, name in self.stock_api.kospi_top10.items()
+            if in_shard(symbol, shard)
+        ]